@@ -0,0 +1,150 @@
+'''
+generators.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+
+# File analyzed by the benchmarks, the others are included by it
+ENTRY = 'main.php'
+
+
+def _php(lines):
+    return '<?php\n%s\n?>\n' % '\n'.join(lines)
+
+
+def assignment_chain(n):
+    '''
+    $v0 = $_GET['a']; $v1 = $v0; ... echo $v<n-1>;
+    '''
+    lines = ["$v0 = $_GET['a'];"]
+    lines.extend('$v%d = $v%d;' % (i, i - 1) for i in xrange(1, n))
+    lines.append('echo $v%d;' % (n - 1))
+    return {ENTRY: _php(lines)}
+
+
+def concat_width(n):
+    '''
+    One assignment that concatenates `n` tainted variables.
+    '''
+    lines = ["$v%d = $_GET['%d'];" % (i, i) for i in xrange(n)]
+    lines.append('$all = %s;' % ' . '.join('$v%d' % i for i in xrange(n)))
+    lines.append('echo $all;')
+    return {ENTRY: _php(lines)}
+
+
+def function_count(n, fanout=4):
+    '''
+    `n` functions, each one called `fanout` times with user input.
+    '''
+    lines = []
+    for i in xrange(n):
+        lines.append('function f%d($a, $b) {' % i)
+        lines.append('    $c = $a . $b;')
+        lines.append('    echo $c;')
+        lines.append('}')
+    for i in xrange(n):
+        for j in xrange(fanout):
+            lines.append("f%d($_GET['%d'], 'x');" % (i, j))
+    return {ENTRY: _php(lines)}
+
+
+def call_fanout(n, functions=4):
+    '''
+    `functions` functions, each one called `n` times with user input.
+    '''
+    return function_count(functions, fanout=n)
+
+
+def method_depth(n):
+    '''
+    A class whose methods call the previous one through $this->, `n`
+    calls deep; the last one reaches the sink.
+    '''
+    lines = ['class A {',
+             '    function m0($a) {',
+             '        echo $a;',
+             '    }']
+    for i in xrange(1, n):
+        lines.append('    function m%d($a) {' % i)
+        lines.append('        $this->m%d($a);' % (i - 1))
+        lines.append('    }')
+    lines.append('}')
+    lines.append('$obj = new A();')
+    lines.append("$obj->m%d($_GET['a']);" % (n - 1))
+    return {ENTRY: _php(lines)}
+
+
+def include_fanout(n):
+    '''
+    The entry file includes `n` files that set a tainted variable each.
+    '''
+    files = {}
+    lines = []
+    for i in xrange(n):
+        name = 'inc%d.php' % i
+        files[name] = _php(["$v%d = $_GET['%d'];" % (i, i)])
+        lines.append("include('%s');" % name)
+        lines.append('echo $v%d;' % i)
+    files[ENTRY] = _php(lines)
+    return files
+
+
+def nesting_depth(n):
+    '''
+    If, While and Foreach statements nested `n` levels deep, the sink is
+    in the innermost one.
+    '''
+    lines = ["$x0 = $_GET['a'];"]
+    for i in xrange(n):
+        indent = '    ' * i
+        kind = i % 3
+        if kind == 0:
+            lines.append('%sif ($c%d) {' % (indent, i))
+        elif kind == 1:
+            lines.append('%swhile ($c%d) {' % (indent, i))
+        else:
+            lines.append('%sforeach ($l%d as $k%d) {' % (indent, i, i))
+        lines.append("%s    $x%d = $x%d . 'a';" % (indent, i + 1, i))
+    lines.append('%secho $x%d;' % ('    ' * n, n))
+    for i in reversed(xrange(n)):
+        lines.append('%s}' % ('    ' * i))
+    return {ENTRY: _php(lines)}
+
+
+# Axis name -> generator(size) that returns {file name: PHP code}
+AXES = {
+    'assignment_chain': assignment_chain,
+    'concat_width': concat_width,
+    'function_count': function_count,
+    'call_fanout': call_fanout,
+    'method_depth': method_depth,
+    'include_fanout': include_fanout,
+    'nesting_depth': nesting_depth,
+}
+
+
+def write_files(files, directory):
+    '''
+    Write the generated `files` to `directory` and return the path of the
+    entry file.
+    '''
+    for name, code in files.iteritems():
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(code)
+    return os.path.join(directory, ENTRY)
@@ -0,0 +1,345 @@
+'''
+samate.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import re
+import math
+import sys
+import json
+import time
+import getopt
+import resource
+import multiprocessing
+
+from lxml import etree
+
+from core.batch import analyze_file, BatchOptions
+from core.vulnerabilities.definitions import load_rule_packs
+from core.exceptions.rule_pack_error import RulePackError
+
+usage_doc = '''SAMATE/Juliet corpus benchmark of the analyzer
+
+Usage:
+
+    python -m benchmarks.samate -m <manifest.xml> [-d <dir>] [-j <jobs>]
+                                [-o <output.json>] [--baseline=<json>]
+
+Options:
+
+    -h or --help
+        Display this help message.
+    
+    -m or --manifest=
+        SARD manifest that lists the test case files and their flaws.
+    
+    -d or --dir=
+        Directory the file paths of the manifest are relative to (default:
+        the directory of the manifest).
+    
+    -j or --jobs=
+        Number of processes used to analyze the files (default: 1).
+    
+    -r or --rules=
+        Comma separated list of rule packs to load.
+    
+    -o or --output=
+        Also write the report to this JSON file.
+    
+    --baseline=
+        Report (JSON) of a previous run. Exit with an error if the
+        precision or the recall are lower than the baseline ones.
+'''
+
+# CWE number -> vulnerability type reported by the analyzer. The flaws of
+# the other CWEs are left out of the accuracy figures.
+CWE_TO_SCA = {
+    22: 'FILE_DISCLOSURE',
+    78: 'OS_COMMANDING',
+    79: 'XSS',
+    89: 'SQL_INJECTION',
+    98: 'FILE_INCLUDE',
+}
+
+CWE_RE = re.compile(r'CWE-0*(\d+)')
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def read_manifest(manifest_path):
+    '''
+    Return {file path: [(vuln. type, line), ...]} with the flaws of every
+    file of the manifest; the vuln. type is None for the CWEs in no
+    CWE_TO_SCA. The manifest is parsed incrementally, big suites are fine.
+    '''
+    files = {}
+    for _, elem in etree.iterparse(manifest_path, tag='file'):
+        flaws = files.setdefault(elem.get('path'), [])
+        for flaw in elem.iterfind('flaw'):
+            match = CWE_RE.search(flaw.get('name', ''))
+            vulnty = CWE_TO_SCA.get(int(match.group(1))) if match else None
+            flaws.append((vulnty, int(flaw.get('line'))))
+        elem.clear()
+    return files
+
+
+def _max_rss():
+    '''
+    Peak resident set size of this process in KB.
+    '''
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss /= 1024
+    return rss
+
+
+# Per process options, sent once to every worker by the pool initializer
+_options = None
+
+
+def _init_worker(options):
+    global _options
+    _options = options
+
+
+def _timed_analyze(infile):
+    start = time.time()
+    result = analyze_file(infile, _options)
+    return result, time.time() - start, _max_rss()
+
+
+def percentile(values, percent):
+    '''
+    Nearest-rank percentile of the sorted `values`.
+    '''
+    if not values:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[max(0, rank - 1)]
+
+
+def _ratio(num, den):
+    return float(num) / den if den else None
+
+
+def accuracy(expected, found):
+    '''
+    Compare the `expected` and `found` sets of (file, vuln. type, line)
+    and return the true positives, false positives and false negatives,
+    and the precision and recall, in total and per vuln. type.
+    '''
+    def figures(expected, found):
+        tp = len(expected & found)
+        return {'true_positives': tp,
+                'false_positives': len(found) - tp,
+                'false_negatives': len(expected) - tp,
+                'precision': _ratio(tp, len(found)),
+                'recall': _ratio(tp, len(expected))}
+    
+    res = figures(expected, found)
+    res['by_type'] = {}
+    for vulnty in set(v for _, v, _ in expected | found):
+        res['by_type'][vulnty] = figures(
+                        set(e for e in expected if e[1] == vulnty),
+                        set(f for f in found if f[1] == vulnty))
+    return res
+
+
+def run_corpus(manifest_path, base_dir=None, jobs=1, options=None):
+    '''
+    Analyze all the files of the manifest and return the report: the
+    throughput, per file latency percentiles, peak RSS and accuracy
+    against the manifest flaws.
+    '''
+    if base_dir is None:
+        base_dir = os.path.dirname(manifest_path)
+    options = options or BatchOptions()
+    
+    manifest = read_manifest(manifest_path)
+    input_files = [os.path.normpath(os.path.join(base_dir, f))
+                   for f in sorted(manifest)]
+    
+    expected = set()
+    unsupported = 0
+    for file_name, flaws in manifest.iteritems():
+        path = os.path.normpath(os.path.join(base_dir, file_name))
+        for vulnty, line in flaws:
+            if vulnty is None:
+                unsupported += 1
+            else:
+                expected.add((path, vulnty, line))
+    
+    start = time.time()
+    if jobs <= 1:
+        _init_worker(options)
+        timed_results = [_timed_analyze(f) for f in input_files]
+    else:
+        pool = multiprocessing.Pool(jobs, _init_worker, (options,))
+        try:
+            # chunksize=1, the analysis time varies a lot between files
+            timed_results = pool.map(_timed_analyze, input_files, 1)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    elapsed = time.time() - start
+    
+    found = set()
+    errors = {}
+    latencies = []
+    peak_rss = _max_rss()
+    for result, latency, rss in timed_results:
+        latencies.append(latency)
+        peak_rss = max(peak_rss, rss)
+        if result.error:
+            errors[result.infile] = result.error
+        for vulnty, traces in result.get_vulns().iteritems():
+            for trace in traces:
+                found.add((os.path.normpath(trace[0].get_file_name()),
+                           vulnty, trace[0].lineno))
+    latencies.sort()
+    
+    return {'manifest': manifest_path,
+            'jobs': jobs,
+            'files': len(input_files),
+            'errors': errors,
+            'elapsed': elapsed,
+            'files_per_second': _ratio(len(input_files), elapsed),
+            'latency': dict(('p%d' % p, percentile(latencies, p))
+                            for p in PERCENTILES),
+            'peak_rss_kb': peak_rss,
+            'unsupported_flaws': unsupported,
+            'accuracy': accuracy(expected, found)}
+
+
+def regressions(report, baseline):
+    '''
+    Return the accuracy figures of `report` that are lower than the ones
+    of the `baseline` report.
+    '''
+    res = []
+    for name in ('precision', 'recall'):
+        value = report['accuracy'][name]
+        previous = baseline['accuracy'][name]
+        if previous is not None and (value is None or value < previous):
+            res.append((name, previous, value))
+    return res
+
+
+def print_report(report):
+    acc = report['accuracy']
+    print 'Files:        %d (%d errors)' % (report['files'],
+                                            len(report['errors']))
+    print 'Throughput:   %.2f files/s' % (report['files_per_second'] or 0)
+    print 'Latency:      %s' % ', '.join(
+                    'p%d %.4fs' % (p, report['latency']['p%d' % p] or 0)
+                    for p in PERCENTILES)
+    print 'Peak RSS:     %d KB' % report['peak_rss_kb']
+    print 'Precision:    %s' % _format_ratio(acc['precision'])
+    print 'Recall:       %s' % _format_ratio(acc['recall'])
+    for vulnty in sorted(acc['by_type']):
+        figures = acc['by_type'][vulnty]
+        print '    %-16s TP %d FP %d FN %d' % (vulnty,
+                                               figures['true_positives'],
+                                               figures['false_positives'],
+                                               figures['false_negatives'])
+    if report['unsupported_flaws']:
+        print 'Flaws of unsupported CWEs: %d' % report['unsupported_flaws']
+
+
+def _format_ratio(value):
+    return '-' if value is None else '%.3f' % value
+
+
+def usage():
+    print usage_doc
+
+
+def main():
+    try:
+        long_options = ['help', 'manifest=', 'dir=', 'jobs=', 'rules=',
+                        'output=', 'baseline=']
+        opts, _ = getopt.getopt(sys.argv[1:], "hm:d:j:r:o:", long_options)
+    except getopt.GetoptError:
+        usage()
+        return -3
+    
+    manifest_path = None
+    base_dir = None
+    jobs = 1
+    rule_packs = []
+    output = None
+    baseline_path = None
+    
+    for o, a in opts:
+        if o in ('-h', '--help'):
+            usage()
+            return 0
+        if o in ('-m', '--manifest'):
+            manifest_path = a
+        if o in ('-d', '--dir'):
+            base_dir = a
+        if o in ('-j', '--jobs'):
+            try:
+                jobs = int(a)
+            except ValueError:
+                usage()
+                return -3
+        if o in ('-r', '--rules'):
+            rule_packs = a.split(',')
+        if o in ('-o', '--output'):
+            output = a
+        if o == '--baseline':
+            baseline_path = a
+    
+    if manifest_path is None:
+        usage()
+        return -3
+    
+    try:
+        load_rule_packs(rule_packs)
+    except RulePackError, rpe:
+        print rpe
+        return -3
+    
+    report = run_corpus(manifest_path, base_dir, jobs,
+                        BatchOptions(rule_packs=rule_packs))
+    print_report(report)
+    
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+    
+    if baseline_path is not None:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        worse = regressions(report, baseline)
+        for name, previous, value in worse:
+            print '%s went down from %s to %s' % (name,
+                                                 _format_ratio(previous),
+                                                 _format_ratio(value))
+        if worse:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+'''
+scaling.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import sys
+import math
+import json
+import time
+import getopt
+import shutil
+import resource
+import tempfile
+import multiprocessing
+
+from core.sca_core import PhpSCA
+from core.stats import Stats
+from benchmarks.generators import AXES, write_files
+
+usage_doc = '''Scaling benchmarks of the analyzer
+
+Usage:
+
+    python -m benchmarks.scaling [-a <axes>] [-s <sizes>] [-r <repeat>]
+                                 [-o <output.json>] [--max-exponent=<x>]
+
+Options:
+
+    -h or --help
+        Display this help message.
+    
+    -a or --axes=
+        Comma separated list of axes (default: all of them): %s
+    
+    -s or --sizes=
+        Comma separated list of sizes of the generated code (default:
+        %s).
+    
+    -r or --repeat=
+        Number of runs per size, the fastest one is reported (default: 3).
+    
+    -o or --output=
+        Also write the measurements to this JSON file.
+    
+    --max-exponent=
+        Exit with an error when the CPU time of an axis grows faster than
+        size ** max-exponent, e.g. 1.5 to catch quadratic behaviour.
+'''
+
+SIZES = (10, 20, 40, 80, 160)
+
+REPEAT = 3
+
+
+def _max_rss():
+    '''
+    Peak resident set size of this process in KB.
+    '''
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # Bytes instead of KB
+        rss /= 1024
+    return rss
+
+
+def _analyze(entry):
+    '''
+    Analyze `entry` and return its measurements. Runs in a brand new
+    process, so the peak RSS is the one of this analysis only.
+    '''
+    rss_before = _max_rss()
+    stats = Stats()
+    start_wall, start_cpu = time.time(), time.clock()
+    try:
+        vulns = PhpSCA(infile=entry, stats=stats).get_vulns()
+    except Exception, e:
+        return {'error': '%s: %s' % (type(e).__name__, e)}
+    wall, cpu = time.time() - start_wall, time.clock() - start_cpu
+    rss = _max_rss()
+    return {'wall': wall,
+            'cpu': cpu,
+            'peak_rss_kb': rss,
+            'rss_delta_kb': rss - rss_before,
+            'findings': sum(len(traces) for traces in vulns.itervalues()),
+            'phases': stats.to_dict()['wall']}
+
+
+def _run_isolated(func, *args):
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply(func, args)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def measure(axis, size, repeat=REPEAT):
+    '''
+    Generate the code of `axis` with `size` and return the measurements of
+    the fastest of `repeat` analyses, each one in its own process.
+    '''
+    directory = tempfile.mkdtemp()
+    try:
+        entry = write_files(AXES[axis](size), directory)
+        runs = [_run_isolated(_analyze, entry) for _ in xrange(repeat)]
+    finally:
+        shutil.rmtree(directory)
+    
+    for run in runs:
+        if 'error' in run:
+            run.update(axis=axis, size=size)
+            return run
+    best = min(runs, key=lambda run: run['wall'])
+    best['peak_rss_kb'] = max(run['peak_rss_kb'] for run in runs)
+    best.update(axis=axis, size=size)
+    return best
+
+
+def scaling_exponent(points):
+    '''
+    Return the slope of the least squares fit of log(time) against
+    log(size): ~1 for linear growth, ~2 for quadratic, etc. None when
+    there are less than two usable points.
+    
+    @param points: list of (size, time) tuples
+    '''
+    points = [(math.log(s), math.log(t)) for s, t in points if s > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+
+def run(axes, sizes=SIZES, repeat=REPEAT, out=sys.stdout):
+    '''
+    Measure every axis with every size, print a table to `out` and return
+    {axis: {'exponent': x, 'points': [measurement, ...]}}.
+    '''
+    results = {}
+    out.write('%-18s %6s %10s %10s %12s %9s\n' % ('Axis', 'Size', 'Wall',
+                                                 'CPU', 'Peak RSS KB',
+                                                 'Findings'))
+    for axis in axes:
+        points = []
+        for size in sizes:
+            point = measure(axis, size, repeat)
+            points.append(point)
+            if 'error' in point:
+                out.write('%-18s %6d  %s\n' % (axis, size, point['error']))
+                # Bigger sizes fail too
+                break
+            out.write('%-18s %6d %10.4f %10.4f %12d %9d\n' % (
+                      axis, size, point['wall'], point['cpu'],
+                      point['peak_rss_kb'], point['findings']))
+        # CPU time, less noisy than the wall time on a busy machine
+        exponent = scaling_exponent([(p['size'], p['cpu'])
+                                     for p in points if 'error' not in p])
+        results[axis] = {'exponent': exponent, 'points': points}
+        if exponent is not None:
+            out.write('%-18s exponent %.2f\n' % (axis, exponent))
+    return results
+
+
+def usage():
+    print usage_doc % (', '.join(sorted(AXES)),
+                       ','.join(str(s) for s in SIZES))
+
+
+def main():
+    try:
+        long_options = ['help', 'axes=', 'sizes=', 'repeat=', 'output=',
+                        'max-exponent=']
+        opts, _ = getopt.getopt(sys.argv[1:], "ha:s:r:o:", long_options)
+    except getopt.GetoptError:
+        usage()
+        return -3
+    
+    axes = sorted(AXES)
+    sizes = SIZES
+    repeat = REPEAT
+    output = None
+    max_exponent = None
+    
+    try:
+        for o, a in opts:
+            if o in ('-h', '--help'):
+                usage()
+                return 0
+            if o in ('-a', '--axes'):
+                axes = a.split(',')
+            if o in ('-s', '--sizes'):
+                sizes = [int(s) for s in a.split(',')]
+            if o in ('-r', '--repeat'):
+                repeat = int(a)
+            if o in ('-o', '--output'):
+                output = a
+            if o == '--max-exponent':
+                max_exponent = float(a)
+    except ValueError:
+        usage()
+        return -3
+    
+    unknown = [axis for axis in axes if axis not in AXES]
+    if unknown or repeat < 1:
+        usage()
+        return -3
+    
+    results = run(axes, sizes, repeat)
+    
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    
+    if max_exponent is not None:
+        slow = [axis for axis in axes
+                if results[axis]['exponent'] > max_exponent]
+        for axis in slow:
+            print "'%s' grows faster than size ** %s" % (axis, max_exponent)
+        if slow:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+'''
+batch.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import re
+import cProfile
+import hashlib
+import traceback
+import multiprocessing
+
+from core.sca_core import PhpSCA
+from core.results import AnalysisResult
+from core.prefilter import Prefilter
+from core.stats import Stats
+from core.profiler import Profiler
+from core.nodes.function_call import FuncCall
+from core.cache.ast_cache import ASTCache
+from core.cache.result_cache import ResultCache
+from core.exceptions.syntax_error import CodeSyntaxError
+from core.vulnerabilities.definitions import (load_rule_packs,
+                                              get_rule_pack_paths,
+                                              rules_fingerprint)
+
+
+class BatchOptions(object):
+    '''
+    Picklable analysis settings shared by all the files of a batch.
+    '''
+
+    def __init__(self, cache_dir=None, cache_size=ASTCache.MAX_SIZE,
+                 max_traces=FuncCall.MAX_VULNTRACES, rule_packs=(),
+                 cache_results=False,
+                 result_cache_size=ResultCache.MAX_SIZE, prefilter=False,
+                 stats=False, profile=False, profile_dir=None):
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.max_traces = max_traces
+        self.rule_packs = list(rule_packs)
+        # Store the results in cache_dir too, see ResultCache
+        self.cache_results = cache_results
+        self.result_cache_size = result_cache_size
+        # Skip the files that can't have vulnerabilities, see Prefilter
+        self.prefilter = prefilter
+        # Add the phase times and counters to the results, see core.stats
+        self.stats = stats
+        # Also record the time per visitor and AST node type, see Profiler
+        self.profile = profile
+        # Directory where a cProfile dump of every analyzed file is stored
+        self.profile_dir = profile_dir
+
+
+# Per process AST cache, created on first use
+_ast_cache = None
+
+
+def _get_ast_cache(options):
+    global _ast_cache
+    if options.cache_dir is None:
+        return None
+    if _ast_cache is None or _ast_cache.cache_dir != options.cache_dir:
+        _ast_cache = ASTCache(options.cache_dir, options.cache_size)
+    return _ast_cache
+
+
+# Per process result cache, created on first use
+_result_cache = None
+
+
+def _get_result_cache(options):
+    global _result_cache
+    if options.cache_dir is None or not options.cache_results:
+        return None
+    if _result_cache is None or \
+       _result_cache.cache_dir != options.cache_dir:
+        _result_cache = ResultCache(options.cache_dir,
+                                    options.result_cache_size)
+    return _result_cache
+
+
+# Per process prefilter, created on first use
+_prefilter = None
+
+
+def _get_prefilter(project):
+    global _prefilter
+    if _prefilter is None or _prefilter.project is not project:
+        _prefilter = Prefilter(project)
+    return _prefilter
+
+
+def _prefiltered_result(infile, project, stats=None):
+    '''
+    Return an empty AnalysisResult for `infile` if the prefilter tells it
+    can't have vulnerabilities, else None.
+    '''
+    with open(infile, 'r') as f:
+        code = f.read()
+    if _get_prefilter(project).may_have_findings(code):
+        return None
+    
+    if stats is not None:
+        stats.count('skipped')
+        stats = stats.to_dict()
+    # Same dependencies as the analysis would record, see State
+    digest = hashlib.sha1(code).hexdigest()
+    return AnalysisResult(infile, dependencies={os.path.normpath(infile):
+                                                digest},
+                          skipped=True, stats=stats)
+
+
+def _result_settings(options, project):
+    '''
+    Return the string that identifies the settings the results depend on,
+    besides the analyzed files.
+    '''
+    return '%s:%s:%s:%s' % (rules_fingerprint(), options.max_traces,
+                            options.prefilter,
+                            project.fingerprint() if project else '')
+
+
+def _profile_path(profile_dir, infile):
+    '''
+    Return the path of the cProfile dump of `infile` in `profile_dir`.
+    '''
+    name = re.sub(r'[^\w.-]+', '_', os.path.normpath(infile).strip(os.sep))
+    return os.path.join(profile_dir, name + '.pstats')
+
+
+def _new_analyzer(infile, options, project, stats):
+    kwargs = dict(infile=infile, ast_cache=_get_ast_cache(options),
+                  project=project, stats=stats,
+                  max_traces=options.max_traces)
+    if options.profile_dir is None:
+        return PhpSCA(**kwargs)
+    
+    profile = cProfile.Profile()
+    try:
+        # The vulnerabilities are looked for in PhpSCA.__init__
+        return profile.runcall(PhpSCA, **kwargs)
+    finally:
+        try:
+            os.makedirs(options.profile_dir)
+        except OSError:
+            # Created by another worker
+            pass
+        profile.dump_stats(_profile_path(options.profile_dir, infile))
+
+
+def _load_rule_packs(options):
+    if options.rule_packs != get_rule_pack_paths():
+        load_rule_packs(options.rule_packs, options.cache_dir)
+
+
+def analyze_file(infile, options=None, project=None):
+    '''
+    Analyze `infile` and return an AnalysisResult. Errors are reported in
+    the result instead of being raised, a broken file must not abort the
+    whole batch.
+    
+    @param project: Project whose declarations are available to `infile`
+    '''
+    options = options or BatchOptions()
+    _load_rule_packs(options)
+    
+    if options.profile:
+        stats = Profiler()
+    elif options.stats:
+        stats = Stats()
+    else:
+        stats = None
+    
+    result_cache = _get_result_cache(options)
+    if result_cache is not None:
+        settings = _result_settings(options, project)
+        result = result_cache.get(infile, settings)
+        if result is not None:
+            if stats is not None:
+                stats.count('cached')
+                result.stats = stats.to_dict()
+            return result
+    
+    try:
+        result = None
+        if options.prefilter:
+            result = _prefiltered_result(infile, project, stats)
+        if result is None:
+            analyzer = _new_analyzer(infile, options, project, stats)
+            result = AnalysisResult.from_analyzer(infile, analyzer)
+    except CodeSyntaxError, cse:
+        return AnalysisResult(infile, error=str(cse),
+                              stats=stats.to_dict() if stats else None)
+    except IOError, ioe:
+        return AnalysisResult(infile, error=str(ioe))
+    except Exception:
+        # Analyzer bug, report it with the rest of the results
+        return AnalysisResult(infile, error=traceback.format_exc(),
+                              stats=stats.to_dict() if stats else None)
+    
+    if result_cache is not None:
+        result_cache.set(result, settings)
+    return result
+
+
+# Per process project, sent once to every worker by the pool initializer
+_project = None
+
+
+def _init_worker(project):
+    global _project
+    _project = project
+
+
+def _analyze_file_star(args):
+    return analyze_file(*args, project=_project)
+
+
+def analyze_files(input_files, jobs=1, options=None, project=None):
+    '''
+    Analyze all `input_files` and yield their AnalysisResults in the same
+    order as `input_files`.
+
+    @param jobs: Number of worker processes. With jobs=1 the files are
+                 analyzed in the current process.
+    @param project: Project shared by all the input files (optional)
+    '''
+    options = options or BatchOptions()
+
+    if jobs <= 1 or len(input_files) <= 1:
+        for infile in input_files:
+            yield analyze_file(infile, options, project)
+        return
+
+    pool = multiprocessing.Pool(min(jobs, len(input_files)),
+                                _init_worker, (project,))
+    try:
+        # imap keeps the input order, chunksize=1 because the analysis time
+        # varies a lot from file to file
+        for result in pool.imap(_analyze_file_star,
+                                ((f, options) for f in input_files), 1):
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
@@ -0,0 +1,102 @@
+'''
+ast_cache.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import cPickle
+
+from core.cache.disk_cache import DiskCache
+
+
+def dump_ast(ast_code):
+    '''
+    Serialize a freshly parsed AST. Return None when the AST can't be
+    serialized (e.g. nesting deeper than the recursion limit).
+    '''
+    try:
+        return cPickle.dumps(ast_code, cPickle.HIGHEST_PROTOCOL)
+    except (RuntimeError, cPickle.PicklingError):
+        return None
+
+
+def load_ast(blob):
+    '''
+    Return a new AST built from the `blob` returned by dump_ast. Every call
+    returns brand new nodes.
+    '''
+    return cPickle.loads(blob)
+
+
+class ASTCache(DiskCache):
+    '''
+    Content-addressed, size-bounded on-disk cache of parsed PHP ASTs.
+
+    Entries are keyed by the hash of the source code and the phply version
+    and evicted in least-recently-used order (see DiskCache).
+    '''
+
+    # Bump when the on-disk format changes
+    FORMAT_VERSION = '1'
+
+    MAX_SIZE = 256 * 1024 * 1024
+
+    EXTENSION = '.ast'
+
+    def __init__(self, cache_dir, max_size=MAX_SIZE):
+        '''
+        @param cache_dir: Directory where the serialized ASTs are stored
+        @param max_size: Max size in bytes of the cache directory
+        '''
+        super(ASTCache, self).__init__(cache_dir, max_size)
+
+    def get(self, code):
+        '''
+        Return the cached AST for `code` or None if there is no such entry.
+        '''
+        key = self.key(code)
+        blob = self._read(key)
+        if blob is None:
+            self.misses += 1
+            return None
+
+        try:
+            ast_code = load_ast(blob)
+        except Exception:
+            # Truncated or otherwise broken entry
+            self._remove(self._path_for(key))
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return ast_code
+
+    def set(self, code, ast_code):
+        '''
+        Store the AST for `code`. Must be called before the AST is traversed,
+        otherwise the annotations added by the visitors are stored too.
+        '''
+        blob = dump_ast(ast_code)
+        if blob is None:
+            return
+        self.set_blob(code, blob)
+
+    def set_blob(self, code, blob):
+        '''
+        Store an already serialized AST for `code`.
+        '''
+        self._write(self.key(code), blob)
@@ -0,0 +1,203 @@
+'''
+disk_cache.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import hashlib
+import tempfile
+
+
+def phply_version():
+    '''
+    Return the installed phply version. The AST layout depends on it, so it
+    is part of every cache key.
+    '''
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('phply').version
+    except Exception:
+        return 'unknown'
+
+
+# Mode of the written files, mkstemp creates them readable by the owner
+# only
+FILE_MODE = 0644
+
+
+def user_cache_dir():
+    '''
+    Return the per user cache directory: $XDG_CACHE_HOME/sca, ~/.cache/sca
+    by default.
+    '''
+    base = os.environ.get('XDG_CACHE_HOME') or \
+           os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'sca')
+
+
+def write_file(path, blob):
+    '''
+    Write `blob` to `path` through a temp file renamed over it, so
+    concurrent readers never see a partial file. Raises IOError or OSError.
+    '''
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(blob)
+        os.chmod(tmp_path, FILE_MODE)
+        os.rename(tmp_path, path)
+    except (IOError, OSError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DiskCache(object):
+    '''
+    Content-addressed, size-bounded on-disk store of serialized entries.
+
+    Entries are keyed by a hash salted with the format version and the
+    phply version and evicted in least-recently-used order (using the file
+    mtime) once the cache directory grows over `max_size` bytes.
+    '''
+
+    # Bump when the on-disk format changes
+    FORMAT_VERSION = '1'
+
+    MAX_SIZE = 256 * 1024 * 1024
+
+    # After eviction the cache is left at this fraction of max_size
+    EVICT_RATIO = 0.9
+
+    # Entries of different caches can share a directory as long as their
+    # extensions differ
+    EXTENSION = '.bin'
+
+    def __init__(self, cache_dir, max_size=None):
+        '''
+        @param cache_dir: Directory where the entries are stored
+        @param max_size: Max size in bytes of the entries, MAX_SIZE if None
+        '''
+        self._cache_dir = cache_dir
+        self._max_size = self.MAX_SIZE if max_size is None else max_size
+        self._salt = '%s:%s:' % (self.FORMAT_VERSION, phply_version())
+        # Total size of the entries, lazily computed on first store
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def key(self, data):
+        return hashlib.sha1(self._salt + data).hexdigest()
+
+    def _path_for(self, key):
+        return os.path.join(self._cache_dir, key[:2], key + self.EXTENSION)
+
+    def _read(self, key):
+        '''
+        Return the entry stored for `key` and mark it as recently used, or
+        None if there is no such entry.
+        '''
+        path = self._path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+        except IOError:
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return blob
+
+    def _write(self, key, blob):
+        path = self._path_for(key)
+        dirname = os.path.dirname(path)
+        try:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            write_file(path, blob)
+        except (IOError, OSError):
+            return
+
+        if self._size is None:
+            self._size = self._disk_size()
+        else:
+            self._size += len(blob)
+
+        if self._size > self._max_size:
+            self._evict()
+
+    def _entries(self):
+        '''
+        Yield (mtime, size, path) for every cache entry
+        '''
+        for dirpath, _, filenames in os.walk(self._cache_dir):
+            for fname in filenames:
+                if not fname.endswith(self.EXTENSION):
+                    continue
+                path = os.path.join(dirpath, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, path
+
+    def _disk_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        '''
+        Remove the least recently used entries until the cache size is below
+        EVICT_RATIO * max_size.
+        '''
+        entries = sorted(self._entries())
+        size = sum(e[1] for e in entries)
+        target = self._max_size * self.EVICT_RATIO
+
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            if self._remove(path):
+                size -= entry_size
+
+        self._size = size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def clear(self):
+        for _, _, path in list(self._entries()):
+            self._remove(path)
+        self._size = 0
+
+    def __repr__(self):
+        return "<%s at '%s'>" % (type(self).__name__, self._cache_dir)
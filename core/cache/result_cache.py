@@ -0,0 +1,134 @@
+'''
+result_cache.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import hashlib
+import cPickle
+
+from core.cache.disk_cache import DiskCache
+
+
+def file_digest(file_name):
+    '''
+    Return the sha1 of the content of `file_name`, None if it can't be read.
+    Same digest as State.add_dependency.
+    '''
+    try:
+        with open(file_name, 'r') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except IOError:
+        return None
+
+
+class ResultCache(DiskCache):
+    '''
+    Size-bounded on-disk cache of AnalysisResults, an unchanged input file
+    is neither parsed nor traveled.
+
+    A result is stored under the hash of its closure (the content hashes of
+    the input file and of every file it includes, see State.dependencies)
+    and of the analysis settings (rules fingerprint, etc.). The closure of
+    every input file is recorded too, so a lookup only has to hash the
+    files listed there. Entries are evicted in least-recently-used order
+    (see DiskCache).
+    '''
+
+    # Bump when the on-disk format or the analysis results change
+    FORMAT_VERSION = '1'
+
+    MAX_SIZE = 64 * 1024 * 1024
+
+    EXTENSION = '.res'
+
+    def __init__(self, cache_dir, max_size=MAX_SIZE):
+        '''
+        @param cache_dir: Directory where the results are stored
+        @param max_size: Max size in bytes of the stored results
+        '''
+        super(ResultCache, self).__init__(cache_dir, max_size)
+        # file name -> (mtime, size, digest), the libraries are part of the
+        # closure of most input files
+        self._digests = {}
+
+    def _digest(self, file_name):
+        try:
+            st = os.stat(file_name)
+        except OSError:
+            return None
+        stamp = (st.st_mtime, st.st_size)
+        cached = self._digests.get(file_name)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        digest = file_digest(file_name)
+        self._digests[file_name] = (stamp, digest)
+        return digest
+
+    def _closure_key(self, infile):
+        return self.key('closure:' + os.path.abspath(infile))
+
+    def _result_key(self, dependencies, settings):
+        return self.key('result:%s:%r' % (settings,
+                                          sorted(dependencies.iteritems())))
+
+    def _load(self, key):
+        blob = self._read(key)
+        if blob is None:
+            return None
+        try:
+            return cPickle.loads(blob)
+        except Exception:
+            # Truncated or otherwise broken entry
+            self._remove(self._path_for(key))
+            return None
+
+    def get(self, infile, settings=''):
+        '''
+        Return the cached AnalysisResult for `infile` or None if `infile`
+        or any of its includes changed since it was stored.
+
+        @param settings: String that identifies the analysis settings, e.g.
+                         the rules fingerprint
+        '''
+        files = self._load(self._closure_key(infile))
+        result = None
+        if files is not None:
+            dependencies = dict((f, self._digest(f)) for f in files)
+            result = self._load(self._result_key(dependencies, settings))
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        result.infile = infile
+        return result
+
+    def set(self, result, settings=''):
+        '''
+        Store the AnalysisResult `result`. Results without dependencies
+        (e.g. the file couldn't be read) aren't cached.
+        '''
+        if result.error or not result.dependencies:
+            return
+        self._write(self._closure_key(result.infile),
+                    cPickle.dumps(sorted(result.dependencies),
+                                  cPickle.HIGHEST_PROTOCOL))
+        self._write(self._result_key(result.dependencies, settings),
+                    cPickle.dumps(result, cPickle.HIGHEST_PROTOCOL))
@@ -0,0 +1,196 @@
+'''
+diff_scan.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import shutil
+import tarfile
+import tempfile
+import subprocess
+from cStringIO import StringIO
+from collections import defaultdict
+
+from core.batch import analyze_files, BatchOptions
+from core.project import Project
+from core.results import AnalysisResult, TraceItem
+from core.symbol_index import SymbolIndex
+from core.exceptions.git_error import GitError
+
+
+def git(repo_dir, *args):
+    '''
+    Run git in `repo_dir` and return its output.
+    
+    @raise GitError: When git fails
+    '''
+    try:
+        proc = subprocess.Popen(('git',) + args, cwd=repo_dir,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError, ose:
+        raise GitError, "Unable to run git: %s" % ose
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise GitError, "git %s failed: %s" % (args[0], err.strip())
+    return out
+
+
+def changed_files(repo_dir, base, head):
+    '''
+    Return the files changed (added, modified or deleted) between the
+    `base` and `head` revisions, relative to `repo_dir`.
+    '''
+    out = git(repo_dir, 'diff', '--name-only', '--relative', '--no-renames',
+              '-z', base, head, '--')
+    return [f for f in out.split('\0') if f]
+
+
+def export_revision(repo_dir, rev, dest):
+    '''
+    Write the content of `repo_dir` at revision `rev` to the `dest` dir.
+    '''
+    prefix = git(repo_dir, 'rev-parse', '--show-prefix').strip()
+    archive = git(repo_dir, 'archive', '--format=tar', '%s:%s' % (rev, prefix))
+    
+    tar = tarfile.open(fileobj=StringIO(archive))
+    try:
+        tar.extractall(dest)
+    finally:
+        tar.close()
+
+
+def finding_key(vulnty, trace):
+    '''
+    Key used to match the findings of both revisions. Line numbers aren't
+    part of it, code that just moved around isn't reported as new.
+    '''
+    return (vulnty,) + tuple((item.kind, item.name, item.file_name)
+                             for item in trace)
+
+
+def new_findings(result, base_result=None):
+    '''
+    Return an AnalysisResult with the vulnerabilities and alerts of `result`
+    that aren't in `base_result` (the result for the same file in the base
+    revision, None if the file is new).
+    '''
+    if base_result is None or result.error:
+        return result
+    
+    # A finding repeated in head is new once per extra occurrence
+    seen = defaultdict(int)
+    for vulnty, traces in base_result.get_vulns().iteritems():
+        for trace in traces:
+            seen[finding_key(vulnty, trace)] += 1
+    
+    vulns = {}
+    for vulnty, traces in result.get_vulns().iteritems():
+        for trace in traces:
+            key = finding_key(vulnty, trace)
+            if seen[key]:
+                seen[key] -= 1
+            else:
+                vulns.setdefault(vulnty, []).append(trace)
+    
+    base_alerts = set(base_result.get_alerts())
+    alerts = [a for a in result.get_alerts() if a not in base_alerts]
+    
+    return AnalysisResult(result.infile, vulns, alerts,
+                          dependencies=result.dependencies,
+                          stats=result.stats)
+
+
+def _relative_result(result, root):
+    '''
+    Return `result` with the file names relative to `root`, the export dir
+    of a revision. The results of both revisions can be matched and are
+    reported with repository relative file names.
+    '''
+    prefix = os.path.join(root, '')
+    def relative(text):
+        return text.replace(prefix, '') if text else text
+    
+    vulns = {}
+    for vulnty, traces in result.get_vulns().iteritems():
+        vulns[vulnty] = [[TraceItem(item.kind, item.name, item.lineno,
+                                    relative(item.file_name),
+                                    relative(item.text))
+                          for item in trace] for trace in traces]
+    dependencies = dict((relative(file_name), digest) for file_name, digest
+                        in result.dependencies.iteritems())
+    return AnalysisResult(relative(result.infile), vulns,
+                          [relative(alert) for alert in result.get_alerts()],
+                          error=relative(result.error),
+                          dependencies=dependencies, skipped=result.skipped,
+                          stats=result.stats)
+
+
+def diff_scan(repo_dir, base, head, include=Project.INCLUDE, exclude=(),
+              jobs=1, options=None, ast_cache=None):
+    '''
+    Analyze the entry points of `repo_dir` affected by the changes between
+    the `base` and `head` git revisions and return their AnalysisResults,
+    with the findings that are already in `base` left out.
+    
+    Both revisions are exported with `git archive`, the working tree isn't
+    used. The affected entry points are the changed files and the files
+    that include them or use a function or class they declare or declared
+    (see Project.get_dependents).
+    
+    @raise GitError: When the revisions can't be read
+    '''
+    options = options or BatchOptions()
+    changed = changed_files(repo_dir, base, head)
+    if not changed:
+        return []
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        base_dir = os.path.join(tmp_dir, 'base')
+        head_dir = os.path.join(tmp_dir, 'head')
+        export_revision(repo_dir, base, base_dir)
+        export_revision(repo_dir, head, head_dir)
+        
+        base_project = Project(base_dir, include, exclude, ast_cache)
+        head_project = Project(head_dir, include, exclude, ast_cache)
+        
+        # Declarations removed from (or moved out of) the changed files
+        names = set()
+        for file_name in changed:
+            for symbol in base_project.symbols.get_symbols(
+                                        os.path.join(base_dir, file_name)):
+                if symbol.kind != SymbolIndex.METHOD:
+                    names.add(symbol.name)
+        entries = [os.path.relpath(e, head_dir)
+                   for e in head_project.get_dependents(changed, names)]
+        
+        # The entry points are analyzed by absolute path, the process
+        # working dir is left alone
+        head_results = [_relative_result(r, head_dir) for r in analyze_files(
+            [os.path.join(head_dir, e) for e in entries], jobs, options,
+            head_project)]
+        base_entries = [os.path.join(base_dir, e) for e in entries
+                        if os.path.isfile(os.path.join(base_dir, e))]
+        base_results = dict((r.infile, r) for r in (
+            _relative_result(r, base_dir) for r in analyze_files(
+                base_entries, jobs, options, base_project)))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    return [new_findings(result, base_results.get(result.infile))
+            for result in head_results]
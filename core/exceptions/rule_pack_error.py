@@ -0,0 +1,2 @@
+class RulePackError(Exception):
+    pass
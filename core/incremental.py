@@ -0,0 +1,154 @@
+'''
+incremental.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import hashlib
+import cPickle
+
+from core.batch import analyze_files, BatchOptions
+from core.cache.disk_cache import write_file
+from core.cache.result_cache import file_digest
+from core.vulnerabilities.definitions import rules_fingerprint
+
+
+# Bump when the manifest format or the analysis results change
+FORMAT_VERSION = 1
+
+
+def options_fingerprint(options, project=None):
+    '''
+    Return a hash of the settings that change the results of every file:
+    rule packs, max. number of traces, prefilter and the project
+    declarations.
+    '''
+    settings = (FORMAT_VERSION, options.max_traces, options.prefilter,
+                rules_fingerprint(),
+                project.fingerprint() if project is not None else None)
+    return hashlib.sha1(repr(settings)).hexdigest()
+
+
+class Manifest(object):
+    '''
+    Results of the previous run, stored on disk. Every AnalysisResult
+    records the closure of files the analysis read (the input file, its
+    includes and the project files it used) and their content hash; a
+    result is reused while none of them changed.
+    '''
+
+    def __init__(self, path, fingerprint):
+        '''
+        @param path: Manifest file
+        @param fingerprint: options_fingerprint() of the current run. The
+                            manifest is discarded if it was saved with a
+                            different one.
+        '''
+        self.path = path
+        self.fingerprint = fingerprint
+        # normalized input file -> AnalysisResult
+        self._results = {}
+        # memo of the current content hashes, most files are in the
+        # closure of many input files
+        self._digests = {}
+        self.reused = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                version, fingerprint, results = cPickle.load(f)
+        except IOError:
+            return
+        except Exception:
+            # Truncated or otherwise broken manifest, start over
+            return
+        if (version, fingerprint) == (FORMAT_VERSION, self.fingerprint):
+            self._results = results
+
+    def _digest(self, file_name):
+        try:
+            return self._digests[file_name]
+        except KeyError:
+            digest = self._digests[file_name] = file_digest(file_name)
+            return digest
+
+    def is_fresh(self, result):
+        '''
+        @return: True when none of the files `result` depends on changed
+        '''
+        for file_name, digest in result.dependencies.iteritems():
+            if self._digest(file_name) != digest:
+                return False
+        return True
+
+    def get(self, infile):
+        '''
+        Return the previous AnalysisResult for `infile` if it's still valid,
+        else None.
+        '''
+        result = self._results.get(os.path.normpath(infile))
+        if result is None or not self.is_fresh(result):
+            return None
+        self.reused += 1
+        result.infile = infile
+        return result
+
+    def set(self, result):
+        key = os.path.normpath(result.infile)
+        if result.error or not result.dependencies:
+            # Nothing tells when it's valid, analyze it again next time
+            self._results.pop(key, None)
+            return
+        self._results[key] = result
+
+    def save(self):
+        blob = cPickle.dumps((FORMAT_VERSION, self.fingerprint, self._results),
+                             cPickle.HIGHEST_PROTOCOL)
+        # An interrupted run must not leave a partial manifest
+        write_file(os.path.abspath(self.path), blob)
+
+    def __len__(self):
+        return len(self._results)
+
+    def __repr__(self):
+        return "<Manifest '%s' (%d results)>" % (self.path, len(self))
+
+
+def analyze_incremental(input_files, manifest, jobs=1, options=None,
+                        project=None):
+    '''
+    Same as core.batch.analyze_files but only the input files whose closure
+    changed since the results in `manifest` were stored are analyzed. The
+    manifest is updated, call Manifest.save() to store it.
+    '''
+    options = options or BatchOptions()
+    previous = [manifest.get(infile) for infile in input_files]
+    stale = [infile for infile, result in zip(input_files, previous)
+             if result is None]
+    
+    new_results = analyze_files(stale, jobs, options, project)
+    for result in previous:
+        if result is None:
+            result = next(new_results)
+            manifest.set(result)
+        yield result
+    
+    # Let analyze_files finish (and release its workers)
+    for _ in new_results:
+        pass
@@ -0,0 +1,171 @@
+'''
+class_template.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import phply.phpast as phpast
+
+from core.nodes.obj import Obj
+from core.nodes.method import Method
+from core.nodes.variable_def import VariableDef
+from core.scope import Scope
+
+
+class ClassTemplate(object):
+    '''
+    Class level analysis of a Class AST node, done once and shared by every
+    instance of the class: the class scope with the $this var and the
+    properties, and the methods. A method body is traveled (and summarized)
+    the first time the method is called on any instance.
+    
+    The properties of the class scope stand for the properties of the
+    instance a method is called on (see Obj.call_method), the instances
+    only hold their own property values.
+    '''
+
+    def __init__(self, class_node):
+        self._class_node = class_node
+        # [(ClassVariables node, ClassVariable node)]
+        self._properties = []
+        # Method name -> Method AST node
+        self._method_nodes = {}
+        # Method name -> Method
+        self._methods = {}
+        
+        for child in class_node.nodes:
+            child._parent_node = class_node
+            if type(child) is phpast.ClassVariables:
+                for variable in child.nodes:
+                    variable._parent_node = child
+                    self._properties.append((child, variable))
+            elif type(child) is phpast.Method:
+                self._method_nodes[child.name] = child
+        
+        parentscope = class_node._parent_scope
+        self._scope = newscope = Scope(class_node, parent_scope=parentscope,
+                                       is_root=True)
+        newscope._builtins = dict(
+                ((uv, VariableDef(uv, -1, newscope)) for uv in VariableDef.USER_VARS))
+        newscope.get_state().push_scope(newscope)
+        newscope.obj = self
+        
+        # create $this var for internal method calling
+        this_var = VariableDef('$this', class_node.lineno, newscope)
+        this_var._obj_def = self
+        newscope.add_var(this_var)
+        
+        for class_variables, variable in self._properties:
+            self.add_property(variable.name[1:], class_variables.lineno)
+
+    @property
+    def name(self):
+        return self._class_node.name
+
+    def get_method_names(self):
+        return self._method_nodes.keys()
+
+    def add_property(self, name, lineno):
+        '''
+        Add property `name` to the class scope if it's not there yet. Like
+        formal params, properties are linked to the instance a method is
+        called on.
+        '''
+        var_name = '$this->' + name
+        if self._scope.get_var(var_name) is None:
+            property = VariableDef(var_name, lineno, self._scope)
+            property._formal_param = True
+            property.is_root = True
+            self._scope.add_var(property)
+
+    def link_properties(self, obj):
+        '''
+        Link the properties of the class scope to the ones of instance `obj`
+        '''
+        objscope = obj._scope
+        for property in self._scope.get_all_vars():
+            if not property._formal_param:
+                continue
+            value = objscope.get_var(property.name)
+            if value is None:
+                if property._is_root is not True:
+                    property.set_clean()
+            elif property._is_root is not False or not property._parents \
+            or property._parents[0] is not value:
+                property.is_root = False
+                property.parents = [value]
+
+    def create_instance(self, object_var, parentscope, state):
+        '''
+        Create a new instance (Obj) of the class and store it in
+        `object_var`. The AST is not modified, only the instance properties
+        are created.
+        
+        @param object_var: VariableDef the new object is assigned to
+        @param parentscope: Scope where the class was declared
+        '''
+        class_node = self._class_node
+        
+        newscope = Scope(class_node, parent_scope=parentscope, is_root=True)
+        newobj = Obj(class_node.name, class_node.lineno, newscope, object_var,
+                     ast_node=class_node, template=self)
+        
+        # Properties are stored as $this->property
+        for class_variables, variable in self._properties:
+            name = '$this->' + variable.name[1:]
+            newscope.add_var(VariableDef(name, class_variables.lineno,
+                                         newscope, ast_node=variable))
+        
+        # add ObjDef to VarDef, this way we can trace method call back to the
+        # correct instance
+        object_var._obj_def = newobj
+        state.objects[object_var.name] = object_var
+        
+        return newobj
+
+    def get_method(self, name):
+        '''
+        Return the Method `name`, or None if the class has no such method.
+        The method body is traveled when the method is first called.
+        '''
+        method = self._methods.get(name)
+        if method is not None:
+            return method
+        
+        method_node = self._method_nodes.get(name)
+        if method_node is None:
+            return None
+        
+        newscope = Scope(method_node, parent_scope=self._scope, is_root=True)
+        newscope._builtins = dict(
+                ((uv, VariableDef(uv, -1, newscope)) for uv in VariableDef.USER_VARS))
+        # Don't trigger vulnerabilities in this scope untill code is no longer dead
+        newscope._dead_code = True
+        self._scope.get_state().push_scope(newscope)
+        
+        method = Method(name, method_node.lineno, newscope, ast_node=method_node)
+        method_node._method = method
+        self._methods[name] = method
+        return method
+
+    def get_methods(self):
+        for name in self._method_nodes:
+            self.get_method(name)
+        return self._methods
+
+    def __repr__(self):
+        return "<ClassTemplate for '%s'>" % self.name
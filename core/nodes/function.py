@@ -19,6 +19,7 @@ along with w3af; if not, write to the Free Software
 Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
 from core.nodes.node_rep import NodeRep
+from core.nodes.function_summary import FunctionSummary
 
 
 class Function(NodeRep):
@@ -29,9 +30,15 @@ class Function(NodeRep):
         # return statements are stored as VariableDef
         self._return_vars = []
         self._formal_params = []
+        self._summary = None
+        # Body being parsed (traveled)?
+        self._parsing = False
+        # Return values being summarized?
+        self._summarizing = False
         self._ast_node.obj = self
 
     def add_formal_param(self, var):
+        var._formal_param = True
         self._formal_params.append(var)
 
     def get_formal_param(self, index):
@@ -41,4 +48,26 @@ class Function(NodeRep):
         return self._formal_params 
 
 
-    
\ No newline at end of file
+    
+    
+    def get_summary(self):
+        '''
+        Return the FunctionSummary of this function. Must not be called
+        while the function body is being parsed.
+        '''
+        if self._summary is None:
+            self._summary = FunctionSummary(self)
+        return self._summary
+    
+    def get_return_vars(self, funccall):
+        '''
+        Return the vars the value returned by call `funccall` depends on.
+        '''
+        if self._parsing or self._summarizing:
+            # Recursive call, the body hasn't been parsed (or summarized) yet
+            return self._return_vars
+        self._summarizing = True
+        try:
+            return self.get_summary().get_return_vars(funccall)
+        finally:
+            self._summarizing = False
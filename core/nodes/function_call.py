@@ -22,7 +22,10 @@ import phply.phpast as phpast
 
 from core.nodes.node_rep import NodeRep
 from core.nodes.parameter import Param
-from core.vulnerabilities.definitions import get_vulnty_for
+from core.nodes.vuln_trace import TraceLink, VulnTrace
+from core.vulnerabilities.definitions import (get_vulntys_for,
+    get_vulntys_for_method, ANY_CLASS)
+from core.stats import timed, TAINT
 
 
 class FuncCall(NodeRep):
@@ -30,14 +33,24 @@ class FuncCall(NodeRep):
     Representation for FunctionCall AST node.
     '''    
     
-    def __init__(self, name, lineno, ast_node, scope, parent_obj = None):
+    # Default max number of vulnerability traces kept for a function call
+    # (see State.max_traces). Vars with many tainted ancestors lead to an
+    # exponential number of traces.
+    MAX_VULNTRACES = 50
+    
+    def __init__(self, name, lineno, ast_node, scope, parent_obj = None,
+                 class_name = None):
         NodeRep.__init__(self, name, lineno, ast_node=ast_node)
         ast_node._obj = self
         self._scope = scope
         self._parent_obj = parent_obj
+        # Class of the called method when the class wasn't analyzed (e.g. PDO),
+        # see get_receiver_class
+        self._class_name = class_name
         self._params = self._parse_params()
         # Funccall can be called multiple times (in custom function or method)
         self._vulntraces = []
+        self._max_vulntraces = scope.get_state().max_traces
         
     '''
     funccal test() should return Function obj test
@@ -55,54 +68,115 @@ class FuncCall(NodeRep):
     def get_vulntraces(self):
         return self._vulntraces
     
+    @timed(TAINT)
     def add_vulntrace(self, vulntype = None, trace = None):
         
-        # Recursively walk parents
-        def walk(vars, level = 0, prevlevel = 0, trace = None):
-            for i, var in enumerate(vars):
-                if var.taint_source:
-                    
-                    if i+1 < len(vars):                    
-                        copy = list(trace)
-                        copy.append(var) 
-                        walk(var.parents, level + 1, 0, copy)
-                        self._vulntraces.append(copy)
-                    else:
-                        trace.append(var) 
-                        walk(var.parents, level + 1, 0, trace)
-            if level == 0:
-                self._vulntraces.append(trace)
-        
         if vulntype:
-            for param in self._params:
-                for var in param.vars:
-                    if var.controlled_by_user and var.is_tainted_for(vulntype[0]):
-                        trace = [vulntype[0]]
-                        trace.append(self)        
-
-                        # Add param to trace
-                        trace.append(var)
-                        
-                        # Add all vars to trace
-                        if var.parents:
-                            walk(var.parents, 0, 0, trace)
-                            
-                        #self._vulntraces.append(trace)
+            # A function can be vulnerable for several vuln. types
+            vulntys = []
+            for vulnty in vulntype:
+                if vulnty not in vulntys:
+                    vulntys.append(vulnty)
+            
+            for vulnty in vulntys:
+                for param in self._params:
+                    for var in param.vars:
+                        if len(self._vulntraces) >= self._max_vulntraces:
+                            return
+                        if var.controlled_by_user and var.is_tainted_for(vulnty):
+                            self.add_var_vulntrace(vulnty, var)
         
-        elif trace:
-            trace.insert(1, self)
+        elif trace and len(self._vulntraces) < self._max_vulntraces:
+            trace.add_call(self)
             self._vulntraces.append(trace)
     
+    @timed(TAINT)
+    def add_var_vulntrace(self, vulnty, var):
+        '''
+        Add the traces of param var `var`, already known to be tainted for
+        `vulnty`.
+        '''
+        if not var.parents:
+            return
+        
+        # One trace for the param var, the others are left for the branches
+        budget = self._max_vulntraces - len(self._vulntraces) - 1
+        if budget < 0:
+            return
+        
+        # Add all vars to trace
+        link = self._walk_parents(var.parents, TraceLink(var), vulnty, budget)
+        self._vulntraces.append(VulnTrace(vulnty, self, link))
+    
+    def _walk_parents(self, vars, link, vulnty, budget):
+        '''
+        Walk the parents of the tainted var in `link` and return its trace.
+        The last tainted parent extends the trace, the others start a new
+        trace (branch) that shares the elements walked so far. Branches are
+        added to the vulntraces as soon as they are complete; at most
+        `budget` of them are created.
+        '''
+        # Frames: [vars, index of the next var, trace, is branch?]
+        stack = [[vars, 0, link, False]]
+        # The vars share most of their deps, they are walked once (see
+        # VariableDef.has_taint_source)
+        deps_memo = {}
+        
+        while True:
+            frame = stack[-1]
+            vars, index, link, is_branch = frame
+            
+            if index == len(vars):
+                stack.pop()
+                if is_branch:
+                    self._vulntraces.append(VulnTrace(vulnty, self, link))
+                elif stack:
+                    # The last var's trace is the parent's trace
+                    stack[-1][2] = link
+                else:
+                    return link
+                continue
+            
+            frame[1] += 1
+            var = vars[index]
+            # todo look at this: parents can contain None (undefined vars)
+            if var is None:
+                continue
+            if not var.has_taint_source(deps_memo):
+                continue
+            
+            parents = var.parents or ()
+            if index + 1 < len(vars):
+                if budget <= 0:
+                    continue
+                budget -= 1
+                stack.append([parents, 0, TraceLink(var, link), True])
+            else:
+                stack.append([parents, 0, TraceLink(var, link), False])
+    
+    def get_vulntys(self):
+        '''
+        Return the vuln. types the called function (or method) is a sink for.
+        '''
+        if self._class_name is None:
+            return get_vulntys_for(self.name)
+        if not isinstance(self.name, basestring):
+            # Variable method name, $obj->$method()
+            return ()
+        return get_vulntys_for_method(self._class_name, self.name)
+    
+    @timed(TAINT)
     def is_vulnerable_for(self):
         vulntys = []
-        possvulnty = get_vulnty_for(self.name)
-        if possvulnty:
+        possvulntys = self.get_vulntys()
+        if possvulntys:
             for vars in (p.vars for p in self._params if p.vars):
                 for v in vars:
-                    if v.controlled_by_user and v.is_tainted_for(possvulnty):
-                        root_scope = v._scope.get_root_scope()
-                        if root_scope._dead_code == False:
-                            vulntys.append(possvulnty)
+                    for possvulnty in possvulntys:
+                        if v.controlled_by_user and v.is_tainted_for(possvulnty):
+                            root_scope = v._scope.get_root_scope()
+                            if root_scope._dead_code == False:
+                                vulntys.append(possvulnty)
         return vulntys
     
     @property
@@ -140,7 +214,8 @@ class FuncCall(NodeRep):
     def _parse_params(self):
         def attrname(node):
             nodety = type(node)
-            if nodety in (phpast.FunctionCall, phpast.MethodCall):
+            if nodety in (phpast.FunctionCall, phpast.MethodCall,
+                          phpast.StaticMethodCall):
                 name = 'params'
             elif nodety == phpast.Echo:
                 name = 'nodes'
@@ -164,17 +239,6 @@ class FuncCall(NodeRep):
             for param_var in functionObj.get_formal_params():
                 param_var.set_clean()
         
-        # Method
-        elif type(ast_node) is phpast.MethodCall:
-            # get object name (for example $obj1)
-            object_name = self._ast_node.node.name
-            # get object var
-            object_var = self._scope.get_var(object_name)
-            method_name = self.name            
-            method = object_var._obj_def.get_method(method_name)
-            for param_var in method.get_formal_params():
-                param_var.set_clean
-        
         if nodeparams and type(nodeparams) is not list:
             nodeparams = [nodeparams]
         
@@ -188,18 +252,36 @@ class FuncCall(NodeRep):
             params.append(param)
             
             # links params to formal params
-            # Methods call
-            if type(ast_node) is phpast.MethodCall and param.vars:
-                formal_param = method.get_formal_param(par_index)
-                formal_param._controlled_by_user = None
-                formal_param.is_root = False
-                formal_param.parents = param.vars
-            
-            # Custom function calls
-            elif type(ast_node) is phpast.FunctionCall and param.vars and getattr(ast_node, '_function', None):
+            # Custom function calls (methods are linked when called on an
+            # object, see Obj.call_method)
+            if type(ast_node) is phpast.FunctionCall and param.vars and getattr(ast_node, '_function', None):
                 formal_param = functionObj.get_formal_param(par_index)
-                formal_param._controlled_by_user = None
                 formal_param.is_root = False
                 formal_param.parents = param.vars
           
-        return params
\ No newline at end of file
+        return params
+
+
+def get_receiver_class(node, scope):
+    '''
+    Return the class name used to match the "Class::method" rules for the
+    MethodCall or StaticMethodCall `node` of a class that wasn't analyzed.
+    The class of a var is the one it was created with ($db = new PDO(...)),
+    or else the var name itself ($wpdb, $mysqli). ANY_CLASS when the
+    receiver isn't a var (e.g. DB::table('users')->whereRaw(...)).
+    '''
+    if type(node) is phpast.StaticMethodCall:
+        if isinstance(node.class_, basestring):
+            return node.class_
+        return ANY_CLASS
+    
+    receiver = node.node
+    if type(receiver) is not phpast.Variable or \
+    not isinstance(receiver.name, basestring):
+        return ANY_CLASS
+    
+    var = scope.get_var(receiver.name)
+    expr = var.ast_node if var else None
+    if type(expr) is phpast.New and isinstance(expr.name, basestring):
+        return expr.name
+    return receiver.name.lstrip('$')
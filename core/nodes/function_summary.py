@@ -0,0 +1,263 @@
+'''
+function_summary.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import phply.phpast as phpast
+
+from core.nodes.variable_def import VariableDef
+from core.vulnerabilities.definitions import get_all_vulntys
+from core.stats import timed, TAINT
+
+
+class TaintSummary(object):
+    '''
+    Taint of a variable in terms of the formal params it depends on.
+    
+    The formal params (of any function or method) are the only vars whose
+    parents change from one call to another, every other var of a function
+    body keeps its parents once the body has been parsed. So the taint of
+    a body var is the part that doesn't depend on any formal param
+    (`intrinsic`) OR the taint of the formal params it reaches (`terminals`).
+    '''
+    __slots__ = ('intrinsic', 'terminals')
+
+    def __init__(self, var, vulnty=None):
+        '''
+        @param vulnty: None to summarize VariableDef.controlled_by_user,
+                       a vuln. type to summarize VariableDef.is_tainted_for
+        '''
+        self.intrinsic = False
+        self.terminals = []
+        
+        seen = set()
+        stack = [var]
+        while stack:
+            v = stack.pop()
+            if id(v) in seen:
+                continue
+            seen.add(id(v))
+            
+            if v._formal_param:
+                self.terminals.append(v)
+                continue
+            
+            if vulnty is None:
+                if v.is_root:
+                    if v.name in VariableDef.USER_VARS:
+                        break
+                    continue
+                parents = v.parents
+            else:
+                # Get the parents first, it also determines the vulns this
+                # var is safe for.
+                parents = v.parents
+                if vulnty in v._safe_for:
+                    continue
+                if not parents:
+                    break
+            
+            # todo look at this: parents can contain None (undefined vars)
+            stack.extend(p for p in parents if isinstance(p, VariableDef))
+        else:
+            return
+        
+        # Tainted no matter what the formal params are
+        self.intrinsic = True
+        self.terminals = []
+
+    def evaluate(self, vulnty=None):
+        if self.intrinsic:
+            return True
+        if vulnty is None:
+            return any(t.controlled_by_user for t in self.terminals)
+        return any(t.is_tainted_for(vulnty) for t in self.terminals)
+
+
+class FunctionSummary(object):
+    '''
+    Summary of the sensitive function calls of a custom function (or
+    method) body, used to find the vulnerabilities of every call to the
+    function without evaluating the whole body again. For functions it
+    also summarizes the return values in terms of the formal params.
+    
+    Must be created once the function body has been parsed.
+    '''
+
+    @timed(TAINT)
+    def __init__(self, function):
+        '''
+        @param function: Function or Method
+        '''
+        self._function = function
+        # [(funccall, possible vuln. types, [(param var, cbu summary,
+        #                                     {vulnty: taint summary})])]
+        self._sinks = []
+        # id(var) -> (var, cbu summary, {vulnty: taint summary}) of the body
+        # vars summarized so far
+        self._vars = {}
+        
+        for funccall in function._scope.get_functions():
+            possvulntys = funccall.get_vulntys()
+            if not possvulntys:
+                continue
+            
+            var_summaries = []
+            for param in funccall.params:
+                for var in param.vars:
+                    tainted = dict((vulnty, TaintSummary(var, vulnty))
+                                   for vulnty in possvulntys)
+                    var_summaries.append((var, TaintSummary(var), tainted))
+            
+            if var_summaries:
+                self._sinks.append((funccall, possvulntys, var_summaries))
+
+    @timed(TAINT)
+    def apply(self):
+        '''
+        Add the vulnerability traces of the current call (the formal params
+        are linked to the call params) to the function calls of the body.
+        Same as calling add_vulntrace for every vulnerable function call.
+        '''
+        for funccall, possvulntys, var_summaries in self._sinks:
+            if len(funccall.get_vulntraces()) >= funccall._max_vulntraces:
+                continue
+            
+            # Same order as add_vulntrace: vuln. type first, then param var
+            for possvulnty in possvulntys:
+                for var, cbu, tainted in var_summaries:
+                    if cbu.evaluate() and tainted[possvulnty].evaluate(possvulnty) \
+                    and var._scope.get_root_scope()._dead_code == False:
+                        funccall.add_var_vulntrace(possvulnty, var)
+
+    @timed(TAINT)
+    def get_return_vars(self, funccall):
+        '''
+        Return the vars the value returned by `funccall` depends on. The
+        formal params are relinked on every call, so the return vars of the
+        body can't be used as the parents of the value: they would get the
+        taint of the last call. Every formal param reached by a return
+        value is replaced by a var whose parents are the params of
+        `funccall` instead.
+        '''
+        formal_params = self._function.get_formal_params()
+        return_vars = []
+        for var in self._function._return_vars:
+            cbu, tainted = self.summarize(var)
+            if cbu.intrinsic:
+                # Controlled by the user whatever the params are
+                return_vars.append(var)
+                continue
+            
+            parents = []
+            # Tainted for these vulns whatever the params are, but not
+            # controlled by the user
+            intrinsic = [vulnty for vulnty, summary in tainted.iteritems()
+                         if summary.intrinsic]
+            if intrinsic:
+                parents.append(_new_var(
+                    var, (), [vulnty for vulnty in tainted
+                              if vulnty not in intrinsic]))
+            
+            for formal_param in cbu.terminals:
+                index = formal_params.index(formal_param)
+                if index >= len(funccall.params) or \
+                not funccall.params[index].vars:
+                    continue
+                safe_for = [vulnty for vulnty, summary in tainted.iteritems()
+                            if formal_param not in summary.terminals]
+                parents.append(_new_var(
+                    formal_param, funccall.params[index].vars, safe_for))
+            
+            if parents:
+                return_vars.append(_new_var(var, parents, []))
+        return return_vars
+
+    def summarize(self, var):
+        '''
+        Return the (cbu summary, {vulnty: taint summary}) of `var`, a var of
+        the body. The summaries don't change once the body has been parsed.
+        '''
+        summaries = self._vars.get(id(var))
+        if summaries is None:
+            summaries = self._vars[id(var)] = (
+                var, TaintSummary(var),
+                dict((vulnty, TaintSummary(var, vulnty))
+                     for vulnty in get_all_vulntys()))
+        return summaries[1:]
+
+
+def freeze(var, scope=None, seen=None):
+    '''
+    Return a var with the taint `var` has for the current call of the
+    method it belongs to. Method bodies are shared by all the instances of
+    a class and the formal params are relinked on every call, so a body var
+    stored in an object property would take the taint of the last call.
+    Every formal param `var` reaches is replaced by a var that depends on
+    what the formal param is linked to now (frozen the same way).
+    
+    @param scope: Scope of the returned var, defaults to the scope of `var`
+    '''
+    root_scope = var._scope.get_root_scope()
+    if type(root_scope._ast_node) is not phpast.Method:
+        return var
+    
+    if seen is None:
+        seen = {}
+    frozen = seen.get(id(var))
+    if frozen is not None:
+        return frozen
+    # Linked back to itself (recursion)
+    seen[id(var)] = var
+    
+    cbu, tainted = root_scope._ast_node._method.get_summary().summarize(var)
+    if cbu.intrinsic:
+        # Controlled by the user whatever the params are
+        return var
+    
+    parents = []
+    intrinsic = [vulnty for vulnty, summary in tainted.iteritems()
+                 if summary.intrinsic]
+    if intrinsic:
+        parents.append(_new_var(
+            var, (), [vulnty for vulnty in tainted if vulnty not in intrinsic]))
+    
+    for terminal in cbu.terminals:
+        terminal_parents = [freeze(p, seen=seen) for p in terminal.parents or ()
+                            if isinstance(p, VariableDef)]
+        if terminal_parents:
+            safe_for = [vulnty for vulnty, summary in tainted.iteritems()
+                        if terminal not in summary.terminals]
+            parents.append(_new_var(terminal, terminal_parents, safe_for))
+    
+    frozen = seen[id(var)] = _new_var(var, parents, [], scope)
+    if not parents:
+        frozen.is_root = True
+    return frozen
+
+
+def _new_var(var, parents, safe_for, scope=None):
+    '''
+    Return a copy of `var` (same name and line, for the traces) that
+    depends on `parents` instead.
+    '''
+    new_var = VariableDef(var.name, var.lineno, scope or var._scope)
+    new_var._anon_var = True
+    new_var.parents = list(parents)
+    new_var._safe_for = safe_for
+    return new_var
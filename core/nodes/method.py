@@ -19,6 +19,7 @@ along with w3af; if not, write to the Free Software
 Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
 from core.nodes.node_rep import NodeRep
+from core.nodes.function_summary import FunctionSummary
 
 
 class Method(NodeRep):
@@ -28,9 +29,14 @@ class Method(NodeRep):
         self._scope = scope
         self._formal_params = []
         self._parsed = False
-        self._method_call = []
+        # Body being parsed (traveled)?
+        self._parsing = False
+        self._summary = None
+        # Property name -> last var of the body that sets it, $this->a = ...
+        self._property_writes = {}
 
     def add_formal_param(self, var):
+        var._formal_param = True
         self._formal_params.append(var)
 
     def get_formal_param(self, index):
@@ -39,9 +45,45 @@ class Method(NodeRep):
     def get_formal_params(self):
         return self._formal_params
     
-    def add_method_calls(self, method):
-        self._method_calls.append(method)
+    def add_property_write(self, var):
+        self._property_writes[var.name] = var
     
-    def clean_formal_params(self):
-        for param_var in self._formal_params:
-            param_var.set_clean()
\ No newline at end of file
+    def get_property_writes(self):
+        return self._property_writes.values()
+    
+    def link_formal_params(self, params):
+        '''
+        Link the formal params to the params of a call, formal params
+        without a param are clean (avoids false positives). Formal params
+        already linked to the same params keep their taint (see
+        VariableDef.parents), so relinking the same call is cheap.
+        '''
+        for index, param_var in enumerate(self._formal_params):
+            if index < len(params) and params[index].vars:
+                param_var.is_root = False
+                param_var.parents = params[index].vars
+            elif param_var._is_root is not True:
+                param_var.set_clean()
+    
+    def get_summary(self):
+        '''
+        Return the FunctionSummary of this method. Must not be called while
+        the method body is being parsed.
+        '''
+        if self._summary is None:
+            self._summary = FunctionSummary(self)
+        return self._summary
+    
+    def find_vulnerabilities(self):
+        '''
+        Add the vulnerability traces of the function calls of this method
+        for the current formal params.
+        '''
+        if self._parsing:
+            # Recursive call, the body is not complete yet
+            for funccall in self._scope.get_functions():
+                vulntype = funccall.is_vulnerable_for()
+                if vulntype:
+                    funccall.add_vulntrace(vulntype)
+        else:
+            self.get_summary().apply()
@@ -19,27 +19,118 @@ along with w3af; if not, write to the Free Software
 Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
 from core.nodes.node_rep import NodeRep
+import phply.phpast as phpast
+
+from core.nodes.node_rep import NodeRep
+from core.nodes.variable_def import VariableDef
+from core.nodes.function_summary import freeze
 
 
 class Obj(NodeRep):
     
-    def __init__(self, name, lineno, scope, object_var, ast_node=None):
+    def __init__(self, name, lineno, scope, object_var, ast_node=None,
+                 template=None):
         
         NodeRep.__init__(self, name, lineno, ast_node=ast_node)
         
+        # Holds the property values of this instance
         self._scope = scope
         self._object_var = object_var
-        self._methods = {}
+        # ClassTemplate this object was created from, the methods are
+        # shared by all the instances
+        self._template = template
+        # Method name -> inputs of the last call (see _get_inputs)
+        self._last_inputs = {}
         self._scope.obj = self
-        
-    def add_method(self, method):
-        self._methods[method.name] = method
     
     def get_method(self, name):
-        return self._methods.get(name, None)
+        return self._template.get_method(name)
     
     def get_methods(self):
-        return self._methods    
+        return self._template.get_methods()
+    
+    def call_method(self, method, funccall):
+        '''
+        Find the vulnerabilities of `funccall`, a call to `method` on this
+        object, and of the methods it calls on $this. The values of the
+        properties set by the methods are stored in this object.
+        
+        A call with the same inputs as the last call to the method is not
+        evaluated again, it would add the same vulnerabilities.
+        '''
+        inputs = self._get_inputs(funccall)
+        if inputs is not None and \
+        inputs[0] == self._last_inputs.get(method.name, (None,))[0]:
+            return
+        self._last_inputs[method.name] = inputs
+        
+        self._template.link_properties(self)
+        self._call_method(method, funccall)
+    
+    def _get_inputs(self, funccall):
+        '''
+        Return the inputs of `funccall`: the vars its params come from and
+        the property values of this object, as (ids, vars). None if they
+        can change: the call is in a function or method body, relinked on
+        every call.
+        '''
+        root_node = funccall._scope.get_root_scope()._ast_node
+        if type(root_node) in (phpast.Function, phpast.Method):
+            return None
+        
+        vars = []
+        for param in funccall.params:
+            for var in param.vars:
+                # The params of every call are new anon vars, use the var
+                # they read. Reads of request vars ($_GET[1], $_GET[2]) are
+                # told apart by the anon var.
+                parent = var._anon_var and var._parents and var._parents[0]
+                if parent and parent.name not in VariableDef.USER_VARS:
+                    var = parent
+                vars.append(var)
+            vars.append(None)
+        vars.extend(self._scope.get_all_vars())
+        # The vars are kept, so their ids are not reused
+        return tuple(id(var) for var in vars), vars
+    
+    def _call_method(self, method, funccall):
+        # The methods called through $this-> are evaluated with an explicit
+        # stack, so a long chain of calls can't hit the recursion limit.
+        # Frames: (method, funccall, iterator of the method calls in its body)
+        called = set()
+        stack = [(method, funccall, None)]
+        
+        while stack:
+            method, funccall, method_calls = stack[-1]
+            
+            if method_calls is None:
+                key = (id(method), id(funccall))
+                if key in called:
+                    stack.pop()
+                    continue
+                called.add(key)
+                
+                method.link_formal_params(funccall.params)
+                method.find_vulnerabilities()
+                
+                # The methods called next see the new values
+                writes = method.get_property_writes()
+                if writes:
+                    for var in writes:
+                        self._scope.set_var(freeze(var, self._scope))
+                    self._template.link_properties(self)
+                
+                method_calls = iter(method._scope.get_method_calls())
+                stack[-1] = (method, funccall, method_calls)
+            else:
+                # Recursive calls link the formal params to their own params
+                method.link_formal_params(funccall.params)
+            
+            for method_call in method_calls:
+                stack.append((method_call._method, method_call, None))
+                break
+            else:
+                stack.pop()
 
     def __repr__(self):
         return "<Class definition '%s' at line %s>" % (self.name, self.lineno)
@@ -22,7 +22,7 @@ import phply.phpast as phpast
 
 from core.nodes.node_rep import NodeRep
 from core.nodes.variable_def import VariableDef
-from core.vulnerabilities.definitions import get_vulnty_for_sec, SENSITIVE_FUNCTIONS
+from core.vulnerabilities.definitions import get_vulntys_for_sec
 
 class Param(object):
     
@@ -84,7 +84,7 @@ class Param(object):
                 from core.visitors.function_call_visitor import FunctionCallVisitor
                 
                 visitor = FunctionCallVisitor(BaseVisitor);
-                fc, stoponthis = visitor.visit(node, scope.get_state())
+                fc = visitor.visit_call(node, scope.get_state())
                 
                 vardef = VariableDef(node.name + '_funvar', node.lineno, scope)
                 
@@ -96,7 +96,7 @@ class Param(object):
                 # Add vulntrace
                 vulntype = fc.is_vulnerable_for()
                 if vulntype and 'FILE_DISCLOSURE' in vulntype and \
-                self._parent_obj.name in SENSITIVE_FUNCTIONS['XSS']: 
+                'XSS' in self._parent_obj.get_vulntys(): 
                     # Add vulntrace to parent call with pending trace
                     fc.add_vulntrace(vulntype)
                     self._parent_obj._pending_trace = fc.get_vulntraces()[-1]
@@ -114,7 +114,7 @@ class Param(object):
                 if called_obj:
                     # Set function scope as active code
                     called_obj._scope._dead_code = False
-                    for var in called_obj._return_vars:
+                    for var in called_obj.get_return_vars(fc):
                         vardef.add_parent(var)
 #                  
                 else:
@@ -123,8 +123,7 @@ class Param(object):
                             vardef.add_parent(var)
                    
                 # Securing function?
-                vulnty = get_vulnty_for_sec(fc.name)
-                if vulnty:
+                for vulnty in get_vulntys_for_sec(fc.name):
                     vardef._safe_for.append(vulnty)
                 
                 self.vars.append(vardef)
@@ -22,8 +22,10 @@ import itertools
 
 import phply.phpast as phpast
 
+from core import taint_engine
 from core.nodes.node_rep import NodeRep
-from core.vulnerabilities.definitions import get_vulnty_for_sec
+from core.vulnerabilities.definitions import (get_vulntys_for_sec,
+    get_vulntys_for_method_sec)
 
 class VariableDef(NodeRep):
     '''
@@ -33,9 +35,13 @@ class VariableDef(NodeRep):
     
     USER_VARS = ('$_GET', '$_POST', '$_COOKIES', '$_REQUEST')
     
+    # Number of instances created, see core.stats
+    created = 0
+    
     def __init__(self, name, lineno, scope, ast_node=None):
         
         NodeRep.__init__(self, name, lineno, ast_node=ast_node)
+        VariableDef.created += 1
         
         # Containing Scope.
         self._scope = scope
@@ -45,8 +51,11 @@ class VariableDef(NodeRep):
         self.funccall_nodes = []
         # Ancestors AST Variable nodes
         self.var_nodes = []
-        # Is this var controlled by user?
-        self._controlled_by_user = None
+        # Taint lattice value and the generation it was computed in, and
+        # the vars computed from this one, see core.taint_engine
+        self._taint = None
+        self._taint_generation = -1
+        self._taint_children = {}
         # Vulns this variable is safe for. 
         self._safe_for = []
         # Being 'root' means that this var doesn't depend on any other.
@@ -57,6 +66,8 @@ class VariableDef(NodeRep):
         self._object_property = False
         # Anon var? (param var in functioncall).
         self._anon_var = False
+        # Formal param of a function or method? (relinked on every call)
+        self._formal_param = False
         
     @property
     def is_root(self):
@@ -74,7 +85,10 @@ class VariableDef(NodeRep):
      
     @is_root.setter
     def is_root(self, is_root):
+        if is_root is self._is_root:
+            return
         self._is_root = is_root
+        taint_engine.invalidate(self)
 
     @property
     def parents(self):
@@ -91,7 +105,7 @@ class VariableDef(NodeRep):
                 if hasattr(n, '_obj'):
                     called_obj = n._obj.get_called_obj()
                     if called_obj:
-                        for var in called_obj._return_vars:
+                        for var in called_obj.get_return_vars(n._obj):
                             self._parents.append(var)
             
             # Variables
@@ -115,36 +129,62 @@ class VariableDef(NodeRep):
     
     @parents.setter
     def parents(self, parents):
+        if parents is self._parents:
+            # Relinked to the same vars
+            return
         self._parents = parents
+        taint_engine.invalidate(self)
          
+    def _parent_lookups(self):
+        '''
+        Return the (name, scope) lookups the parents of this var are
+        resolved by, see parents.
+        '''
+        lookups = []
+        for varnode in self.var_nodes:
+            if type(getattr(varnode, '_parent_node', None)) is phpast.ObjectProperty \
+            and varnode.name == '$this':
+                name = varnode.name + '->' + varnode._parent_node.name
+                lookups.append((name, self._scope.get_root_scope()._parent_scope))
+            lookups.append((varnode.name, self._scope))
+        return lookups
+    
     def add_parent(self, parent):
         self._parents.append(parent)
+        taint_engine.invalidate(self)
+    
+    @staticmethod
+    def invalidate_taint():
+        '''
+        Invalidate the taint state of all variables.
+        '''
+        taint_engine.invalidate_all()
     
     @property
     def controlled_by_user(self):
         '''
         Returns bool that indicates if this variable is tainted.
         '''
-                
-        #cbusr = self._controlled_by_user
-        #cbusr = None # no cache
-        #if cbusr is None:
-        cbusr = False #todo look at this
+        return taint_engine.is_tainted(self)
+    
+    def _taint_transfer(self):
+        '''
+        Return what core.taint_engine needs to know about this var: its own
+        (user, blocked) taint, the parents it gets the rest from and the
+        vulns it's safe for.
+        '''
+        # Get the parents first, it also determines the vulns this var is
+        # safe for.
+        parents = self.parents
+        safe_for = frozenset(self._safe_for)
         if self.is_root:
-            if self._name in VariableDef.USER_VARS:
-                cbusr = True
-            else:
-                cbusr = False
-        else:
-            # Look at parents
-            for parent in self.parents:
-                # todo look at this hasattr
-                if hasattr(parent, 'controlled_by_user') and parent.controlled_by_user == True:
-                    cbusr = True
-        
-        #self._controlled_by_user = cbusr
-        
-        return cbusr
+            return self._name in VariableDef.USER_VARS, safe_for, (), safe_for
+        if not parents:
+            # Tainted for every vuln. but not controlled by the user
+            return False, safe_for, (), safe_for
+        # todo look at this: parents can contain None (undefined vars)
+        parents = [p for p in parents if isinstance(p, VariableDef)]
+        return False, None, parents, safe_for
     
     @property
     def taint_source(self):
@@ -176,6 +216,53 @@ class VariableDef(NodeRep):
                     sources.append(v._parent_node.expr)
             return sources
     
+    def has_taint_source(self, memo=None):
+        '''
+        Return True if the taint source of this var isn't empty, same as
+        bool(self.taint_source). The vars it depends on are walked once for
+        all the calls that share `memo`, a dict.
+        '''
+        if self._taint_source or self._has_source_node():
+            return True
+        if memo is None:
+            memo = {}
+        
+        # Walk the deps the same way deps() does: all the parents, then the
+        # parents of the last one
+        path = []
+        var = self
+        while True:
+            found = memo.get(id(var))
+            if found is not None:
+                break
+            memo[id(var)] = found = False
+            path.append(var)
+            parents = var.parents
+            if not parents:
+                break
+            if any(parent._has_source_node() for parent in parents):
+                found = True
+                break
+            var = parents[-1]
+        
+        for var in path:
+            memo[id(var)] = found
+        return found
+    
+    def _has_source_node(self):
+        '''
+        Return True if a var node this var is assigned from reads a request
+        parameter, $_GET['test'] (see taint_source).
+        '''
+        # Finds the var nodes too
+        self.parents
+        if self.is_root:
+            return False
+        for node in self.var_nodes:
+            if type(getattr(node, '_parent_node', None)) is phpast.ArrayOffset:
+                return True
+        return False
+    
     # todo remove below when finished
     @property
     def taint_source_old(self):
@@ -222,16 +309,7 @@ class VariableDef(NodeRep):
             }
     
     def is_tainted_for(self, vulnty):
-        if vulnty in self._safe_for:
-            return False
-        
-        if self.parents:
-            for parent in self.parents:
-                if parent.is_tainted_for(vulnty) == True:
-                    return True
-            return False
-        
-        return True
+        return taint_engine.is_tainted(self, vulnty)
 
     def get_root_var(self):
         '''
@@ -251,13 +329,16 @@ class VariableDef(NodeRep):
         '''
         Generator function. Yields this var's dependencies.
         '''
+        # Equal vars (see __eq__) are yielded once. All the vars of a name
+        # have the same hash, key them on what __eq__ compares instead
         seen = set()
         parents = self.parents
         while parents:
             for parent in parents:
-                if parent not in seen:
+                key = (parent._scope, parent.lineno, parent.name)
+                if key not in seen:
                     yield parent
-                    seen.add(parent)
+                    seen.add(key)
                 parents = parent.parents
                 
     def _get_ancestor_funccalls(self, node, funcs = None, level=0):
@@ -307,16 +388,17 @@ class VariableDef(NodeRep):
             
             for n in vars:
                 # todo look at all vars
-                for fc in self._get_parent_nodes(n, [phpast.FunctionCall]):
+                for fc in self._get_parent_nodes(n, [phpast.FunctionCall,
+                                                     phpast.MethodCall,
+                                                     phpast.StaticMethodCall]):
                 
                     # Don't set custom function calls params as parent, this is done by
                     # looking at the return vars
                     if fc in self.funccall_nodes and hasattr(fc, '_obj') and fc._obj.get_called_obj():
                         vars.remove(n)
-                        continue
+                        break
                     
-                    vulnty = get_vulnty_for_sec(fc.name)
-                    if vulnty:
+                    for vulnty in self._get_vulntys_for_sec(fc):
                         if vulnty not in safe_for:
                             safe_for[vulnty] = 1
                         else:
@@ -328,10 +410,23 @@ class VariableDef(NodeRep):
                     
         return vars
     
+    def _get_vulntys_for_sec(self, node):
+        '''
+        Return the vuln. types secured by the function or method called by
+        `node` ($pdo->quote(...)).
+        '''
+        if type(node) is phpast.FunctionCall:
+            return get_vulntys_for_sec(node.name)
+        if not isinstance(node.name, basestring):
+            return ()
+        from core.nodes.function_call import get_receiver_class
+        return get_vulntys_for_method_sec(get_receiver_class(node, self._scope),
+                                          node.name)
+    
     def set_clean(self):
-        self._controlled_by_user = None
         self._taint_source = None
         self._is_root = True
+        taint_engine.invalidate(self)
         
     def get_file_name(self):
         return self._scope.file_name
\ No newline at end of file
@@ -0,0 +1,98 @@
+'''
+vuln_trace.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+
+
+class TraceLink(object):
+    '''
+    One element of a vulnerability trace plus a pointer to the previous
+    one. Traces that go through the same variables share their links, so
+    branching a trace costs one link instead of a copy of the whole list.
+    '''
+    __slots__ = ('item', 'prev')
+
+    def __init__(self, item, prev=None):
+        self.item = item
+        self.prev = prev
+
+    def items(self):
+        '''
+        Return the trace elements from the first link to this one.
+        '''
+        items = []
+        link = self
+        while link is not None:
+            items.append(link.item)
+            link = link.prev
+        items.reverse()
+        return items
+
+
+class VulnTrace(object):
+    '''
+    Vulnerability trace: the vuln. type followed by the vulnerable function
+    calls and the variables the tainted data went through.
+
+        [vulnty, <call>, ..., <var>, <parent var>, ...]
+
+    The variables are kept as a TraceLink chain and the list is only built
+    when the trace is accessed (e.g. when it's reported). Supports the
+    read only list operations (indexing, slicing, len, iteration).
+    '''
+
+    def __init__(self, vulnty, call, link=None):
+        # Vuln. type followed by the function calls
+        self._head = [vulnty, call]
+        self._link = link
+        self._items = None
+
+    @property
+    def vulnty(self):
+        return self._head[0]
+
+    def add_call(self, call):
+        '''
+        Add `call` as the first function call of the trace; used when the
+        vulnerability is reported through an enclosing call, e.g.
+        echo file_get_contents($_GET['f']);
+        '''
+        self._head.insert(1, call)
+        self._items = None
+
+    def _materialize(self):
+        items = self._items
+        if items is None:
+            items = list(self._head)
+            if self._link is not None:
+                items.extend(self._link.items())
+            self._items = items
+        return items
+
+    def __getitem__(self, index):
+        return self._materialize()[index]
+
+    def __len__(self):
+        return len(self._materialize())
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __repr__(self):
+        return repr(self._materialize())
@@ -0,0 +1,79 @@
+'''
+parsing.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+from phply import phplex
+from phply.phpparse import parser
+
+from core import stats as sca_stats
+
+
+def read_file(file_name, stats=None):
+    '''
+    Return the source code of `file_name`.
+    
+    @param stats: core.stats.Stats the read time is added to (optional)
+    @raise IOError: When the file can't be read
+    '''
+    if stats is not None:
+        stats.start(sca_stats.READ)
+    try:
+        with open(file_name, 'r') as f:
+            return f.read()
+    finally:
+        if stats is not None:
+            stats.stop()
+
+
+def parse_code(code, ast_cache=None, stats=None):
+    '''
+    Return the AST for `code`. Use the AST cache when available.
+    
+    @param ast_cache: core.cache.ast_cache.ASTCache (optional)
+    @param stats: core.stats.Stats the lex and parse times are added to
+                  (optional)
+    @raise SyntaxError: When phply fails to parse the code
+    '''
+    if ast_cache is not None:
+        ast_code = ast_cache.get(code)
+        if ast_code is not None:
+            return ast_code
+    
+    # Lexer instance
+    lexer = phplex.lexer.clone()
+    
+    if stats is None:
+        ast_code = parser.parse(code, lexer=lexer)
+    else:
+        # The parser pulls the tokens, time them apart
+        token = lexer.token
+        def timed_token():
+            stats.start(sca_stats.LEX)
+            try:
+                return token()
+            finally:
+                stats.stop()
+        lexer.token = timed_token
+        with stats.timer(sca_stats.PARSE):
+            ast_code = parser.parse(code, lexer=lexer)
+    
+    if ast_cache is not None:
+        ast_cache.set(code, ast_code)
+    
+    return ast_code
@@ -0,0 +1,97 @@
+'''
+prefilter.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import re
+
+from core.nodes.variable_def import VariableDef
+from core.symbol_index import SymbolIndex
+from core.vulnerabilities.definitions import (get_sensitive_functions,
+                                              rules_fingerprint)
+
+
+def _words_regex(words, flags=0):
+    words = sorted(set(words), key=len, reverse=True)
+    if not words:
+        # Matches nothing
+        return re.compile(r'(?!)')
+    return re.compile(r'(?<![\w$])(?:%s)(?!\w)' %
+                      '|'.join(re.escape(w) for w in words), flags)
+
+
+class Prefilter(object):
+    '''
+    Tells, without parsing it, whether a file can't produce any finding:
+    it has no include/require and no user input variable (source) or no
+    sensitive function nor <?= tag (sink). Those files don't need to be
+    analyzed.
+    
+    The code is scanned with regular expressions, so comments and strings
+    count as code too: the prefilter may keep a file it could skip but
+    never skips a file that has a finding.
+    
+    In project mode (see core.project.Project) a use of a function or class
+    declared by the project counts as both a source and a sink, they may
+    read user input or call a sensitive function.
+    '''
+    
+    INCLUDE_RE = re.compile(r'(?<![\w$])(?:include|require)(?:_once)?(?!\w)',
+                            re.I)
+    
+    SOURCE_RE = _words_regex(VariableDef.USER_VARS)
+    
+    # Short echo tag, <?= $a ?> is echo $a
+    ECHO_TAG_RE = re.compile(r'<\?=')
+    
+    def __init__(self, project=None):
+        self.project = project
+        # Compiled for this rules fingerprint (rule packs can be loaded
+        # after the prefilter is created)
+        self._fingerprint = None
+        self._sink_re = None
+        
+        self._symbol_re = None
+        if project is not None:
+            names = [s.name for s in project.symbols.get_symbols()
+                     if s.kind != SymbolIndex.METHOD]
+            if names:
+                # PHP function and class names are case insensitive
+                self._symbol_re = _words_regex(names, re.I)
+    
+    def _get_sink_re(self):
+        fingerprint = rules_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._sink_re = _words_regex(get_sensitive_functions(), re.I)
+            self._fingerprint = fingerprint
+        return self._sink_re
+    
+    def may_have_findings(self, code):
+        '''
+        @return: False when the analysis of `code` can't report any
+                 vulnerability
+        '''
+        if self.INCLUDE_RE.search(code):
+            return True
+        
+        if self._symbol_re is not None and self._symbol_re.search(code):
+            return True
+        
+        return bool(self.SOURCE_RE.search(code) and
+                    (self._get_sink_re().search(code) or
+                     self.ECHO_TAG_RE.search(code)))
@@ -0,0 +1,169 @@
+'''
+profiler.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import time
+
+from core.stats import Stats
+
+
+# Visitor name of the nodes no visitor handles
+NO_VISITOR = '(no visitor)'
+
+# Report columns, also the keys it can be sorted by
+COLUMNS = ('calls', 'total', 'self')
+
+
+class _Table(object):
+    '''
+    Calls, total and self time per key of nested, possibly recursive,
+    calls. The total time of a recursive call is only counted once, in the
+    outermost call.
+    '''
+    
+    def __init__(self):
+        # key -> [calls, total time, self time]
+        self.rows = {}
+        # [key, start time] of the running calls
+        self._stack = []
+        self._depth = {}
+        self._mark = None
+    
+    def start(self, key, now):
+        if self._stack:
+            self.rows[self._stack[-1][0]][2] += now - self._mark
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = [0, 0.0, 0.0]
+        row[0] += 1
+        self._depth[key] = self._depth.get(key, 0) + 1
+        self._stack.append((key, now))
+        self._mark = now
+    
+    def stop(self, now):
+        key, start = self._stack.pop()
+        row = self.rows[key]
+        row[2] += now - self._mark
+        depth = self._depth[key] = self._depth[key] - 1
+        if not depth:
+            row[1] += now - start
+        self._mark = now
+    
+    def merge(self, rows):
+        for key, (calls, total, self_time) in rows.iteritems():
+            row = self.rows.setdefault(key, [0, 0.0, 0.0])
+            row[0] += calls
+            row[1] += total
+            row[2] += self_time
+
+
+class Profiler(Stats):
+    '''
+    Stats (see core.stats) plus the calls and time spent per visitor
+    (BaseVisitor subclass) and per AST node type.
+    
+    The self time of a visitor excludes the nested visitors and the taint
+    evaluation, which is reported as its own row; the one of a node type
+    excludes the nested nodes. Pass it as the `stats` of PhpSCA.
+    '''
+    
+    def __init__(self):
+        Stats.__init__(self)
+        self.visitors = _Table()
+        self.node_types = _Table()
+        # Whether a visitor handled the node on top of the node_types stack
+        self._handled = []
+    
+    def start(self, phase):
+        Stats.start(self, phase)
+        self.visitors.start('(%s)' % phase, self._mark[0])
+    
+    def stop(self):
+        Stats.stop(self)
+        self.visitors.stop(self._mark[0])
+    
+    def start_node(self, nodety):
+        self.node_types.start(nodety.__name__, time.time())
+        self._handled.append(False)
+    
+    def stop_node(self):
+        now = time.time()
+        if not self._handled.pop():
+            # Zero time call, it only counts the unhandled nodes
+            self.visitors.start(NO_VISITOR, now)
+            self.visitors.stop(now)
+        self.node_types.stop(now)
+    
+    def profile_visit(self, visitor):
+        '''
+        Return `visitor.visit` wrapped to record its calls and time
+        '''
+        name = type(visitor).__name__
+        visit = visitor.visit
+        visitors = self.visitors
+        handled = self._handled
+        
+        def profiled_visit(node, state):
+            handled[-1] = True
+            visitors.start(name, time.time())
+            try:
+                return visit(node, state)
+            finally:
+                visitors.stop(time.time())
+        return profiled_visit
+    
+    def merge(self, other):
+        if isinstance(other, Stats):
+            other = other.to_dict()
+        Stats.merge(self, other)
+        self.visitors.merge(other.get('visitors', {}))
+        self.node_types.merge(other.get('node_types', {}))
+    
+    def to_dict(self):
+        '''
+        Same as Stats.to_dict plus the 'visitors' and 'node_types' tables:
+        {name: [calls, total time, self time]}
+        '''
+        res = Stats.to_dict(self)
+        res['visitors'] = dict((k, list(v))
+                               for k, v in self.visitors.rows.iteritems())
+        res['node_types'] = dict((k, list(v))
+                                 for k, v in self.node_types.rows.iteritems())
+        return res
+    
+    def report(self, sort='self', limit=None):
+        '''
+        Return the visitors and node types tables as text, sorted by `sort`
+        (one of COLUMNS) in descending order.
+        '''
+        if sort not in COLUMNS:
+            raise ValueError, "Invalid sort key '%s'" % sort
+        column = COLUMNS.index(sort)
+        
+        lines = []
+        for title, table in (('Visitor', self.visitors),
+                             ('Node type', self.node_types)):
+            rows = sorted(table.rows.iteritems(),
+                          key=lambda item: item[1][column], reverse=True)
+            lines.append('%-30s %10s %10s %10s' % ((title,) + COLUMNS))
+            for name, (calls, total, self_time) in rows[:limit]:
+                lines.append('%-30s %10d %10.4f %10.4f' % (name, calls, total,
+                                                           self_time))
+            lines.append('')
+        return '\n'.join(lines)
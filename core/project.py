@@ -0,0 +1,259 @@
+'''
+project.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import fnmatch
+import hashlib
+
+import phply.phpast as phpast
+
+from core.symbol_index import SymbolIndex
+from core.cache.ast_cache import dump_ast, load_ast
+from core.parsing import read_file, parse_code
+
+
+def _path_endswith(file_name, include):
+    parts = os.path.normpath(include).split(os.sep)
+    while parts and parts[0] in (os.pardir, os.curdir, ''):
+        parts.pop(0)
+    include = os.sep.join(parts)
+    return file_name == include or file_name.endswith(os.sep + include)
+
+
+def _find_references(ast_code):
+    '''
+    Return a tuple with the paths included by the top level statements
+    `ast_code` and the names of the functions and classes they use.
+    '''
+    includes = set()
+    names = set()
+    stack = list(ast_code)
+    while stack:
+        node = stack.pop()
+        nodety = type(node)
+        if nodety in (phpast.Include, phpast.Require):
+            if isinstance(node.expr, basestring):
+                includes.add(node.expr)
+        elif nodety in (phpast.FunctionCall, phpast.New):
+            if isinstance(node.name, basestring):
+                names.add(node.name)
+        elif nodety is phpast.StaticMethodCall:
+            if isinstance(node.class_, basestring):
+                names.add(node.class_)
+        elif nodety is phpast.Class and node.extends:
+            names.add(node.extends)
+        
+        for field in node.fields:
+            value = getattr(node, field)
+            if isinstance(value, phpast.Node):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(v for v in value if isinstance(v, phpast.Node))
+    
+    return includes, names
+
+
+class Project(object):
+    '''
+    Set of PHP files analyzed together. The top level declarations of all
+    the files are indexed once and shared, read only, by the analysis of
+    every entry point: a function or class that isn't declared by the
+    entry point (or the files it includes) is loaded from the file of the
+    project that declares it.
+    
+    The index only keeps the position of the declarations, the ASTs are
+    parsed again on demand, so a Project is cheap to pickle and send to
+    the worker processes of a batch.
+    '''
+    
+    INCLUDE = ('*.php',)
+    
+    def __init__(self, root, include=INCLUDE, exclude=(), ast_cache=None):
+        '''
+        @param root: Project directory
+        @param include: Glob patterns of the files in the project, matched
+                        against the path relative to `root`
+        @param exclude: Glob patterns of the files left out of the project
+        @param ast_cache: ASTCache used while indexing (optional)
+        '''
+        self.root = root
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self.files = self._find_files()
+        self.symbols = SymbolIndex()
+        # Files that couldn't be indexed: file name -> error message
+        self.errors = {}
+        # file name -> (included paths, names of the functions and classes
+        # used), see get_dependents
+        self.references = {}
+        # Process local memo of serialized pristine ASTs and content hashes,
+        # not pickled
+        self._asts = {}
+        self._digests = {}
+        
+        self._build_index(ast_cache)
+    
+    def _matches(self, rel_path, patterns):
+        for pattern in patterns:
+            if fnmatch.fnmatch(rel_path, pattern) or \
+               fnmatch.fnmatch(os.path.basename(rel_path), pattern):
+                return True
+        return False
+    
+    def _find_files(self):
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for fname in sorted(filenames):
+                file_name = os.path.normpath(os.path.join(dirpath, fname))
+                rel_path = os.path.relpath(file_name, self.root)
+                if self._matches(rel_path, self.include) and \
+                   not self._matches(rel_path, self.exclude):
+                    files.append(file_name)
+        return files
+    
+    def _build_index(self, ast_cache):
+        for file_name in self.files:
+            try:
+                ast_code = parse_code(read_file(file_name), ast_cache)
+            except IOError, ioe:
+                self.errors[file_name] = str(ioe)
+                continue
+            except SyntaxError, se:
+                self.errors[file_name] = "syntax error: '%s'" % se
+                continue
+            
+            self.symbols.add_file(file_name, ast_code)
+            self.references[file_name] = _find_references(ast_code)
+            # Keep the position only, the nodes are loaded by get_ast
+            for symbol in self.symbols.get_symbols(file_name):
+                symbol.node = None
+    
+    def __contains__(self, file_name):
+        return self.symbols.has_file(os.path.normpath(file_name))
+    
+    def get_symbol(self, kind, name):
+        return self.symbols.get(kind, name)
+    
+    def get_ast(self, file_name, parse_code):
+        '''
+        Return a new AST for the project file `file_name` or None if it
+        can't be read or parsed. Every file is parsed once per process.
+        
+        @param parse_code: Function that returns the AST for a source code
+                           (State.parse_code)
+        '''
+        key = os.path.normpath(file_name)
+        
+        blob = self._asts.get(key)
+        if blob is not None:
+            return load_ast(blob)
+        
+        try:
+            code = read_file(key)
+        except IOError:
+            self._digests[key] = None
+            return None
+        
+        self._digests[key] = hashlib.sha1(code).hexdigest()
+        try:
+            ast_code = parse_code(code)
+        except SyntaxError:
+            return None
+        
+        blob = dump_ast(ast_code)
+        if blob is not None:
+            self._asts[key] = blob
+        return ast_code
+    
+    def get_dependents(self, changed, names=()):
+        '''
+        Return the sorted list of project files whose analysis may depend on
+        the `changed` files (e.g. modified or deleted files): the changed
+        files themselves and, transitively, the files that include them or
+        use a function or class they declare.
+        
+        Includes are matched by path suffix since the directory they are
+        resolved from depends on the entry point; this may select a few
+        files more than needed but never less.
+        
+        @param changed: Paths relative to the project root
+        @param names: Names of other functions and classes whose declaration
+                      changed (e.g. the ones removed from a changed file)
+        '''
+        # Reverse indexes: function/class name -> files that use it, and
+        # included file basename -> (file, included path)
+        users = {}
+        includers = {}
+        for file_name, (includes, used) in self.references.iteritems():
+            for name in used:
+                users.setdefault(name, []).append(file_name)
+            for inc in includes:
+                includers.setdefault(os.path.basename(inc), []).append(
+                                                            (file_name, inc))
+        
+        affected = set()
+        pending = [os.path.normpath(os.path.join(self.root, f))
+                   for f in changed]
+        for name in names:
+            pending.extend(users.get(name, ()))
+        while pending:
+            file_name = pending.pop()
+            if file_name in affected:
+                continue
+            affected.add(file_name)
+            
+            for symbol in self.symbols.get_symbols(file_name):
+                if symbol.kind != SymbolIndex.METHOD:
+                    pending.extend(users.get(symbol.name, ()))
+            for other, inc in includers.get(os.path.basename(file_name), ()):
+                if _path_endswith(file_name, inc):
+                    pending.append(other)
+        
+        return sorted(f for f in affected if f in self.references)
+    
+    def get_digest(self, file_name):
+        '''
+        Return the sha1 of the content of `file_name` read by get_ast, None
+        when it couldn't be read.
+        '''
+        return self._digests.get(os.path.normpath(file_name))
+    
+    def fingerprint(self):
+        '''
+        Return a hash of the declarations of the project. Adding, removing
+        or moving a declaration can change the result of any entry point.
+        '''
+        symbols = sorted((s.kind, s.name, s.file_name)
+                         for s in self.symbols.get_symbols())
+        return hashlib.sha1(repr(symbols)).hexdigest()
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_asts'] = {}
+        state['_digests'] = {}
+        return state
+    
+    def __len__(self):
+        return len(self.files)
+    
+    def __repr__(self):
+        return "<Project '%s' (%d files, %d symbols)>" % (self.root, len(self),
+                                                         len(self.symbols))
@@ -0,0 +1,109 @@
+'''
+results.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+from core.nodes.function_call import FuncCall
+
+
+class TraceItem(object):
+    '''
+    Picklable snapshot of one element (FuncCall or VariableDef) of a
+    vulnerability trace. It doesn't keep references to the AST or the
+    analyzer state, so it can be sent between processes or stored on disk.
+    '''
+
+    def __init__(self, kind, name, lineno, file_name, text):
+        self.kind = kind
+        self.name = name
+        self.lineno = lineno
+        self.file_name = file_name
+        # repr() of the original object
+        self.text = text
+
+    @classmethod
+    def from_node(cls, node):
+        kind = 'call' if isinstance(node, FuncCall) else 'var'
+        return cls(kind, node.name, node.lineno, node.get_file_name(),
+                   repr(node))
+
+    def get_file_name(self):
+        return self.file_name
+
+    def _key(self):
+        return (self.kind, self.name, self.lineno, self.file_name)
+
+    def __eq__(self, other):
+        return isinstance(other, TraceItem) and self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return self.text
+
+
+class AnalysisResult(object):
+    '''
+    Picklable result of analyzing one input file.
+
+        vulns: dict that maps vuln. types to a list of traces; every trace
+               is a list of TraceItems that starts with the vulnerable call.
+        alerts: alert messages
+        error: error message if the file could not be analyzed
+        dependencies: dict that maps the files the analysis read (the input
+                      file and the included ones) to the sha1 of their
+                      content, see State.dependencies
+        skipped: True if the file wasn't analyzed because it can't have
+                 any vulnerability (see core.prefilter.Prefilter)
+        stats: core.stats.Stats.to_dict() of the analysis, None unless
+               requested
+    '''
+
+    def __init__(self, infile, vulns=None, alerts=None, error=None,
+                 dependencies=None, skipped=False, stats=None):
+        self.infile = infile
+        self.vulns = vulns or {}
+        self.alerts = alerts or []
+        self.error = error
+        self.dependencies = dependencies or {}
+        self.skipped = skipped
+        self.stats = stats
+
+    @classmethod
+    def from_analyzer(cls, infile, analyzer):
+        vulns = {}
+        for vulnty, traces in analyzer.get_vulns().iteritems():
+            vulns[vulnty] = [[TraceItem.from_node(n) for n in trace]
+                             for trace in traces]
+        stats = analyzer.get_stats()
+        return cls(infile, vulns, list(analyzer.get_alerts()),
+                   dependencies=dict(analyzer.state.dependencies),
+                   stats=stats.to_dict() if stats is not None else None)
+
+    def get_vulns(self):
+        return self.vulns
+
+    def get_alerts(self):
+        return self.alerts
+
+    def __repr__(self):
+        return "<AnalysisResult for '%s'>" % self.infile
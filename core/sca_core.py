@@ -22,35 +22,57 @@ import phply.phpast as phpast
 # Slight modification to original 'accept' method.
 # Now we can now know which is the parent of the current node while
 # the AST traversal takes place. This will be *super* useful for 
-# pushing/popping the scopes from the stack. 
+# resolving the scope of every node.
+# The traversal uses an explicit stack instead of recursion, so deeply nested
+# code can't hit the interpreter's recursion limit.
 Node = phpast.Node
 
-def accept(nodeinst, visitor):
-    skip = visitor(nodeinst)  
-    if skip:
-        return
-
-    for field in nodeinst.fields:
-        value = getattr(nodeinst, field)
-        
-        if isinstance(value, Node):
-            # Add parent
-            value._parent_node = nodeinst
-            value.accept(visitor)
-        
-        elif isinstance(value, list):
-            for item in value:            
-                if isinstance(item, Node):
-                    # Set parent
-                    item._parent_node = nodeinst
-                    item.accept(visitor)
+def accept(nodeinst, visitor, stack=None):
+    # Pre-order traversal. Each stack item is a (node, parent node) tuple,
+    # the parent is set right before the node is visited. A (None, callback)
+    # item is deferred work: visitors push the bodies they travel on the
+    # same stack, followed by the code to run once they are complete (see
+    # BaseVisitor.travel).
+    if stack is None:
+        stack = []
+    base = len(stack)
+    pop = stack.pop
+    push = stack.append
+    push((nodeinst, None))
+    
+    while len(stack) > base:
+        node, parent = pop()
+        if node is None:
+            parent()
+            continue
+        if parent is not None:
+            node._parent_node = parent
+        
+        skip = visitor(node)
+        if skip:
+            continue
+        
+        children = []
+        for field in node.fields:
+            value = getattr(node, field)
+            
+            if isinstance(value, Node):
+                children.append(value)
+            
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, Node):
+                        children.append(item)
+        
+        # Push in reverse order so children are visited in order
+        for child in reversed(children):
+            push((child, node))
 
 # Finally monkeypatch phpast.Node's accept method.
 Node.accept = accept
 
 
 from core.visitors.assignment_visitor import AssignmentVisitor 
-from core.visitors.class_variables_visitor import ClassVariablesVisitor
 from core.visitors.class_visitor import ClassVisitor
 from core.visitors.flow_control_visitor import FlowControlVisitor
 from core.visitors.formal_parameter_visitor import FormalParameterVisitor
@@ -63,6 +85,11 @@ from core.visitors.vulnerable_func_visitor import VulnerableFuncVisitor
 
 
 from core.state import State
+from core.parsing import read_file
+from core.nodes.variable_def import VariableDef
+from core import stats as sca_stats
+from core import taint_engine
+from core.profiler import Profiler
 
 
 class PhpSCA(object):
@@ -73,22 +100,66 @@ class PhpSCA(object):
     
     DEBUG = False
     
-    def __init__(self, code=None, infile=None):
+    def __init__(self, code=None, infile=None, ast_cache=None, project=None,
+                 stats=None, max_traces=None):
+        '''
+        @param code: PHP source code to analyze
+        @param infile: PHP file to analyze, used when `code` is None
+        @param ast_cache: ASTCache instance used to skip parsing unchanged
+                          files (optional)
+        @param project: Project whose declarations are available to the
+                        analyzed code (optional)
+        @param stats: core.stats.Stats where the time spent in every phase
+                      and the counters are added (optional). A
+                      core.profiler.Profiler also records the time spent
+                      per visitor and AST node type.
+        @param max_traces: Max number of vulnerability traces kept per
+                           function call, FuncCall.MAX_VULNTRACES when None
+        '''
         if not code and not infile:
             raise ValueError, ("Invalid arguments. Either parameter 'code' or "
                                "'file' should not be None.")
+        
+        self._stats = stats
+        if stats is None:
+            self._analyze(code, infile, ast_cache, project, max_traces)
+            return
+        
+        previous = stats.activate()
+        variables = VariableDef.created
+        try:
+            self._analyze(code, infile, ast_cache, project, max_traces)
+        finally:
+            stats.deactivate(previous)
+            stats.count('variables', VariableDef.created - variables)
+        
+        stats.count('files', len(self.state.dependencies))
+        stats.count('scopes', len(self.state.scopes))
+        stats.count('function_calls', len(self.state.functions))
+        stats.count('traces', sum(len(f._vulntraces)
+                                  for f in self.state.functions))
+    
+    def _analyze(self, code, infile, ast_cache, project, max_traces):
+        stats = self._stats
         if infile:
-            with open(infile, 'r') as f:
-                code = f.read()
+            code = read_file(infile, stats)
 
         # Define the initial state that contains variables, functions, classes,
         # etc. that then updated by visiting each AST node
-        self.state = State(code, (infile or None))
+        self.state = State(code, (infile or None), ast_cache=ast_cache,
+                           project=project, stats=stats,
+                           max_traces=max_traces)
+        
+        profiler = stats if isinstance(stats, Profiler) else None
+        if profiler is not None:
+            self._visitor = self._profiling_visitor
+        elif stats is not None:
+            # Count the visited nodes
+            self._visitor = self._counting_visitor
         
         # Init all the visitors, which will be the ones responsible for analyzing
         # each AST node and changing the state 
         self.VISITORS = ( AssignmentVisitor(self._visitor) ,
-                          ClassVariablesVisitor(self._visitor),
                           ClassVisitor(self._visitor),
                           FlowControlVisitor(self._visitor),
                           FormalParameterVisitor(self._visitor),
@@ -99,6 +170,11 @@ class PhpSCA(object):
                           ReturnVisitor(self._visitor),
                           VulnerableFuncVisitor(self._visitor),
                           )
+        if profiler is not None:
+            for visitor in self.VISITORS:
+                visitor.visit = profiler.profile_visit(visitor)
+        self._dispatch, self._dispatch_fallback = \
+                                self._build_dispatch_table(self.VISITORS)
         
         self._start()
     
@@ -110,8 +186,21 @@ class PhpSCA(object):
         for node in self.state.ast_code:
             node._parent_node = self.state.global_pnode
         
-        # Start AST traversal!
-        self.state.global_pnode.accept(self._visitor)
+        # Start AST traversal! Visitors push the bodies they travel on the
+        # same stack
+        self.state.traversal = []
+        if self._stats is None:
+            self.state.global_pnode.accept(self._visitor, self.state.traversal)
+        else:
+            with self._stats.timer(sca_stats.TRAVERSAL):
+                self.state.global_pnode.accept(self._visitor,
+                                               self.state.traversal)
+        
+    def get_stats(self):
+        '''
+        Return the core.stats.Stats passed to the constructor (None if none)
+        '''
+        return self._stats
         
     def get_alerts(self):
         return self.state.alerts        
@@ -127,6 +216,12 @@ class PhpSCA(object):
             {'XSS': [<'system' call at line 2>, <'echo' call at line 4>],
              'OS_COMMANDING': [<'system' call at line 6>]}
         '''
+        if self._stats is not None:
+            with self._stats.timer(sca_stats.REPORT):
+                return self._get_vulns()
+        return self._get_vulns()
+    
+    def _get_vulns(self):
         resdict = {}
         for f in self.get_func_calls(vuln=True):
             for trace in f._vulntraces:
@@ -137,9 +232,13 @@ class PhpSCA(object):
         return resdict
     
     def get_vars(self, usr_controlled=False):
+        all_vars = self.state.scopes[0].get_all_vars()
+        if usr_controlled:
+            # One pass for all of them
+            taint_engine.solve_all(all_vars)
         filter_tainted = (lambda v: v.controlled_by_user) if usr_controlled \
                             else (lambda v: 1)
-        all_vars = filter(filter_tainted, self.state.scopes[0].get_all_vars())
+        all_vars = filter(filter_tainted, all_vars)
         
         return all_vars
     
@@ -152,6 +251,30 @@ class PhpSCA(object):
         funcs = filter(filter_vuln, self.state.functions)
         return funcs
     
+    def _build_dispatch_table(self, visitors):
+        '''
+        Map every AST node type to the visitors that may handle it, keeping
+        the `visitors` order. Each entry is a (visitor, check) tuple; `check`
+        is True when visitor.should_visit has to be called because the node
+        type alone doesn't decide (e.g. FunctionCallVisitor).
+        
+        @return: A tuple with the table and the entries used for node types
+                 not in the table (visitors that declare no NODE_TYPES).
+        '''
+        nodetys = set()
+        for visitor in visitors:
+            nodetys.update(visitor.NODE_TYPES or ())
+        
+        table = {}
+        for nodety in nodetys:
+            table[nodety] = tuple(
+                (v, v.has_dynamic_predicate()) for v in visitors
+                if v.NODE_TYPES is None or nodety in v.NODE_TYPES)
+        
+        fallback = tuple((v, True) for v in visitors if v.NODE_TYPES is None)
+        
+        return table, fallback
+    
     def _visitor(self, node):
         '''
         Visitor method for AST traversal. Used as arg for AST nodes' 'accept'
@@ -159,19 +282,41 @@ class PhpSCA(object):
         '''
         nodety = type(node)
         
-        for visitor in self.VISITORS:
-            if visitor.should_visit(nodety, node, self.state):
-                
-                newobj, stoponthis = visitor.visit(node, self.state)
+        # Index the scope this node lives in: the scope opened by its parent
+        # or else the parent's own scope (see BaseVisitor.locate_scope)
+        parent = getattr(node, '_parent_node', None)
+        if parent is not None:
+            node._enclosing_scope = getattr(parent, '_scope', None) or \
+                                    getattr(parent, '_enclosing_scope', None)
+        
+        for visitor, check in self._dispatch.get(nodety, self._dispatch_fallback):
+            if check and not visitor.should_visit(nodety, node, self.state):
+                continue
+            
+            newobj, stoponthis = visitor.visit(node, self.state)
+            
+            self.debug(newobj)
                 
-                self.debug(newobj)
-                    
-                return stoponthis
-        else:
+            return stoponthis
+        
+        if self.DEBUG:
             self.debug('There is no visitor for "%s"' % node)
             
         return False
     
+    def _counting_visitor(self, node):
+        self._stats.count('nodes')
+        return PhpSCA._visitor(self, node)
+    
+    def _profiling_visitor(self, node):
+        profiler = self._stats
+        profiler.count('nodes')
+        profiler.start_node(type(node))
+        try:
+            return PhpSCA._visitor(self, node)
+        finally:
+            profiler.stop_node()
+    
     def debug(self, newobj):
         if self.DEBUG and newobj:
             print newobj
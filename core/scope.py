@@ -22,6 +22,8 @@ import re
 
 import phply.phpast as phpast
 
+from core import taint_engine
+
 
 class Scope(object):
     
@@ -41,6 +43,9 @@ class Scope(object):
         self._functions = []
         self._method_calls = []
         self._file_name = None
+        # Solved vars whose parents weren't found when looked up through
+        # this scope: name -> {id(var): var}
+        self._unresolved = {}
     
     def add_method_call(self, method):
         if method is None:
@@ -72,19 +77,49 @@ class Scope(object):
         if newvar._anon_var is True:
             return        
         
-        selfvars = self._vars
+        # Walk up the scope chain (loop, not recursion: nesting can be deep)
         newvarname = newvar.name
-        varobj = selfvars.get(newvarname)
-        if not varobj or newvar > varobj:
+        scope = self
+        while scope:
+            selfvars = scope._vars
+            varobj = selfvars.get(newvarname)
+            if varobj and not newvar > varobj:
+                return
+            
             selfvars[newvarname] = newvar
             
+            # Lazily computed parents may resolve to the new var
+            taint_engine.invalidate_unresolved(scope, newvarname)
+            
             # don't add var to parent if scope is function or method
-            if self._is_root:
+            if scope._is_root:
                 return
             
-            # Now let the parent scope do his thing        
-            if self._parent_scope:
-                self._parent_scope.add_var(newvar)
+            # Now let the parent scope do his thing
+            scope = scope._parent_scope
+    
+    def set_var(self, var):
+        '''
+        Store `var` in this scope, replacing the var with the same name
+        '''
+        self._vars[var.name] = var
+        taint_engine.invalidate_unresolved(self, var.name)
+    
+    def add_unresolved(self, name, var):
+        '''
+        Record that the parents of the solved `var` were looked up by `name`
+        from this scope and not found. Adding a var `name` to any scope the
+        lookup goes through (see get_var) invalidates `var`.
+        '''
+        scope = self
+        while True:
+            scope._unresolved.setdefault(name, {})[id(var)] = var
+            
+            if scope._is_root and type(scope._ast_node) is not phpast.Method:
+                return
+            if not scope._parent_scope:
+                return
+            scope = scope._parent_scope
     
     def get_var_like(self, varname):
         '''
@@ -99,21 +134,22 @@ class Scope(object):
         return matches
     
     def get_var(self, varname, requestvar = None):
-        var = self._vars.get(varname, None) or self._builtins.get(varname)
-        
-        # Request var is used to avoid var setting itself as parent
-        if requestvar and requestvar is var:
-            var = None
-        
-        # Don't look in parent node for var
-        if self._is_root and type(self._ast_node) is not phpast.Method:
-            return var
-        
-        # look in parent parent scope
-        if not var and self._parent_scope:
-            var = self._parent_scope.get_var(varname, requestvar)
-        
-        return var
+        scope = self
+        while True:
+            var = scope._vars.get(varname, None) or scope._builtins.get(varname)
+            
+            # Request var is used to avoid var setting itself as parent
+            if requestvar and requestvar is var:
+                var = None
+            
+            # Don't look in parent node for var
+            if scope._is_root and type(scope._ast_node) is not phpast.Method:
+                return var
+            
+            # look in parent parent scope
+            if var or not scope._parent_scope:
+                return var
+            scope = scope._parent_scope
     
     @property
     def file_name(self):
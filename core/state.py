@@ -20,15 +20,17 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
 import phply.phpast as phpast
 
-from phply import phplex
-from phply.phpparse import parser 
-
 from core.scope import Scope
+from core.symbol_index import SymbolIndex
 from core.nodes.variable_def import VariableDef
+from core.nodes.function_call import FuncCall
 from core.exceptions.syntax_error import CodeSyntaxError
+from core.cache.ast_cache import dump_ast, load_ast
+from core.parsing import read_file, parse_code
 
 from os import path
 import sys
+import hashlib
 
 class State(object):
     '''
@@ -38,7 +40,8 @@ class State(object):
         * Defined methods
         * Defined attributes
     '''
-    def __init__(self, code, infile):
+    def __init__(self, code, infile, ast_cache=None, project=None, stats=None,
+                 max_traces=None):
         #
         #    Init internal variables that hold most information
         #
@@ -48,20 +51,40 @@ class State(object):
         self.functions_declarations = {}
         # class node to create new instances
         self.classes = {}
+        # top level functions and classes of the analyzed files
+        self.symbols = SymbolIndex()
         # variableDefs that are objects
         self.objects = {}
-        # used for method traveling
-        self.methods_deep = []
         # keep track of alert messages
         self.alerts = []
         # relative path of start script
         self.path = ''
+        # on-disk AST cache (core.cache.ast_cache.ASTCache), optional
+        self.ast_cache = ast_cache
+        # phase times and counters (core.stats.Stats), optional
+        self.stats = stats
+        # max number of vulnerability traces kept per function call
+        self.max_traces = (FuncCall.MAX_VULNTRACES if max_traces is None
+                           else max_traces)
+        # shared declarations of the other project files (core.project.Project),
+        # optional
+        self.project = project
+        # files the analysis depends on (the analyzed file, the included ones
+        # and the project files declarations were loaded from): normalized
+        # path -> sha1 of the content, None when the file couldn't be read
+        self.dependencies = {}
+        # work stack of the AST traversal (see sca_core.accept), set when
+        # the traversal starts
+        self.traversal = None
+        # include/require memo: serialized pristine AST per included file
+        self._include_asts = {}
+        # include/require negative cache: error message (or None when
+        # the file couldn't be read) per included file
+        self._include_errors = {}
         
-        # Lexer instance
-        lexer = phplex.lexer.clone()
         # Code AST
         try:
-            self.ast_code = parser.parse(code, lexer=lexer)
+            self.ast_code = self.parse_code(code)
         except SyntaxError, se:
             raise CodeSyntaxError, "Error while parsing the code, syntax error: '%s'" % se
         
@@ -70,9 +93,11 @@ class State(object):
                                            ['name', 'children', '_parent_node'])
         ## Instantiate it and self-assign it as root node
         self.global_pnode = GlobalParentNodeType((infile or 'global_parent'), self.ast_code, None)
+        self.symbols.add_file(self.global_pnode.name, self.ast_code)
         
         if infile:
             self.path = path.dirname(infile)
+            self.add_dependency(infile, code)
                 
         # Define scope
         scope = Scope(self.global_pnode, parent_scope=None, is_root=True)
@@ -83,4 +108,127 @@ class State(object):
         # TODO: There's probably a better way to do this
         scope.state = self
         
-        self.scopes = [scope]
\ No newline at end of file
+        self.scopes = [scope]
+        self.global_pnode._scope = scope
+    
+    def push_scope(self, scope):
+        '''
+        Add a new scope. The AST node that originated the scope is marked as
+        the one that opens it, so the nodes below it resolve to `scope`
+        (see BaseVisitor.locate_scope).
+        '''
+        scope._ast_node._scope = scope
+        self.scopes.append(scope)
+    
+    def parse_code(self, code):
+        '''
+        Return the AST for `code`. Use the AST cache when available.
+        
+        @raise SyntaxError: When phply fails to parse the code
+        '''
+        return parse_code(code, self.ast_cache, self.stats)
+    
+    def parse_include(self, infile):
+        '''
+        Return a new AST for the included file `infile` or None if it can't
+        be read or parsed. Every file is read and parsed once per State; the
+        traversal annotates the AST nodes, so each include gets its own copy.
+        '''
+        key = path.normpath(infile)
+        
+        # Project files are parsed once per process
+        if self.project is not None and key in self.project:
+            return self._get_project_ast(key)
+        
+        blob = self._include_asts.get(key)
+        if blob is not None:
+            return load_ast(blob)
+        
+        if key in self._include_errors:
+            error = self._include_errors[key]
+            if error:
+                self.alerts.append(error)
+            return None
+        
+        try:
+            code = read_file(infile, self.stats)
+        except IOError:
+            self._include_errors[key] = None
+            self.add_dependency(key, None)
+            return None
+        
+        self.add_dependency(key, code)
+        
+        try:
+            ast_code = self.parse_code(code)
+        except SyntaxError, se:
+            error = ("Error while parsing the code of include file '%s', "
+                     "syntax error: '%s'" % (infile, se))
+            self._include_errors[key] = error
+            self.alerts.append(error)
+            return None
+        
+        # AST too deep to be serialized, parse it again next time
+        blob = dump_ast(ast_code)
+        if blob is not None:
+            self._include_asts[key] = blob
+        
+        return ast_code
+
+    
+    def find_symbol(self, kind, name, load=True):
+        '''
+        Return the Symbol of the top level function or class `name` or None
+        if it isn't declared. Declarations from the analyzed files come
+        first, then the ones from the other files of the project.
+        
+        @param kind: SymbolIndex.FUNCTION or SymbolIndex.CLASS
+        @param load: Load the project file that declares `name` (only its
+                     declarations are traveled, not its top level code).
+                     When False the returned symbol may have no AST node.
+        '''
+        symbol = self.symbols.get(kind, name)
+        if symbol is not None or self.project is None:
+            return symbol
+        
+        symbol = self.project.get_symbol(kind, name)
+        if symbol is None or not load:
+            return symbol
+        
+        self._load_project_file(symbol.file_name)
+        return self.symbols.get(kind, name)
+    
+    def _load_project_file(self, infile):
+        '''
+        Index the declarations of the project file `infile`, the same way
+        an included file is (see VulnerableFuncVisitor.parse_include_require)
+        but without traveling it.
+        '''
+        ast_code = self._get_project_ast(infile)
+        if ast_code is None:
+            return
+        
+        GlobalParentNodeType = phpast.node('GlobalParentNodeType',
+                                           ['name', 'children', '_parent_node'])
+        pnode = GlobalParentNodeType(infile, ast_code, None)
+        for n in ast_code:
+            n._parent_node = pnode
+        
+        self.symbols.add_file(infile, ast_code)
+        
+        # Its declarations live in the global scope
+        self.push_scope(Scope(pnode, parent_scope=self.scopes[0]))
+    
+    def _get_project_ast(self, infile):
+        ast_code = self.project.get_ast(infile, self.parse_code)
+        self.dependencies[path.normpath(infile)] = \
+                                        self.project.get_digest(infile)
+        return ast_code
+    
+    def add_dependency(self, infile, code):
+        '''
+        Record that the analysis depends on the file `infile` with content
+        `code` (None when the file couldn't be read).
+        '''
+        digest = None if code is None else hashlib.sha1(code).hexdigest()
+        self.dependencies[path.normpath(infile)] = digest
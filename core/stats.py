@@ -0,0 +1,164 @@
+'''
+stats.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import time
+import functools
+
+
+# Analysis phases, in pipeline order
+READ = 'read'
+LEX = 'lex'
+PARSE = 'parse'
+TRAVERSAL = 'traversal'
+TAINT = 'taint'
+REPORT = 'report'
+
+PHASES = (READ, LEX, PARSE, TRAVERSAL, TAINT, REPORT)
+
+# Stats of the running analysis (see Stats.activate), read by the timed
+# decorator
+_active = None
+
+
+def timed(phase):
+    '''
+    Decorator that charges the time spent in the decorated function to
+    `phase` of the active Stats. Costs one function call when no Stats are
+    active.
+    '''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = _active
+            if stats is None:
+                return func(*args, **kwargs)
+            stats.start(phase)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.stop()
+        return wrapper
+    return decorator
+
+
+class Stats(object):
+    '''
+    Wall and CPU time per analysis phase plus counters (AST nodes visited,
+    scopes, variables, traces, etc.).
+    
+    Phases nest: while a phase runs inside another one (e.g. taint
+    evaluation during the traversal) only the inner one is charged, so
+    the phase times add up to the total time.
+    '''
+    
+    def __init__(self):
+        # phase -> [wall time, cpu time]
+        self.times = dict((phase, [0.0, 0.0]) for phase in PHASES)
+        # counter name -> value
+        self.counters = {}
+        # running phases, the last one is being charged
+        self._running = []
+        self._mark = None
+    
+    def _now(self):
+        return time.time(), time.clock()
+    
+    def _charge(self, now):
+        times = self.times[self._running[-1]]
+        times[0] += now[0] - self._mark[0]
+        times[1] += now[1] - self._mark[1]
+    
+    def start(self, phase):
+        now = self._now()
+        if self._running:
+            self._charge(now)
+        self._running.append(phase)
+        self._mark = now
+    
+    def stop(self):
+        now = self._now()
+        self._charge(now)
+        self._running.pop()
+        self._mark = now
+    
+    def timer(self, phase):
+        '''
+        Context manager that charges the time spent in the block to `phase`
+        '''
+        return _Timer(self, phase)
+    
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+    
+    def activate(self):
+        '''
+        Make these the stats the timed functions report to. Returns the
+        previously active ones, pass them to deactivate.
+        '''
+        global _active
+        previous = _active
+        _active = self
+        return previous
+    
+    def deactivate(self, previous=None):
+        global _active
+        _active = previous
+    
+    def merge(self, other):
+        '''
+        Add the times and counters of `other` (Stats or to_dict() output)
+        '''
+        if isinstance(other, Stats):
+            other = other.to_dict()
+        for phase, times in other['wall'].iteritems():
+            self.times.setdefault(phase, [0.0, 0.0])[0] += times
+        for phase, times in other['cpu'].iteritems():
+            self.times.setdefault(phase, [0.0, 0.0])[1] += times
+        for name, value in other['counters'].iteritems():
+            self.count(name, value)
+    
+    def to_dict(self):
+        '''
+        Return a JSON serializable dict:
+        
+            {'wall': {phase: seconds}, 'cpu': {phase: seconds},
+             'counters': {name: value}}
+        '''
+        return {'wall': dict((p, t[0]) for p, t in self.times.iteritems()),
+                'cpu': dict((p, t[1]) for p, t in self.times.iteritems()),
+                'counters': dict(self.counters)}
+    
+    def __repr__(self):
+        wall = sum(t[0] for t in self.times.itervalues())
+        return '<Stats %.3fs %r>' % (wall, self.counters)
+
+
+class _Timer(object):
+    
+    def __init__(self, stats, phase):
+        self._stats = stats
+        self._phase = phase
+    
+    def __enter__(self):
+        self._stats.start(self._phase)
+        return self._stats
+    
+    def __exit__(self, *exc_info):
+        self._stats.stop()
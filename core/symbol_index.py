@@ -0,0 +1,139 @@
+'''
+symbol_index.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import phply.phpast as phpast
+
+
+class Symbol(object):
+    '''
+    Declaration of a function, class or method.
+    
+        kind: FUNCTION, CLASS or METHOD
+        name: function or class name, 'Class::method' for methods
+        file_name: file the declaration is in
+        position: index of the declaration in the file's top level
+                  statements (in the class body for methods)
+        lineno: line number
+        node: the declaration AST node
+    '''
+    __slots__ = ('kind', 'name', 'file_name', 'position', 'lineno', 'node')
+
+    def __init__(self, kind, name, file_name, position, lineno, node=None):
+        self.kind = kind
+        self.name = name
+        self.file_name = file_name
+        self.position = position
+        self.lineno = lineno
+        self.node = node
+
+    def __getstate__(self):
+        # The AST node isn't pickled, it is resolved again from the
+        # file name and the position
+        return (self.kind, self.name, self.file_name, self.position,
+                self.lineno)
+
+    def __setstate__(self, state):
+        (self.kind, self.name, self.file_name, self.position,
+         self.lineno) = state
+        self.node = None
+
+    def __repr__(self):
+        return "<%s '%s' at line %s in '%s'>" % (self.kind, self.name,
+                                                 self.lineno, self.file_name)
+
+
+class SymbolIndex(object):
+    '''
+    Index of the functions and classes declared at the top level of the
+    analyzed files. PHP makes these declarations available before the code
+    that declares them runs, the index lets the traversal find them
+    without traveling the whole file first.
+    '''
+
+    FUNCTION = 'function'
+    CLASS = 'class'
+    METHOD = 'method'
+
+    def __init__(self):
+        # (kind, name) -> Symbol
+        self._symbols = {}
+        # file name -> [Symbol]
+        self._files = {}
+
+    def add_file(self, file_name, ast_code):
+        '''
+        Index the declarations in the top level statements `ast_code` of
+        `file_name`. Indexing a file again replaces its declarations.
+        '''
+        self.remove_file(file_name)
+        
+        symbols = self._files[file_name] = []
+        for position, node in enumerate(ast_code):
+            nodety = type(node)
+            if nodety is phpast.Function:
+                symbols.append(Symbol(self.FUNCTION, node.name, file_name,
+                                      position, node.lineno, node))
+            elif nodety is phpast.Class:
+                symbols.append(Symbol(self.CLASS, node.name, file_name,
+                                      position, node.lineno, node))
+                for mposition, child in enumerate(node.nodes):
+                    if type(child) is phpast.Method:
+                        symbols.append(Symbol(self.METHOD,
+                                              node.name + '::' + child.name,
+                                              file_name, mposition,
+                                              child.lineno, child))
+        
+        for symbol in symbols:
+            self._symbols[(symbol.kind, symbol.name)] = symbol
+
+    def remove_file(self, file_name):
+        for symbol in self._files.pop(file_name, ()):
+            key = (symbol.kind, symbol.name)
+            if self._symbols.get(key) is symbol:
+                del self._symbols[key]
+
+    def get(self, kind, name):
+        return self._symbols.get((kind, name))
+
+    def get_function(self, name):
+        return self._symbols.get((self.FUNCTION, name))
+
+    def get_class(self, name):
+        return self._symbols.get((self.CLASS, name))
+
+    def get_method(self, class_name, name):
+        return self._symbols.get((self.METHOD, class_name + '::' + name))
+
+    def has_file(self, file_name):
+        return file_name in self._files
+
+    def get_files(self):
+        return self._files.keys()
+
+    def get_symbols(self, file_name=None):
+        if file_name is None:
+            return self._symbols.values()
+        return list(self._files.get(file_name, ()))
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __repr__(self):
+        return '<SymbolIndex with %d symbols>' % len(self)
@@ -0,0 +1,199 @@
+'''
+taint_engine.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+# Worklist taint propagation over the def-use graph of the VariableDefs.
+#
+# The taint of a var is a lattice value (user, blocked):
+#
+#     user: True if the var is controlled by the user
+#     blocked: vuln. types the var is *not* tainted for, None for all of
+#              them (the bottom of the lattice)
+#
+# Sources are the root vars and the vars without parents, the value of any
+# other var is the join of its parents' values plus its own sanitizers
+# (VariableDef._safe_for). The first query on a var solves it and all its
+# unsolved ancestors at once, forward from the sources; every later query
+# is a lookup until the var is invalidated.
+#
+# The def-use edges (parent -> child) are recorded in the parents as their
+# children are solved, so a change in a var only invalidates the vars that
+# were computed from it.
+
+# Bumped by invalidate_all(), values of an older generation are stale
+_generation = 0
+
+# Solved vars with unresolved parents that aren't looked up by name (they
+# come from function calls), see invalidate_unresolved: id -> var
+_unresolved = {}
+
+
+def _join(blocked, incoming):
+    if blocked is None:
+        return incoming
+    if incoming is None:
+        return blocked
+    return blocked & incoming
+
+
+def get_taint(var):
+    '''
+    Return the (user, blocked) taint of `var`.
+    '''
+    if var._taint_generation == _generation and var._taint is not None:
+        return var._taint
+    _solve([var])
+    return var._taint
+
+
+def solve_all(vars):
+    '''
+    Solve the taint of all the `vars` at once, e.g. before querying every
+    var of a scope.
+    '''
+    _solve(vars)
+
+
+def is_tainted(var, vulnty=None):
+    '''
+    True if `var` is controlled by the user (`vulnty` is None) or tainted
+    for `vulnty`.
+    '''
+    user, blocked = get_taint(var)
+    if vulnty is None:
+        return user
+    return blocked is not None and vulnty not in blocked
+
+
+def _solve(vars):
+    generation = _generation
+    
+    # The unsolved ancestors of vars, the solved ones are final
+    region = []
+    transfers = {}
+    stack = list(vars)
+    while stack:
+        v = stack.pop()
+        if id(v) in transfers or (v._taint_generation == generation and
+                                  v._taint is not None):
+            continue
+        transfer = transfers[id(v)] = v._taint_transfer()
+        region.append(v)
+        stack.extend(transfer[2])
+    
+    # Initial values and def-use edges
+    values = {}
+    children = {}
+    for v in region:
+        user, blocked, parents, safe_for = transfers[id(v)]
+        if not v._parents and v._is_root is not True:
+            # Without parents until they are resolved, see VariableDef
+            _add_unresolved(v)
+        for parent in parents:
+            parent._taint_children[id(v)] = v
+            if id(parent) in transfers:
+                children.setdefault(id(parent), []).append(v)
+            else:
+                parent_user, parent_blocked = parent._taint
+                user = user or parent_user
+                if parent_blocked is not None:
+                    blocked = _join(blocked, parent_blocked | safe_for)
+        values[id(v)] = [user, blocked]
+    
+    _propagate(region, transfers, values, children)
+    
+    for v in region:
+        v._taint = tuple(values[id(v)])
+        v._taint_generation = generation
+
+
+def _propagate(region, transfers, values, children):
+    '''
+    Update the initial `values` of the `region` vars with the taint of
+    their parents (`children` are the region edges).
+    '''
+    # Propagate forward until nothing changes; values only go up the
+    # lattice, so every var is pushed a bounded number of times
+    work = [v for v in region
+            if values[id(v)][0] or values[id(v)][1] is not None]
+    while work:
+        u = work.pop()
+        user, blocked = values[id(u)]
+        for child in children.get(id(u), ()):
+            value = values[id(child)]
+            changed = False
+            if user and not value[0]:
+                value[0] = changed = True
+            if blocked is not None:
+                new_blocked = _join(value[1], blocked | transfers[id(child)][3])
+                if new_blocked != value[1]:
+                    value[1] = new_blocked
+                    changed = True
+            if changed:
+                work.append(child)
+
+
+def invalidate(var):
+    '''
+    Forget the taint of `var` and of all the vars computed from it; must
+    be called when the parents of `var` change.
+    '''
+    stack = [var]
+    while stack:
+        v = stack.pop()
+        if v._taint is None or v._taint_generation != _generation:
+            continue
+        v._taint = None
+        stack.extend(v._taint_children.itervalues())
+        v._taint_children = {}
+
+
+def _add_unresolved(var):
+    lookups = var._parent_lookups()
+    if not lookups:
+        _unresolved[id(var)] = var
+    for name, scope in lookups:
+        scope.add_unresolved(name, var)
+
+
+def invalidate_unresolved(scope, name):
+    '''
+    Called when var `name` is added to `scope`: the vars whose parents
+    weren't resolved yet may resolve to it. Only the vars that looked up
+    `name` through `scope` are invalidated, along with the vars computed
+    from them.
+    '''
+    global _unresolved
+    vars = scope._unresolved.pop(name, None)
+    if vars:
+        for var in vars.itervalues():
+            invalidate(var)
+    if _unresolved:
+        vars, _unresolved = _unresolved, {}
+        for var in vars.itervalues():
+            invalidate(var)
+
+
+def invalidate_all():
+    '''
+    Forget the taint of all the vars.
+    '''
+    global _generation, _unresolved
+    _generation += 1
+    _unresolved = {}
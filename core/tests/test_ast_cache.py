@@ -0,0 +1,86 @@
+'''
+test_ast_cache.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import stat
+import shutil
+import tempfile
+
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.cache.ast_cache import ASTCache
+
+
+class TestASTCache(PyMockTestCase):
+
+    CODE = '''<?php
+        $foo = $_GET['bar'];
+        echo $foo;
+        ?>'''
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.cache_dir = tempfile.mkdtemp()
+        self.cache = ASTCache(self.cache_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_miss_then_hit(self):
+        vulns = PhpSCA(self.CODE, ast_cache=self.cache).get_vulns()
+        self.assertEquals(1, self.cache.misses)
+        self.assertEquals(0, self.cache.hits)
+
+        cached_vulns = PhpSCA(self.CODE, ast_cache=self.cache).get_vulns()
+        self.assertEquals(1, self.cache.hits)
+        self.assertEquals(vulns.keys(), cached_vulns.keys())
+        self.assertEquals(vulns['XSS'][0][0].lineno,
+                          cached_vulns['XSS'][0][0].lineno)
+
+    def test_entry_mode(self):
+        PhpSCA(self.CODE, ast_cache=self.cache)
+        paths = [path for _, _, path in self.cache._entries()]
+        self.assertEquals(1, len(paths))
+        self.assertEquals(0644, stat.S_IMODE(os.stat(paths[0]).st_mode))
+
+    def test_key_depends_on_content(self):
+        self.assertNotEquals(self.cache.key(self.CODE),
+                             self.cache.key(self.CODE + ' '))
+
+    def test_cached_ast_is_pristine(self):
+        # The traversal annotates the AST, the cache must store it untouched
+        PhpSCA(self.CODE, ast_cache=self.cache)
+        ast_code = self.cache.get(self.CODE)
+        self.assertFalse(hasattr(ast_code[0], '_parent_node'))
+
+    def test_eviction(self):
+        cache = ASTCache(self.cache_dir, max_size=1)
+        cache.set(self.CODE, [])
+        cache.set(self.CODE + ' ', [])
+        self.assertEquals(None, cache.get(self.CODE))
+        self.assertEquals(0, len(list(cache._entries())))
+
+    def test_broken_entry(self):
+        self.cache.set(self.CODE, [])
+        key = self.cache.key(self.CODE)
+        with open(self.cache._path_for(key), 'wb') as f:
+            f.write('garbage')
+        self.assertEquals(None, self.cache.get(self.CODE))
+        self.assertFalse(os.path.exists(self.cache._path_for(key)))
@@ -19,6 +19,9 @@ along with w3af; if not, write to the Free Software
 Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
 
+import sys
+import phply.phpast as phpast
+
 from pymock import PyMockTestCase
 from core.sca_core import PhpSCA
 from core.exceptions.syntax_error import CodeSyntaxError
@@ -81,3 +84,53 @@ class TestPHPSCA(PyMockTestCase):
         '''
         self.assertRaises(CodeSyntaxError, PhpSCA, invalidcode)
 
+    
+    def test_dispatch_table(self):
+        analyzer = PhpSCA('<?php ?>')
+        
+        entries = analyzer._dispatch[phpast.FunctionCall]
+        visitors = [type(v).__name__ for v, _ in entries]
+        self.assertEquals(['FunctionCallVisitor', 'VulnerableFuncVisitor'], visitors)
+        # Only the custom function call visitor needs to look at the state
+        self.assertEquals([True, False], [check for _, check in entries])
+        
+        self.assertEquals(1, len(analyzer._dispatch[phpast.Assignment]))
+        self.assertFalse(phpast.Constant in analyzer._dispatch)
+        self.assertEquals((), analyzer._dispatch_fallback)
+    
+    def test_deeply_nested_code(self):
+        # Deeper than the recursion limit, must not raise RuntimeError
+        depth = sys.getrecursionlimit()
+        code = '<?php\n' + 'if ($x) {\n' * depth + 'echo $_GET[1];\n' + \
+                '}\n' * depth + '?>'
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
+        
+        code = '<?php $a = ' + ' . '.join(["'x'"] * depth * 2) + '; ?>'
+        self.assertEquals(1, len(PhpSCA(code).get_vars()))
+    
+    def test_deeply_chained_calls(self):
+        # Method bodies, hoisted functions and chained calls are traveled
+        # on the traversal stack, must not raise RuntimeError
+        depth = 350
+        lines = ['<?php', 'class A {', 'function m0($a) { echo $a; }']
+        for i in xrange(1, depth):
+            lines.append('function m%d($a) { $this->m%d($a); }' % (i, i - 1))
+        lines.append('}')
+        lines.append('$obj = new A();')
+        lines.append('$obj->m%d($_GET[1]);' % (depth - 1))
+        vulns = PhpSCA('\n'.join(lines)).get_vulns()
+        self.assertEquals(1, len(vulns['XSS']))
+        
+        # Each function is called before it's declared
+        lines = ['<?php', 'f0($_GET[1]);']
+        for i in xrange(depth - 1):
+            lines.append('function f%d($a) { f%d($a); }' % (i, i + 1))
+        lines.append('function f%d($a) { echo $a; }' % (depth - 1))
+        analyzer = PhpSCA('\n'.join(lines))
+        self.assertEquals(depth, len(analyzer.get_function_decl()))
+        
+        code = '<?php $db->query(1)' + '->where(1)' * depth + \
+                '->whereRaw($_GET[1]); ?>'
+        analyzer = PhpSCA(code)
+        self.assertEquals(depth + 2, len(analyzer.get_func_calls()))
@@ -0,0 +1,85 @@
+'''
+test_batch.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import cPickle
+
+from pymock import PyMockTestCase
+from core import batch
+from core.batch import analyze_files, analyze_file
+
+
+class TestBatch(PyMockTestCase):
+
+    TEST_DIR = os.path.join('core', 'tests')
+    INPUT_FILES = [
+        os.path.join(TEST_DIR, 'samate', '000', '001', '937', 'xss_lod0.phps'),
+        os.path.join(TEST_DIR, 'test_include_require', '1', 'a.php'),
+        os.path.join(TEST_DIR, 'samate', '000', '001', '940', 'sql_lod0.phps'),
+        ]
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+
+    def test_result_is_picklable(self):
+        result = analyze_file(self.INPUT_FILES[1])
+        result = cPickle.loads(cPickle.dumps(result))
+
+        trace = result.get_vulns()['XSS'][0]
+        self.assertEquals('echo', trace[0].name)
+        self.assertEquals(3, trace[0].lineno)
+        self.assertEquals(2, trace[-1].lineno)
+        self.assertTrue(trace[-1].get_file_name().endswith('b.php'))
+
+    def test_parallel_same_as_serial(self):
+        serial = list(analyze_files(self.INPUT_FILES, jobs=1))
+        parallel = list(analyze_files(self.INPUT_FILES, jobs=3))
+
+        self.assertEquals(self.INPUT_FILES, [r.infile for r in parallel])
+        for sres, pres in zip(serial, parallel):
+            self.assertEquals(sres.get_vulns(), pres.get_vulns())
+            self.assertEquals(repr(sres.get_vulns()), repr(pres.get_vulns()))
+
+    def test_error_does_not_abort_batch(self):
+        input_files = ['does_not_exist.php', self.INPUT_FILES[0]]
+        results = list(analyze_files(input_files, jobs=2))
+
+        self.assertTrue(results[0].error)
+        self.assertEquals(None, results[1].error)
+        self.assertTrue('XSS' in results[1].get_vulns())
+
+    def test_analyzer_error_does_not_abort_batch(self):
+        new_analyzer = batch._new_analyzer
+        def broken_analyzer(infile, *args):
+            if infile == self.INPUT_FILES[1]:
+                raise AttributeError('broken analyzer')
+            return new_analyzer(infile, *args)
+        
+        batch._new_analyzer = broken_analyzer
+        try:
+            for jobs in (1, 2):
+                results = list(analyze_files(self.INPUT_FILES, jobs=jobs))
+                self.assertEquals(self.INPUT_FILES, [r.infile for r in results])
+                self.assertTrue('AttributeError: broken analyzer' in
+                                results[1].error)
+                self.assertTrue('XSS' in results[0].get_vulns())
+                self.assertTrue('SQL_INJECTION' in results[2].get_vulns())
+        finally:
+            batch._new_analyzer = new_analyzer
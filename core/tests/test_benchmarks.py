@@ -0,0 +1,91 @@
+'''
+test_benchmarks.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.nodes.function_call import FuncCall
+from benchmarks.generators import AXES, write_files
+from benchmarks.scaling import SIZES, measure, run, scaling_exponent
+
+
+class TestBenchmarks(PyMockTestCase):
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _findings(self, axis, size):
+        entry = write_files(AXES[axis](size), self.directory)
+        vulns = PhpSCA(infile=entry).get_vulns()
+        return sum(len(traces) for traces in vulns.itervalues())
+
+    def test_generated_code(self):
+        self.assertEquals(1, self._findings('assignment_chain', 5))
+        self.assertEquals(5, self._findings('concat_width', 5))
+        self.assertEquals(20, self._findings('function_count', 5))
+        self.assertEquals(20, self._findings('call_fanout', 5))
+        self.assertEquals(5, self._findings('include_fanout', 5))
+        self.assertEquals(1, self._findings('nesting_depth', 5))
+        self.assertEquals(1, self._findings('method_depth', 5))
+
+    def test_default_sizes(self):
+        # The sizes 'python -m benchmarks.scaling' runs by default
+        cap = FuncCall.MAX_VULNTRACES
+        expected = {'assignment_chain': lambda n: 1,
+                    'concat_width': lambda n: min(n, cap),
+                    'function_count': lambda n: 4 * n,
+                    'call_fanout': lambda n: 4 * min(n, cap),
+                    'include_fanout': lambda n: n,
+                    'nesting_depth': lambda n: 1,
+                    'method_depth': lambda n: 1}
+        self.assertEquals(sorted(AXES), sorted(expected))
+        
+        for axis in sorted(AXES):
+            for size in SIZES:
+                self.assertEquals(expected[axis](size),
+                                  self._findings(axis, size), (axis, size))
+
+    def test_scaling_exponent(self):
+        linear = [(s, 0.5 * s) for s in (10, 20, 40)]
+        quadratic = [(s, 0.5 * s * s) for s in (10, 20, 40)]
+        self.assertAlmostEquals(1.0, scaling_exponent(linear))
+        self.assertAlmostEquals(2.0, scaling_exponent(quadratic))
+        self.assertEquals(None, scaling_exponent(linear[:1]))
+
+    def test_measure(self):
+        point = measure('assignment_chain', 5, repeat=1)
+        self.assertEquals(('assignment_chain', 5, 1),
+                          (point['axis'], point['size'], point['findings']))
+        self.assertTrue(point['peak_rss_kb'] > 0)
+        self.assertTrue('parse' in point['phases'])
+
+    def test_run(self):
+        out = StringIO()
+        results = run(['include_fanout'], (2, 4), repeat=1, out=out)
+        self.assertEquals([2, 4], [p['size'] for p in
+                                   results['include_fanout']['points']])
+        self.assertTrue('exponent' in out.getvalue())
@@ -142,3 +142,111 @@ class TestClasses(PyMockTestCase):
         analyzer = PhpSCA(code)
         vulns = analyzer.get_vulns() 
         self.assertEquals(1, len(vulns['XSS']))   
+    
+    def test_method_summary(self):
+        code = '''<?php
+        class A {
+            function foo($a) {
+                $this->bar($a);
+                $this->bar('clean');
+                $this->baz($a);
+            }
+            function bar($b) {
+                echo $b;
+            }
+            function baz($c) {
+                $this->bar($c);
+                system($c);
+            }
+        }
+        $obj = new A();
+        $obj->foo($_GET[1]);
+        $obj->baz('clean');
+        $obj->baz($_GET[2]);
+        ?>'''
+        analyzer = PhpSCA(code)
+        vulns = analyzer.get_vulns()
+        self.assertEquals(2, len(vulns['OS_COMMANDING']))
+        self.assertTrue('XSS' in vulns)
+        
+        # Every method is evaluated through its summary
+        methods = analyzer.get_objects()['$obj']._obj_def.get_methods()
+        for name in ('foo', 'bar', 'baz'):
+            self.assertTrue(methods[name]._summary is not None, name)
+    
+    def test_recursive_method(self):
+        code = '''<?php
+        class A {
+            function foo($a) {
+                echo $a;
+                $this->foo($_GET[1]);
+            }
+        }
+        $obj = new A();
+        $obj->foo('clean');
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
+    
+    def test_class_template(self):
+        code = '''<?php
+        class A {
+            private $a = 'x', $b;
+            function foo($var) {
+                $this->a = $var;
+            }
+            function bar() {
+                echo $this->a;
+            }
+        }
+        $obj1 = new A();
+        $obj2 = new A();
+        $obj1->foo($_GET[1]);
+        $obj2->foo('clean');
+        $obj1->bar();
+        $obj2->bar();
+        ?>'''
+        analyzer = PhpSCA(code)
+        vulns = analyzer.get_vulns()
+        self.assertEquals(1, len(vulns['XSS']))
+        
+        objects = analyzer.get_objects()
+        obj1, obj2 = objects['$obj1']._obj_def, objects['$obj2']._obj_def
+        # Both instances come from the same template and share its methods,
+        # only the property values are per instance
+        self.assertTrue(obj1._template is obj2._template)
+        self.assertTrue(obj1.get_method('foo') is obj2.get_method('foo'))
+        self.assertTrue(obj1._scope.get_var('$this->b') is not None)
+        self.assertEquals(None, obj1.get_method('baz'))
+    
+    def test_method_same_inputs(self):
+        code = '''<?php
+        class A {
+            function foo($a) {
+                echo $a;
+            }
+        }
+        $obj = new A();
+        $x = $_GET[1];
+        $obj->foo($x);
+        $obj->foo($x);
+        $obj->foo($_GET[2]);
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        # The second call has the same inputs as the first one, it's not
+        # evaluated again
+        self.assertEquals(2, len(vulns['XSS']))
+    
+    def test_class_hoisting(self):
+        code = '''<?php
+        $obj = new A();
+        $obj->foo($_GET[1]);
+        
+        class A {
+            function foo($a) {
+                echo $a;
+            }
+        }
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
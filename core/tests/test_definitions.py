@@ -0,0 +1,65 @@
+'''
+test_definitions.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.vulnerabilities.definitions import (get_vulnty_for,
+    get_vulnty_for_sec, get_vulntys_for, get_vulntys_for_sec, compile_rules,
+    SENSITIVE_FUNCTIONS)
+
+
+class TestDefinitions(PyMockTestCase):
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self._sensitive = dict(SENSITIVE_FUNCTIONS)
+
+    def tearDown(self):
+        SENSITIVE_FUNCTIONS.clear()
+        SENSITIVE_FUNCTIONS.update(self._sensitive)
+        compile_rules()
+
+    def test_lookups(self):
+        self.assertEquals('OS_COMMANDING', get_vulnty_for('system'))
+        self.assertEquals(('OS_COMMANDING',), get_vulntys_for('system'))
+        self.assertEquals('XSS', get_vulnty_for_sec('htmlspecialchars'))
+        self.assertEquals(None, get_vulnty_for('strlen'))
+        self.assertEquals((), get_vulntys_for('strlen'))
+        self.assertEquals((), get_vulntys_for_sec('strlen'))
+
+    def test_multiple_vulntys(self):
+        SENSITIVE_FUNCTIONS['SQL_INJECTION'] += ('echo',)
+        compile_rules()
+        self.assertEquals(set(['XSS', 'SQL_INJECTION']),
+                          set(get_vulntys_for('echo')))
+        
+        code = '''<?php
+        $a = $_GET[1];
+        echo $a;
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
+        self.assertTrue('SQL_INJECTION' in vulns)
+
+    def test_compile_rules(self):
+        SENSITIVE_FUNCTIONS['XSS'] += ('my_render',)
+        self.assertEquals(None, get_vulnty_for('my_render'))
+        compile_rules()
+        self.assertEquals('XSS', get_vulnty_for('my_render'))
@@ -0,0 +1,103 @@
+'''
+test_diff_scan.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+from core.tests.tmp_dir import TmpDirTestCase
+from core.diff_scan import diff_scan, changed_files, git
+from core.exceptions.git_error import GitError
+
+
+class TestDiffScan(TmpDirTestCase):
+
+    FILES = {
+        'index.php': "<?php\nshow($_GET['a']);\n?>",
+        'other.php': "<?php\ninclude('inc/config.php');\necho $_GET['o'];\n?>",
+        'inc/config.php': "<?php\n$title = 'SCA';\n?>",
+        'lib/view.php': "<?php\nfunction show($a) {\n"
+                        "    echo htmlspecialchars($a);\n}\n?>",
+        }
+
+    def setUp(self):
+        TmpDirTestCase.setUp(self)
+        git(self.tmp_dir, 'init', '-q')
+        # FILES are already written
+        self.base = self._commit({})
+
+    def _commit(self, files):
+        for name, code in files.iteritems():
+            self._write(name, code)
+        git(self.tmp_dir, 'add', '-A')
+        git(self.tmp_dir, '-c', 'user.name=sca',
+            '-c', 'user.email=sca@localhost', 'commit', '-q', '-m', 'change')
+        return git(self.tmp_dir, 'rev-parse', 'HEAD').strip()
+
+    def _findings(self, results):
+        return dict((r.infile, r.get_vulns()) for r in results)
+
+    def test_changed_files(self):
+        head = self._commit({'index.php': "<?php\n?>"})
+        self.assertEquals(['index.php'],
+                          changed_files(self.tmp_dir, self.base, head))
+
+    def test_only_new_findings(self):
+        # The existing XSS of other.php moves one line down, a new one is
+        # added to index.php
+        head = self._commit({
+            'index.php': "<?php\nshow($_GET['a']);\necho $_GET['b'];\n?>",
+            'other.php': "<?php\ninclude('inc/config.php');\n\n"
+                         "echo $_GET['o'];\n?>",
+            })
+        results = diff_scan(self.tmp_dir, self.base, head)
+        self.assertEquals(['index.php', 'other.php'],
+                          [r.infile for r in results])
+
+        findings = self._findings(results)
+        self.assertEquals({}, findings['other.php'])
+        traces = findings['index.php']['XSS']
+        self.assertEquals(1, len(traces))
+        self.assertEquals(('echo', 3, 'index.php'),
+                          (traces[0][0].name, traces[0][0].lineno,
+                           traces[0][0].file_name))
+
+    def test_affected_entry_points(self):
+        # index.php uses show() and other.php includes config.php
+        head = self._commit({
+            'lib/view.php': "<?php\nfunction show($a) {\n    echo $a;\n}\n?>",
+            'inc/config.php': "<?php\n$title = 'SCA 2';\n?>",
+            })
+        results = diff_scan(self.tmp_dir, self.base, head)
+        self.assertEquals(['inc/config.php', 'index.php', 'lib/view.php',
+                           'other.php'],
+                          sorted(r.infile for r in results))
+
+        findings = self._findings(results)
+        traces = findings['index.php']['XSS']
+        self.assertEquals(['lib/view.php', 'index.php'],
+                          [traces[0][0].file_name, traces[0][-1].file_name])
+        # The echo of $_GET['o'] was already there
+        self.assertEquals({}, findings['other.php'])
+
+    def test_unaffected(self):
+        head = self._commit({'lib/new.php': "<?php\necho 'new';\n?>"})
+        results = diff_scan(self.tmp_dir, self.base, head)
+        self.assertEquals(['lib/new.php'], [r.infile for r in results])
+        self.assertEquals([], diff_scan(self.tmp_dir, head, head))
+
+    def test_bad_revision(self):
+        self.assertRaises(GitError, diff_scan, self.tmp_dir, 'nope', 'HEAD')
@@ -189,4 +189,121 @@ class TestClasses(PyMockTestCase):
         echo test($_GET[1]);
         '''
         vulns = PhpSCA(code).get_vulns()
-        self.assertEquals(0, len(vulns))
\ No newline at end of file
+        self.assertEquals(0, len(vulns))
+        
+    def test_function_summary(self):
+        code = '''<?php
+        function show($a, $b) {
+          $c = htmlspecialchars($a) . $b;
+          echo $c;
+          system($a);
+        }
+        show('foo', 'bar');
+        show($_GET[1], 'bar');
+        show('foo', $_GET[2]);
+        ?>'''
+        analyzer = PhpSCA(code)
+        function = analyzer.get_function_decl()['show']
+        summary = function._summary
+        self.assertTrue(summary is not None)
+        
+        vulns = analyzer.get_vulns()
+        # system($a) with the 2nd call, echo $c with the 2nd and 3rd ones
+        self.assertEquals(1, len(vulns['OS_COMMANDING']))
+        self.assertEquals(8, vulns['OS_COMMANDING'][0][-1].lineno)
+        self.assertEquals(2, len(vulns['XSS']))
+        self.assertEquals(9, vulns['XSS'][1][-1].lineno)
+        
+    def test_function_return_summary(self):
+        # The value returned by every call depends on the params of that
+        # call, not on the ones of the last call
+        code = '''<?php
+        function id($a) {
+          return $a;
+        }
+        $x = id($_GET[1]);
+        $y = id('foo');
+        echo $x;
+        echo $y;
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertEquals(1, len(vulns['XSS']))
+        self.assertEquals(7, vulns['XSS'][0][0].lineno)
+        self.assertEquals(['$a', '$_GET__$temp_anon_var$_'],
+                          [var.name for var in vulns['XSS'][0][-2:]])
+        
+    def test_function_return_summary_sanitized(self):
+        code = '''<?php
+        function show($a, $b) {
+          $c = htmlspecialchars($a);
+          return $c . $b;
+        }
+        $x = show($_GET[1], 'foo');
+        $y = show('foo', $_GET[2]);
+        echo $x;
+        echo $y;
+        system($x);
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertEquals([9], [trace[0].lineno for trace in vulns['XSS']])
+        self.assertEquals([10], [trace[0].lineno
+                                 for trace in vulns['OS_COMMANDING']])
+        
+    def test_recursive_function_return(self):
+        code = '''<?php
+        function rec($a) {
+          if ($a) {
+            return rec($a);
+          }
+          return $a;
+        }
+        $x = rec($_GET[1]);
+        echo $x;
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
+        
+    def test_recursive_function(self):
+        code = '''<?php
+        function rec($a) {
+          echo $a;
+          rec($_GET[1]);
+        }
+        rec('foo');
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
+    
+    def test_function_hoisting(self):
+        code = '''<?php
+        echo a($_GET[1]);
+        b($_GET[2]);
+        
+        function a($a) {
+          return $a;
+        }
+        function b($b) {
+          system($b);
+        }
+        ?>'''
+        analyzer = PhpSCA(code)
+        vulns = analyzer.get_vulns()
+        self.assertTrue('XSS' in vulns)
+        self.assertTrue('OS_COMMANDING' in vulns)
+        # The declarations are traveled once
+        self.assertEquals(1, len([f for f in analyzer.get_func_calls()
+                                  if f.name == 'system']))
+        
+    def test_function_mutual_recursion(self):
+        code = '''<?php
+        function a($a) {
+          b($a);
+          echo $a;
+        }
+        function b($b) {
+          a($b);
+        }
+        a($_GET[1]);
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertTrue('XSS' in vulns)
@@ -22,6 +22,7 @@ import os
 from pymock import PyMockTestCase
 from core.sca_core import PhpSCA
 from core.scope import Scope
+from core.state import State
 
 class TestScope(PyMockTestCase):
     
@@ -62,4 +63,39 @@ class TestScope(PyMockTestCase):
         vulns = analyzer.get_vulns()
         self.assertEquals('core' + os.sep + 'tests' + os.sep + 'test_include_require' + os.sep + '2' + os.sep + 'a.php', vulns['XSS'][0][-1].get_file_name())
         self.assertEquals(2, vulns['XSS'][0][-1].lineno)
-        
\ No newline at end of file
+            
+    def test_include_require_parsed_once(self):
+        
+        parsed = []
+        parse_code = State.parse_code
+        def counting_parse_code(state, code):
+            parsed.append(code)
+            return parse_code(state, code)
+        
+        State.parse_code = counting_parse_code
+        try:
+            analyzer = PhpSCA(infile = os.path.join(self.TEST_DIR, '3', 'a.php'))
+        finally:
+            State.parse_code = parse_code
+        
+        # a.php and b.php, missing.php is in the negative cache
+        self.assertEquals(2, len(parsed))
+        
+        # Every include is analyzed in its own context
+        echo_1, echo_2 = [f for f in analyzer.get_func_calls() if f.name == 'echo']
+        self.assertEquals([], echo_1.vulntypes)
+        self.assertTrue('XSS' in echo_2.vulntypes)
+        self.assertEquals(2, echo_2.lineno)
+    
+    def test_include_require_hoisting(self):
+        # show() is called by b.php before its declaration
+        analyzer = PhpSCA(infile = os.path.join(self.TEST_DIR, '4', 'a.php'))
+        
+        symbols = analyzer.state.symbols
+        b_file = os.path.join(self.TEST_DIR, '4', 'b.php')
+        self.assertEquals(b_file, symbols.get_function('show').file_name)
+        
+        vulns = analyzer.get_vulns()
+        self.assertEquals(2, len(vulns['XSS']))
+        self.assertEquals([b_file, os.path.join(self.TEST_DIR, '4', 'a.php')],
+                          [t[-1].get_file_name() for t in vulns['XSS']])
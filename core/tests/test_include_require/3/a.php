@@ -0,0 +1,7 @@
+<?php
+include('b.php');
+$var = $_GET[1];
+include('b.php');
+include('missing.php');
+include('missing.php');
+?>
@@ -0,0 +1,3 @@
+<?php
+echo $var;
+?>
@@ -0,0 +1,4 @@
+<?php
+include('b.php');
+show($_GET[1]);
+?>
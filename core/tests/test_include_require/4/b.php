@@ -0,0 +1,7 @@
+<?php
+show($_GET[2]);
+
+function show($a) {
+    echo $a;
+}
+?>
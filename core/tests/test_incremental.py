@@ -0,0 +1,110 @@
+'''
+test_incremental.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import stat
+
+from core.tests.tmp_dir import TmpDirTestCase
+from core.sca_core import PhpSCA
+from core.project import Project
+from core.batch import BatchOptions
+from core.incremental import (Manifest, analyze_incremental,
+                              options_fingerprint, file_digest)
+
+
+class TestIncremental(TmpDirTestCase):
+
+    FILES = {
+        'a.php': "<?php\ninclude('b.php');\necho $foo;\n?>",
+        'b.php': "<?php\n$foo = $_GET['foo'];\n?>",
+        'c.php': "<?php\nshow($_GET['c']);\n?>",
+        'lib.php': "<?php\nfunction show($a) {\n    echo $a;\n}\n?>",
+        }
+
+    def setUp(self):
+        TmpDirTestCase.setUp(self)
+        self.manifest_path = self._path('manifest')
+
+    def _run(self, names, project=None):
+        options = BatchOptions()
+        manifest = Manifest(self.manifest_path,
+                            options_fingerprint(options, project))
+        input_files = [self._path(name) for name in names]
+        results = list(analyze_incremental(input_files, manifest,
+                                           options=options, project=project))
+        manifest.save()
+        self.assertEquals(input_files, [r.infile for r in results])
+        return manifest, results
+
+    def test_dependencies(self):
+        state = PhpSCA(infile=self._path('a.php')).state
+        a_file, b_file = self._path('a.php'), self._path('b.php')
+        self.assertEquals({a_file: file_digest(a_file),
+                           b_file: file_digest(b_file)},
+                          state.dependencies)
+
+    def test_missing_include(self):
+        os.remove(self._path('b.php'))
+        state = PhpSCA(infile=self._path('a.php')).state
+        self.assertEquals(None, state.dependencies[self._path('b.php')])
+
+    def test_reuse(self):
+        manifest, results = self._run(['a.php', 'c.php'])
+        self.assertEquals(0, manifest.reused)
+        self.assertEquals(2, len(manifest))
+        self.assertEquals(0644,
+                          stat.S_IMODE(os.stat(self.manifest_path).st_mode))
+        self.assertTrue('XSS' in results[0].get_vulns())
+
+        manifest, cached = self._run(['a.php', 'c.php'])
+        self.assertEquals(2, manifest.reused)
+        self.assertEquals(results[0].get_vulns(), cached[0].get_vulns())
+
+    def test_changed_include(self):
+        self._run(['a.php', 'c.php'])
+
+        self._write('b.php', "<?php\n$foo = 'bar';\n?>")
+        manifest, results = self._run(['a.php', 'c.php'])
+        # Only a.php includes b.php
+        self.assertEquals(1, manifest.reused)
+        self.assertEquals({}, results[0].get_vulns())
+
+    def test_project_dependencies(self):
+        project = Project(self.tmp_dir)
+        manifest, results = self._run(['c.php'], project)
+        self.assertTrue('XSS' in results[0].get_vulns())
+        self.assertTrue(self._path('lib.php') in results[0].dependencies)
+
+        self._write('lib.php', "<?php\nfunction show($a) {\n}\n?>")
+        manifest, results = self._run(['c.php'], Project(self.tmp_dir))
+        self.assertEquals(0, manifest.reused)
+        self.assertEquals({}, results[0].get_vulns())
+
+    def test_fingerprint(self):
+        self._run(['c.php'])
+        manifest = Manifest(self.manifest_path, 'other')
+        self.assertEquals(0, len(manifest))
+        self.assertNotEqual(options_fingerprint(BatchOptions()),
+                            options_fingerprint(BatchOptions(prefilter=True)))
+
+    def test_broken_manifest(self):
+        self._write('manifest', 'garbage')
+        manifest, _ = self._run(['c.php'])
+        self.assertEquals(0, manifest.reused)
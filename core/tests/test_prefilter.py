@@ -0,0 +1,92 @@
+'''
+test_prefilter.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+
+from pymock import PyMockTestCase
+from core.prefilter import Prefilter
+from core.project import Project
+from core.batch import analyze_file, BatchOptions
+from core.vulnerabilities.definitions import load_rule_packs
+
+
+class TestPrefilter(PyMockTestCase):
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.prefilter = Prefilter()
+
+    def test_source_and_sink(self):
+        self.assertTrue(self.prefilter.may_have_findings(
+                                    "<?php $a = $_GET['a']; echo $a; ?>"))
+        self.assertTrue(self.prefilter.may_have_findings(
+                                    "<?php SYSTEM($_POST['cmd']); ?>"))
+        # Source only, sink only, none
+        self.assertFalse(self.prefilter.may_have_findings(
+                                    "<?php $a = $_GET['a']; ?>"))
+        self.assertFalse(self.prefilter.may_have_findings(
+                                    "<?php echo 'Hello'; ?>"))
+        self.assertFalse(self.prefilter.may_have_findings(
+                                    "<html><?php $a = 1; ?></html>"))
+        # Not the $_GET variable nor the echo function
+        self.assertFalse(self.prefilter.may_have_findings(
+                                    "<?php $_GETS = 1; echoes($a); ?>"))
+
+    def test_echo_tag(self):
+        self.assertTrue(self.prefilter.may_have_findings(
+                                    "<?= $_GET['a'] ?>"))
+        self.assertTrue(self.prefilter.may_have_findings(
+                                    "<?php $a = $_GET['a']; ?><?= $a ?>"))
+        self.assertFalse(self.prefilter.may_have_findings("<?= 'a' ?>"))
+
+    def test_include(self):
+        self.assertTrue(self.prefilter.may_have_findings(
+                                    "<?php require_once 'lib.php'; ?>"))
+
+    def test_rule_packs(self):
+        code = "<?php passthru($_GET['cmd']); ?>"
+        self.assertFalse(self.prefilter.may_have_findings(code))
+        load_rule_packs([os.path.join('core', 'vulnerabilities', 'rules',
+                                      'php.pack')])
+        try:
+            self.assertTrue(self.prefilter.may_have_findings(code))
+        finally:
+            load_rule_packs([])
+
+    def test_project_symbols(self):
+        project = Project(os.path.join('core', 'tests', 'test_project'),
+                          exclude=['vendor/*'])
+        prefilter = Prefilter(project)
+        self.assertTrue(prefilter.may_have_findings("<?php show(1); ?>"))
+        self.assertFalse(prefilter.may_have_findings("<?php other(1); ?>"))
+
+    def test_batch(self):
+        options = BatchOptions(prefilter=True)
+        infile = os.path.join('core', 'tests', 'test_project', 'other.php')
+        result = analyze_file(infile, options)
+        self.assertTrue(result.skipped)
+        self.assertEquals([os.path.normpath(infile)],
+                          result.dependencies.keys())
+
+        infile = os.path.join('core', 'tests', 'test_include_require',
+                              '1', 'a.php')
+        result = analyze_file(infile, options)
+        self.assertFalse(result.skipped)
+        self.assertTrue('XSS' in result.get_vulns())
@@ -0,0 +1,109 @@
+'''
+test_profiler.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import shutil
+import pstats
+import tempfile
+
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.profiler import Profiler, NO_VISITOR
+from core.batch import analyze_file, BatchOptions
+
+
+class TestProfiler(PyMockTestCase):
+
+    CODE = '''<?php
+        function f($a) {
+            echo $a;
+        }
+        $foo = $_GET['bar'];
+        f($foo);
+        ?>'''
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.profiler = Profiler()
+        self.analyzer = PhpSCA(self.CODE, stats=self.profiler)
+        self.analyzer.get_vulns()
+
+    def test_visitors(self):
+        visitors = self.profiler.visitors.rows
+        self.assertEquals(1, visitors['AssignmentVisitor'][0])
+        self.assertEquals(1, visitors['VulnerableFuncVisitor'][0])
+        self.assertTrue(visitors[NO_VISITOR][0] > 0)
+        self.assertTrue('(parse)' in visitors)
+        self.assertTrue('(taint)' in visitors)
+        for calls, total, self_time in visitors.itervalues():
+            self.assertTrue(self_time <= total + 1e-6)
+
+    def test_node_types(self):
+        node_types = self.profiler.node_types.rows
+        self.assertEquals(1, node_types['Function'][0])
+        self.assertEquals(1, node_types['Assignment'][0])
+        self.assertEquals(self.profiler.counters['nodes'],
+                          sum(row[0] for row in node_types.itervalues()))
+
+    def test_vulns_unchanged(self):
+        self.assertEquals(PhpSCA(self.CODE).get_vulns().keys(),
+                          self.analyzer.get_vulns().keys())
+
+    def test_report(self):
+        report = self.profiler.report(sort='calls', limit=2)
+        lines = report.splitlines()
+        self.assertTrue(lines[0].startswith('Visitor'))
+        self.assertEquals(2, lines.index('') - 1)
+        self.assertTrue('Node type' in report)
+        self.assertRaises(ValueError, self.profiler.report, 'foo')
+
+    def test_merge(self):
+        total = Profiler()
+        total.merge(self.profiler)
+        total.merge(self.profiler.to_dict())
+        self.assertEquals(2 * self.profiler.node_types.rows['Function'][0],
+                          total.node_types.rows['Function'][0])
+        self.assertEquals(2 * self.profiler.counters['nodes'],
+                          total.counters['nodes'])
+
+
+class TestBatchProfile(PyMockTestCase):
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.profile_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.profile_dir)
+
+    def test_profile_dump(self):
+        infile = os.path.join('core', 'tests', 'test_include_require',
+                              '1', 'a.php')
+        options = BatchOptions(profile=True,
+                               profile_dir=os.path.join(self.profile_dir,
+                                                        'p'))
+        result = analyze_file(infile, options)
+        self.assertTrue('AssignmentVisitor' in result.stats['visitors'])
+
+        dumps = os.listdir(options.profile_dir)
+        self.assertEquals(1, len(dumps))
+        self.assertTrue(dumps[0].endswith('a.php.pstats'))
+        stats = pstats.Stats(os.path.join(options.profile_dir, dumps[0]))
+        self.assertTrue(stats.total_calls > 0)
@@ -0,0 +1,114 @@
+'''
+test_project.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import cPickle
+
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.project import Project
+from core.symbol_index import SymbolIndex
+from core.batch import analyze_files
+
+
+class TestProject(PyMockTestCase):
+
+    TEST_DIR = os.path.join('core', 'tests', 'test_project')
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.project = Project(self.TEST_DIR, exclude=['vendor/*'])
+
+    def _path(self, *names):
+        return os.path.join(self.TEST_DIR, *names)
+
+    def test_index(self):
+        self.assertEquals([self._path('index.php'), self._path('other.php'),
+                           self._path('lib', 'classes.php'),
+                           self._path('lib', 'functions.php')],
+                          self.project.files)
+        self.assertEquals({}, self.project.errors)
+
+        symbol = self.project.get_symbol(SymbolIndex.FUNCTION, 'show')
+        self.assertEquals(self._path('lib', 'functions.php'), symbol.file_name)
+        self.assertEquals(4, symbol.lineno)
+        # Only the position is kept
+        self.assertEquals(None, symbol.node)
+
+    def test_errors(self):
+        project = Project(self.TEST_DIR)
+        self.assertEquals([self._path('vendor', 'broken.php')],
+                          project.errors.keys())
+        self.assertFalse(self._path('vendor', 'broken.php') in project)
+        self.assertTrue(self._path('lib', 'functions.php') in project)
+
+    def test_dependents(self):
+        self.assertEquals([self._path('index.php'),
+                           self._path('lib', 'functions.php'),
+                           self._path('other.php')],
+                          self.project.get_dependents(['lib/functions.php']))
+        self.assertEquals([self._path('index.php')],
+                          self.project.get_dependents(['deleted.php'],
+                                                      ['Greeter']))
+
+    def test_shared_declarations(self):
+        analyzer = PhpSCA(infile=self._path('index.php'), project=self.project)
+        vulns = analyzer.get_vulns()
+        self.assertEquals(2, len(vulns['XSS']))
+        self.assertEquals([self._path('lib', 'classes.php'),
+                           self._path('lib', 'functions.php')],
+                          [t[0].get_file_name() for t in vulns['XSS']])
+        # The top level code of the library files isn't traveled
+        self.assertEquals(['echo', 'echo'], [t[0].name for t in vulns['XSS']])
+        self.assertEquals([4, 5], [t[0].lineno for t in vulns['XSS']])
+
+        analyzer = PhpSCA(infile=self._path('other.php'), project=self.project)
+        self.assertEquals({}, analyzer.get_vulns())
+
+        # Without project the declarations are unknown
+        code = "<?php show($_GET['a']); ?>"
+        self.assertEquals({}, PhpSCA(code).get_vulns())
+        vulns = PhpSCA(code, project=self.project).get_vulns()
+        self.assertEquals(1, len(vulns['XSS']))
+
+    def test_parsed_once(self):
+        for _ in range(2):
+            PhpSCA(infile=self._path('index.php'), project=self.project)
+        self.assertEquals(sorted([self._path('lib', 'classes.php'),
+                                  self._path('lib', 'functions.php')]),
+                          sorted(self.project._asts))
+
+    def test_picklable(self):
+        PhpSCA(infile=self._path('index.php'), project=self.project)
+        project = cPickle.loads(cPickle.dumps(self.project))
+        self.assertEquals({}, project._asts)
+        self.assertEquals(len(self.project.symbols), len(project.symbols))
+
+        analyzer = PhpSCA(infile=self._path('index.php'), project=project)
+        self.assertEquals(2, len(analyzer.get_vulns()['XSS']))
+
+    def test_batch(self):
+        files = self.project.files
+        serial = list(analyze_files(files, jobs=1, project=self.project))
+        parallel = list(analyze_files(files, jobs=2, project=self.project))
+
+        self.assertEquals(2, len(serial[0].get_vulns()['XSS']))
+        for sres, pres in zip(serial, parallel):
+            self.assertEquals(sres.get_vulns(), pres.get_vulns())
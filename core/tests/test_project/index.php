@@ -0,0 +1,5 @@
+<?php
+$greeter = new Greeter();
+$greeter->greet($_POST['name']);
+show($_GET['a']);
+?>
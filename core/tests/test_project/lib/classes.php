@@ -0,0 +1,7 @@
+<?php
+class Greeter {
+    function greet($name) {
+        echo 'Hello ' . $name;
+    }
+}
+?>
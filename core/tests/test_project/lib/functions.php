@@ -0,0 +1,7 @@
+<?php
+echo $_GET['lib'];
+
+function show($a) {
+    echo $a;
+}
+?>
@@ -0,0 +1,3 @@
+<?php
+show(htmlspecialchars($_GET['a']));
+?>
@@ -0,0 +1,97 @@
+'''
+test_result_cache.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+from core.tests.tmp_dir import TmpDirTestCase
+from core.batch import analyze_file, BatchOptions, _get_result_cache
+from core.cache.result_cache import ResultCache
+from core.vulnerabilities import definitions
+
+
+class TestResultCache(TmpDirTestCase):
+
+    FILES = {
+        'a.php': "<?php\ninclude('b.php');\necho $foo;\n?>",
+        'b.php': "<?php\n$foo = $_GET['foo'];\n?>",
+        }
+
+    def setUp(self):
+        TmpDirTestCase.setUp(self)
+        self.cache_dir = self._path('cache')
+        self.options = BatchOptions(self.cache_dir, cache_results=True)
+
+    def _analyze(self):
+        return analyze_file(self._path('a.php'), self.options)
+
+    def test_hit(self):
+        result = self._analyze()
+        cache = _get_result_cache(self.options)
+        hits, misses = cache.hits, cache.misses
+
+        cached = self._analyze()
+        self.assertEquals(hits + 1, cache.hits)
+        self.assertEquals(misses, cache.misses)
+        self.assertEquals(result.get_vulns(), cached.get_vulns())
+        self.assertEquals(result.dependencies, cached.dependencies)
+
+    def test_changed_include(self):
+        self.assertTrue('XSS' in self._analyze().get_vulns())
+
+        self._write('b.php', "<?php\n$foo = 'foo';\n?>")
+        self.assertEquals({}, self._analyze().get_vulns())
+
+        # Back to the original content, the first result is still there
+        cache = _get_result_cache(self.options)
+        hits = cache.hits
+        self._write('b.php', self.FILES['b.php'])
+        self.assertTrue('XSS' in self._analyze().get_vulns())
+        self.assertEquals(hits + 1, cache.hits)
+
+    def test_rules_change(self):
+        self.assertTrue('XSS' in self._analyze().get_vulns())
+
+        xss_functions = definitions.SENSITIVE_FUNCTIONS['XSS']
+        definitions.SENSITIVE_FUNCTIONS['XSS'] = ('print',)
+        try:
+            definitions.compile_rules()
+            self.assertEquals({}, self._analyze().get_vulns())
+        finally:
+            definitions.SENSITIVE_FUNCTIONS['XSS'] = xss_functions
+            definitions.compile_rules()
+
+    def test_prefilter_change(self):
+        self._analyze()
+        cache = _get_result_cache(self.options)
+        misses = cache.misses
+
+        self.options.prefilter = True
+        self._analyze()
+        self.assertEquals(misses + 1, cache.misses)
+
+    def test_errors_not_cached(self):
+        options = BatchOptions(self.cache_dir, cache_results=True)
+        result = analyze_file(self._path('missing.php'), options)
+        self.assertTrue(result.error)
+        self.assertEquals(0, len(list(_get_result_cache(options)._entries())))
+
+    def test_eviction(self):
+        cache = ResultCache(self.cache_dir, max_size=1)
+        cache.set(self._analyze())
+        self.assertEquals(None, cache.get(self._path('a.php')))
+        self.assertEquals(0, len(list(cache._entries())))
@@ -0,0 +1,176 @@
+'''
+test_rule_pack.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import json
+import stat
+import shutil
+import tempfile
+
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.exceptions.rule_pack_error import RulePackError
+from core.vulnerabilities import definitions, rule_pack
+from core.vulnerabilities.rule_pack import (load_rule_pack,
+    compile_rule_pack, get_compiled_path)
+from core.vulnerabilities.definitions import (load_rule_packs,
+    get_vulnty_for, get_vulntys_for, get_vulnty_for_sec,
+    get_vulntys_for_method, get_vulntys_for_method_sec, ANY_CLASS)
+
+
+class TestRulePack(PyMockTestCase):
+
+    PACK = {'name': 'test',
+            'sensitive': {'XSS': ['render_page'],
+                          'OS_COMMANDING': ['render_page', 'run']},
+            'validation': {'XSS': ['clean_html']}}
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pack_path = os.path.join(self.tmp_dir, 'test.pack')
+        self._write_pack(self.PACK)
+        # The compiled packs go to the user cache dir
+        self.xdg_cache_home = os.environ.get('XDG_CACHE_HOME')
+        os.environ['XDG_CACHE_HOME'] = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        load_rule_packs([])
+        if self.xdg_cache_home is None:
+            del os.environ['XDG_CACHE_HOME']
+        else:
+            os.environ['XDG_CACHE_HOME'] = self.xdg_cache_home
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_pack(self, data):
+        with open(self.pack_path, 'w') as f:
+            json.dump(data, f)
+
+    def test_load(self):
+        pack = load_rule_pack(self.pack_path)
+        self.assertEquals('test', pack.name)
+        self.assertEquals(('clean_html',), tuple(pack.validation))
+        self.assertEquals(set(['XSS', 'OS_COMMANDING']),
+                          set(pack.sensitive['render_page']))
+
+    def test_compiled_pack_reused(self):
+        load_rule_pack(self.pack_path)
+        compiled_path = get_compiled_path(self.pack_path)
+        self.assertTrue(compiled_path.startswith(
+                            os.path.join(self.tmp_dir, 'cache', 'sca')))
+        self.assertEquals(0644, stat.S_IMODE(os.stat(compiled_path).st_mode))
+        
+        compile_rule_pack = rule_pack.compile_rule_pack
+        def fail(pack_path):
+            self.fail('The compiled pack must be used')
+        rule_pack.compile_rule_pack = fail
+        try:
+            self.assertEquals('test', load_rule_pack(self.pack_path).name)
+        finally:
+            rule_pack.compile_rule_pack = compile_rule_pack
+
+    def test_cache_dir(self):
+        cache_dir = os.path.join(self.tmp_dir, 'c')
+        load_rule_packs([self.pack_path], cache_dir)
+        self.assertTrue(os.path.exists(get_compiled_path(self.pack_path,
+                                                         cache_dir)))
+        self.assertFalse(os.path.exists(get_compiled_path(self.pack_path)))
+
+    def test_changed_pack_recompiled(self):
+        load_rule_pack(self.pack_path)
+        self._write_pack({'name': 'changed', 'sensitive': {'XSS': ['a', 'b']}})
+        self.assertEquals('changed', load_rule_pack(self.pack_path).name)
+
+    def test_invalid_pack(self):
+        with open(self.pack_path, 'w') as f:
+            f.write('{"sensitive": ')
+        self.assertRaises(RulePackError, load_rule_pack, self.pack_path)
+        self._write_pack({'sensitive': {'XSS': 'echo'}})
+        self.assertRaises(RulePackError, load_rule_pack, self.pack_path)
+        self.assertRaises(RulePackError, load_rule_pack,
+                          os.path.join(self.tmp_dir, 'missing.pack'))
+
+    def test_rules_applied(self):
+        load_rule_packs([self.pack_path])
+        self.assertEquals('XSS', get_vulnty_for('echo'))
+        self.assertEquals(set(['XSS', 'OS_COMMANDING']),
+                          set(get_vulntys_for('render_page')))
+        self.assertEquals('XSS', get_vulnty_for_sec('clean_html'))
+        
+        code = '''<?php
+        $a = $_GET[1];
+        run($a);
+        echo clean_html($a);
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()
+        self.assertEquals(['OS_COMMANDING'], vulns.keys())
+        
+        load_rule_packs([])
+        self.assertEquals(None, get_vulnty_for('run'))
+
+    def test_method_rules(self):
+        self._write_pack({'sensitive': {'SQL_INJECTION': ['PDO::query',
+                                                          'wpdb::query',
+                                                          '*::whereRaw']},
+                          'validation': {'SQL_INJECTION': ['PDO::quote']}})
+        load_rule_packs([self.pack_path])
+        self.assertEquals(('SQL_INJECTION',),
+                          get_vulntys_for_method('pdo', 'Query'))
+        self.assertEquals(('SQL_INJECTION',),
+                          get_vulntys_for_method(ANY_CLASS, 'whereraw'))
+        self.assertEquals((), get_vulntys_for_method(ANY_CLASS, 'query'))
+        self.assertEquals(('SQL_INJECTION',),
+                          get_vulntys_for_method_sec('PDO', 'quote'))
+        self.assertEquals(None, get_vulnty_for('query'))
+        
+        code = '''<?php
+        $db = new PDO('sqlite::memory:');
+        $db->query('SELECT 1');
+        $db->query($_GET[1]);
+        $wpdb->query($_GET[1]);
+        $other = new Other();
+        $other->query($_GET[1]);
+        DB::table('users')->whereRaw('id = ' . $_GET[1])->get();
+        $id = $db->quote($_GET[1]);
+        $db->query('SELECT ' . $id);
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()['SQL_INJECTION']
+        self.assertEquals([4, 5, 8], [trace[0].lineno for trace in vulns])
+        self.assertEquals(['query', 'query', 'whereRaw'],
+                          [trace[0].name for trace in vulns])
+
+    def test_shipped_packs(self):
+        rules_dir = os.path.join(os.path.dirname(definitions.__file__),
+                                 'rules')
+        pack_paths = [os.path.join(rules_dir, name) for name in
+                      ('php.pack', 'wordpress.pack', 'laravel.pack')]
+        packs = [compile_rule_pack(path) for path in pack_paths]
+        self.assertEquals(['php', 'wordpress', 'laravel'],
+                          [pack.name for pack in packs])
+        
+        load_rule_packs(pack_paths)
+        code = '''<?php
+        $sql = $wpdb->prepare('SELECT %d', $_GET[1]);
+        $wpdb->get_results($sql);
+        $wpdb->get_results('SELECT ' . $_GET[1]);
+        DB::select('SELECT ' . $_GET[1]);
+        ?>'''
+        vulns = PhpSCA(code).get_vulns()['SQL_INJECTION']
+        self.assertEquals([4, 5], [trace[0].lineno for trace in vulns])
@@ -0,0 +1,73 @@
+'''
+test_samate_runner.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+
+from pymock import PyMockTestCase
+from benchmarks.samate import (read_manifest, run_corpus, accuracy,
+                               percentile, regressions)
+
+
+class TestSamateRunner(PyMockTestCase):
+
+    MANIFEST = os.path.join('core', 'tests', 'samate', 'manifest.xml')
+
+    def test_read_manifest(self):
+        manifest = read_manifest(self.MANIFEST)
+        self.assertEquals([('XSS', 19), ('XSS', 21)],
+                          manifest['000/001/938/xss_lod1.phps'])
+        self.assertEquals([], manifest['000/001/940/bdd.sql'])
+        # CWE-326 has no vuln. type
+        self.assertEquals([(None, 11)], manifest['000/001/943/hash_lod0.phps'])
+
+    def test_accuracy(self):
+        expected = set([('a.php', 'XSS', 1), ('a.php', 'XSS', 2),
+                        ('b.php', 'SQL_INJECTION', 3)])
+        found = set([('a.php', 'XSS', 1), ('a.php', 'XSS', 5)])
+        res = accuracy(expected, found)
+        self.assertEquals((1, 1, 2), (res['true_positives'],
+                                      res['false_positives'],
+                                      res['false_negatives']))
+        self.assertEquals(0.5, res['precision'])
+        self.assertAlmostEquals(1 / 3.0, res['recall'])
+        self.assertEquals(None, res['by_type']['SQL_INJECTION']['precision'])
+        self.assertEquals(0.5, res['by_type']['XSS']['recall'])
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEquals(50, percentile(values, 50))
+        self.assertEquals(99, percentile(values, 99))
+        self.assertEquals(7, percentile([7], 90))
+        self.assertEquals(None, percentile([], 50))
+
+    def test_run_corpus(self):
+        report = run_corpus(self.MANIFEST, jobs=2)
+        self.assertEquals(25, report['files'])
+        self.assertEquals(5, report['unsupported_flaws'])
+        self.assertTrue(report['files_per_second'] > 0)
+        self.assertTrue(report['latency']['p50'] <= report['latency']['p99'])
+        self.assertTrue(report['peak_rss_kb'] > 0)
+        self.assertEquals(1.0, report['accuracy']['by_type']
+                                     ['FILE_INCLUDE']['recall'])
+        
+        self.assertEquals([], regressions(report, report))
+        better = {'accuracy': {'precision': 1.0, 'recall': 1.0}}
+        self.assertEquals(['precision', 'recall'],
+                          [name for name, _, _ in regressions(report, better)])
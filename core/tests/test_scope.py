@@ -73,4 +73,24 @@ class TestScope(PyMockTestCase):
         self.assertFalse('XSS' in echo_outside_func.vulntypes)
         self.assertTrue('XSS' in echo_in_func.vulntypes)
         
-    
\ No newline at end of file
+        
+    def test_scope_after_object_creation(self):
+        # Creating an object must not make the following statements lose
+        # the scope they live in
+        code = '''
+        <?
+          class A {
+            function bar() { }
+          }
+          function foo($a) {
+            $o = new A();
+            echo $a;
+          }
+          foo($_GET[1]);
+        ?>
+        '''
+        analyzer = PhpSCA(code)
+        echo_in_func = analyzer.get_func_calls()[0]
+        
+        self.assertTrue('XSS' in echo_in_func.vulntypes)
+        self.assertTrue(echo_in_func._scope.get_var('$o'))
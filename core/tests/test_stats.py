@@ -0,0 +1,100 @@
+'''
+test_stats.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import json
+
+from pymock import PyMockTestCase
+from core.sca_core import PhpSCA
+from core.batch import analyze_file, BatchOptions
+from core import stats as sca_stats
+from core.stats import Stats
+
+
+class TestStats(PyMockTestCase):
+
+    CODE = '''<?php
+        function show($a) {
+            echo $a;
+        }
+        $foo = $_GET['bar'];
+        show($foo);
+        ?>'''
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+
+    def test_nested_phases(self):
+        stats = Stats()
+        ticks = iter([0, 1, 3, 4])
+        stats._now = lambda: (float(next(ticks)),) * 2
+
+        stats.start(sca_stats.TRAVERSAL)
+        with stats.timer(sca_stats.TAINT):
+            pass
+        stats.stop()
+
+        # The inner phase isn't charged to the outer one
+        times = stats.to_dict()
+        self.assertEquals(2, times['wall'][sca_stats.TRAVERSAL])
+        self.assertEquals(2, times['cpu'][sca_stats.TAINT])
+        self.assertEquals([], stats._running)
+
+    def test_analyzer_stats(self):
+        stats = Stats()
+        analyzer = PhpSCA(self.CODE, stats=stats)
+        self.assertEquals(1, len(analyzer.get_vulns()['XSS']))
+        self.assertTrue(analyzer.get_stats() is stats)
+        # Inactive once the analysis is done
+        self.assertEquals(None, sca_stats._active)
+
+        counters = stats.to_dict()['counters']
+        self.assertEquals(1, counters['traces'])
+        self.assertEquals(1, counters['function_calls'])
+        self.assertEquals(2, counters['scopes'])
+        self.assertTrue(counters['nodes'] > 0)
+        self.assertTrue(counters['variables'] > 0)
+
+        wall = stats.to_dict()['wall']
+        self.assertEquals(set(sca_stats.PHASES), set(wall))
+        for phase in (sca_stats.LEX, sca_stats.PARSE, sca_stats.TRAVERSAL,
+                      sca_stats.TAINT, sca_stats.REPORT):
+            self.assertTrue(wall[phase] > 0, phase)
+
+    def test_no_stats(self):
+        analyzer = PhpSCA(self.CODE)
+        self.assertEquals(None, analyzer.get_stats())
+        self.assertEquals(1, len(analyzer.get_vulns()['XSS']))
+
+    def test_batch(self):
+        infile = os.path.join('core', 'tests', 'test_include_require',
+                              '1', 'a.php')
+        result = analyze_file(infile, BatchOptions(stats=True))
+        # JSON serializable
+        stats = json.loads(json.dumps(result.stats))
+        self.assertEquals(2, stats['counters']['files'])
+        self.assertTrue(stats['wall'][sca_stats.READ] > 0)
+
+        self.assertEquals(None, analyze_file(infile).stats)
+
+        total = Stats()
+        total.merge(stats)
+        total.merge(stats)
+        self.assertEquals(4, total.counters['files'])
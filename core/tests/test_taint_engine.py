@@ -0,0 +1,120 @@
+'''
+test_taint_engine.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import phply.phpast as phpast
+
+from pymock import PyMockTestCase
+from core import taint_engine
+from core.scope import Scope
+from core.sca_core import PhpSCA
+from core.nodes.variable_def import VariableDef
+
+
+class TestTaintEngine(PyMockTestCase):
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.scope = Scope(None, is_root=True)
+
+    def _var(self, name, *parents):
+        var = VariableDef(name, 1, self.scope)
+        if name not in VariableDef.USER_VARS:
+            var.is_root = not parents
+            var.parents = list(parents)
+        return var
+
+    def test_sanitizer(self):
+        source = self._var('$_GET')
+        clean = self._var('$clean', source)
+        clean._safe_for.append('XSS')
+        child = self._var('$child', clean)
+        self.assertTrue(child.controlled_by_user)
+        self.assertFalse(child.is_tainted_for('XSS'))
+        self.assertTrue(child.is_tainted_for('SQL_INJECTION'))
+
+    def test_cycle(self):
+        source = self._var('$_GET')
+        a = self._var('$a')
+        b = self._var('$b', a)
+        a.is_root = False
+        a.parents = [b, source]
+        # The value of $b is only known once $a's other parent is solved
+        self.assertTrue(a.controlled_by_user)
+        self.assertTrue(b.controlled_by_user)
+        self.assertTrue(b.is_tainted_for('XSS'))
+
+    def test_lookup_after_solve(self):
+        source = self._var('$_GET')
+        a = self._var('$a', source)
+        b = self._var('$b', a)
+        self.assertTrue(b.controlled_by_user)
+        # All the ancestors were solved along with $b
+        self.assertEquals((True, frozenset()), a._taint)
+        self.assertTrue(b._taint is taint_engine.get_taint(b))
+
+    def test_invalidate_descendants(self):
+        source = self._var('$_GET')
+        const = self._var('$const')
+        param = self._var('$param', source)
+        body = self._var('$body', param)
+        other = self._var('$other', source)
+        self.assertTrue(body.controlled_by_user)
+        self.assertTrue(other.controlled_by_user)
+        
+        # Relinked to another call
+        param.parents = [const]
+        self.assertEquals(None, body._taint)
+        self.assertTrue(other._taint is not None)
+        self.assertFalse(body.controlled_by_user)
+        self.assertTrue(other.controlled_by_user)
+
+    def test_invalidate_unresolved(self):
+        # $a = $a; $a is only found once it's defined again
+        var = VariableDef('$a', 1, self.scope, ast_node=phpast.Variable('$a'))
+        self.scope.add_var(var)
+        var.is_root = False
+        child = self._var('$child', var)
+        self.assertFalse(child.controlled_by_user)
+        solved = child._taint
+        
+        self.scope.add_var(self._var('$other', self._var('$_GET')))
+        self.assertTrue(taint_engine.get_taint(child) is solved)
+        
+        source = VariableDef('$a', 2, self.scope)
+        source.is_root = False
+        source.parents = [self._var('$_GET')]
+        self.scope.add_var(source)
+        self.assertEquals(None, child._taint)
+        self.assertTrue(child.controlled_by_user)
+
+    def test_long_chain(self):
+        var = self._var('$_GET')
+        for i in xrange(5000):
+            var = self._var('$v%d' % i, var)
+        self.assertTrue(var.controlled_by_user)
+
+    def test_sanitized_sinks(self):
+        code = ['<?php', "$v0 = $_GET['a'];"]
+        for i in xrange(1, 200):
+            code.append("$v%d = $v%d . 'x';" % (i, i - 1))
+            code.append('echo htmlspecialchars($v%d);' % i)
+        code.append('system($v199);')
+        vulns = PhpSCA('\n'.join(code) + '?>').get_vulns()
+        self.assertEquals(['OS_COMMANDING'], vulns.keys())
@@ -204,3 +204,19 @@ class TestTaintPropagation(PyMockTestCase):
         ?>'''
         vulns = PhpSCA(code).get_vulns()
         self.assertTrue('XSS' not in vulns)            
+
+    def test_diamond_dependencies(self):
+        # Every var depends twice on the previous one, without memoization
+        # the taint evaluation is exponential in the number of vars
+        lines = ['$v0 = $_GET[1];']
+        for i in xrange(1, 60):
+            lines.append('$v%d = $v%d . $v%d;' % (i, i - 1, i - 1))
+        code = '<?php\n%s\n?>' % '\n'.join(lines)
+        vars = dict((v.name, v) for v in PhpSCA(code).get_vars())
+        self.assertTrue(vars['$v59'].controlled_by_user)
+        self.assertTrue(vars['$v59'].is_tainted_for('XSS'))
+        
+        # Cleaning an ancestor must invalidate the cached taint of its
+        # descendants
+        vars['$v1'].set_clean()
+        self.assertFalse(vars['$v59'].controlled_by_user)
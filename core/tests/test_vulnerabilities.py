@@ -21,6 +21,7 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
 from pymock import PyMockTestCase
 from core.sca_core import PhpSCA
+from core.nodes.function_call import FuncCall
 
 
 class TestVulnerabilities(PyMockTestCase):
@@ -178,6 +179,51 @@ class TestVulnerabilities(PyMockTestCase):
         self.assertEquals(3, vulns['XSS'][0][-1].lineno)
         self.assertEquals(2, vulns['XSS'][1][-1].lineno)
     
+    def test_vuln_traces_bounded(self):
+        # Every var depends twice on the previous one, the number of paths
+        # from the echo to $_GET is exponential
+        lines = ['$v0 = $_GET[1];']
+        for i in xrange(1, 40):
+            lines.append('$v%d = $v%d . $v%d;' % (i, i - 1, i - 1))
+        code = '<?php\n%s\necho $v39;\n?>' % '\n'.join(lines)
+        
+        vulns = PhpSCA(code).get_vulns()
+        traces = vulns['XSS']
+        self.assertEquals(FuncCall.MAX_VULNTRACES, len(traces))
+        # The trace of the last parents is always reported and complete
+        self.assertEquals('$v39', traces[-1][2].name)
+        self.assertEquals('$v0', traces[-1][-1].name)
+        self.assertEquals(42, len(traces[-1]))
+    
+    def test_vuln_traces_max_traces(self):
+        lines = ['$v0 = $_GET[1];']
+        for i in xrange(1, 20):
+            lines.append('$v%d = $v%d . $v%d;' % (i, i - 1, i - 1))
+        code = '<?php\n%s\necho $v19;\n?>' % '\n'.join(lines)
+        
+        vulns = PhpSCA(code, max_traces=5).get_vulns()
+        self.assertEquals(5, len(vulns['XSS']))
+        # The limit is per analysis
+        self.assertEquals(50, FuncCall.MAX_VULNTRACES)
+        vulns = PhpSCA(code).get_vulns()
+        self.assertEquals(FuncCall.MAX_VULNTRACES, len(vulns['XSS']))
+    
+    def test_vuln_traces_share_prefix(self):
+        code = '''<?php
+        $a = $_GET[1];
+        $b = $_GET[2];
+        $c = $a . $b;
+        echo $c;
+        ?>'''
+        analyzer = PhpSCA(code)
+        echo = analyzer.get_func_calls(vuln=True)[0]
+        traces = echo.get_vulntraces()
+        self.assertEquals(2, len(traces))
+        self.assertEquals(['$c', '$a'], [v.name for v in traces[0][3:]])
+        self.assertEquals(['$c', '$b'], [v.name for v in traces[1][3:]])
+        # Both traces share the elements up to $c
+        self.assertTrue(traces[0]._link.prev is traces[1]._link.prev)
+    
     def test_samevar(self):
         code = '''<?php
         $param = $_GET[1];
@@ -0,0 +1,56 @@
+'''
+tmp_dir.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import shutil
+import tempfile
+
+from pymock import PyMockTestCase
+
+
+class TmpDirTestCase(PyMockTestCase):
+    '''
+    Base of the tests that analyze files: FILES (name -> code) are written
+    to a new temp dir, self.tmp_dir, before every test.
+    '''
+
+    FILES = {}
+
+    def setUp(self):
+        PyMockTestCase.setUp(self)
+        self.tmp_dir = tempfile.mkdtemp()
+        for name, code in self.FILES.iteritems():
+            self._write(name, code)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def _write(self, name, code):
+        path = self._path(name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(code)
+        # Same size, make sure the change is noticed
+        mtime = os.stat(path).st_mtime
+        os.utime(path, (mtime, mtime + 1))
@@ -22,6 +22,8 @@ import phply.phpast as phpast
 
 from core.visitors.base_visitor import BaseVisitor
 from core.nodes.variable_def import VariableDef
+from core.nodes.class_template import ClassTemplate
+from core.symbol_index import SymbolIndex
 
 class AssignmentVisitor(BaseVisitor):
     '''
@@ -48,12 +50,11 @@ class AssignmentVisitor(BaseVisitor):
     Assignment(Variable('$result'), FunctionCall('mysql_query', [Parameter(BinaryOp('.', BinaryOp('.', "SELECT * FROM books WHERE Author = '", Variable('$q')), "'"), False)]), False)
     '''
 
+    NODE_TYPES = (phpast.Assignment,)
+
     def __init__(self, main_visitor_method):
         super(AssignmentVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.Assignment
-
     def visit(self, node, state):
         currscope = self.locate_scope(node, state)
         varnode = node.node
@@ -70,31 +71,40 @@ class AssignmentVisitor(BaseVisitor):
         
         currscope.add_var(newobj)
         
-        # New object property? Also add var to parent scope (if not exist)
-        if type(node.node) is phpast.ObjectProperty:
-            root_scope = currscope.get_root_scope()._parent_scope
-            if not root_scope.get_var(var_name): 
-                # create object var 
-                property = VariableDef(var_name, varnode.lineno, currscope, ast_node=node.expr)
-                property.parents = [newobj]
-                root_scope.add_var(property)
- 
-        # Overwrite object property
-        if type(node.node) is phpast.ObjectProperty:
-            # link this var to object property
+        # Object property set in a method. The method body is shared by all
+        # the instances, the value is stored in the instance the method is
+        # called on (see Obj.call_method)
+        if type(varnode) is phpast.ObjectProperty and \
+        getattr(varnode.node, 'name', None) == '$this':
             root_scope = currscope.get_root_scope()
             if type(root_scope._ast_node) is phpast.Method:
-                # link this var to property
-                root_scope._parent_scope.get_var(var_name).parents = [newobj]
-         
-        # Object creation
-        if type(node.expr) is phpast.New and node.expr.name in state.classes:
-            # Start ast travel class Node
-            class_node = state.classes[node.expr.name]
-            class_node._object = True
-            class_node._object_var = newobj # pass this var to object
-            class_node.accept(self._main_visitor_method)
+                root_scope._ast_node._method.add_property_write(newobj)
+                root_scope._parent_scope.obj.add_property(varnode.name,
+                                                          varnode.lineno)
+        
+        if type(node.expr) is phpast.New:
+            # Class declared later (hoisted), the object is created once the
+            # declaration is traveled
+            if node.expr.name in state.classes or \
+            not self.hoist(SymbolIndex.CLASS, node.expr.name, state,
+                           lambda: self.create_object(newobj, node, state)):
+                self.create_object(newobj, node, state)
 
         return newobj, False
+    
+    def create_object(self, newobj, node, state):
+        '''
+        Object creation, `newobj` is the var the new object is assigned to.
+        '''
+        if node.expr.name not in state.classes:
+            return
+        
+        class_node = state.classes[node.expr.name]
+        # The class body is analyzed once, every instance is created
+        # from its template
+        template = getattr(class_node, '_template', None)
+        if template is None:
+            template = class_node._template = ClassTemplate(class_node)
+        template.create_instance(newobj, class_node._parent_scope, state)
 
         
\ No newline at end of file
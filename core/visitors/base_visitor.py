@@ -21,6 +21,11 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 
 class BaseVisitor(object):
     
+    # AST node types handled by this visitor. PhpSCA uses them to build its
+    # dispatch table. None means that the visitor may handle any node type,
+    # in which case should_visit is called for every node.
+    NODE_TYPES = None
+    
     def __init__(self, main_visitor_method):
         '''
         @param main_visitor_method: The method in sca_core that visits all the nodes,
@@ -32,8 +37,19 @@ class BaseVisitor(object):
     def should_visit(self, nodety, node, state):
         '''
         @return: True when this visitor should parse @node
+        
+        By default the node type decides. Visitors that need to look at the
+        node or the state (dynamic predicates) override this method, it is
+        then called for every node of NODE_TYPES.
         '''
-        raise NotImplementedError
+        return self.NODE_TYPES is not None and nodety in self.NODE_TYPES
+    
+    def has_dynamic_predicate(self):
+        '''
+        @return: True when should_visit does more than checking NODE_TYPES
+        '''
+        return self.NODE_TYPES is None or \
+            type(self).should_visit.im_func is not BaseVisitor.should_visit.im_func
     
     def visit(self, node, state):
         '''
@@ -46,19 +62,71 @@ class BaseVisitor(object):
         '''
         raise NotImplementedError
     
+    def travel(self, nodes, parent, state, then=None):
+        '''
+        Travel `nodes` (e.g. a function body) and then call `then`.
+        
+        The nodes are pushed on the work stack of the running traversal, not
+        traveled by a nested 'accept' call, so deeply nested calls can't hit
+        the interpreter's recursion limit. They are traveled right after the
+        node being visited, before its siblings.
+        
+        @param parent: The parent node set to `nodes`, None to keep theirs
+        @param then: Function called once `nodes` are traveled
+        '''
+        stack = state.traversal
+        if stack is None:
+            # Not called from a traversal
+            for node in nodes:
+                if parent is not None:
+                    node._parent_node = parent
+                node.accept(self._main_visitor_method)
+            if then is not None:
+                then()
+            return
+        
+        if then is not None:
+            stack.append((None, then))
+        for node in reversed(nodes):
+            stack.append((node, parent))
+    
+    def hoist(self, kind, name, state, then=None):
+        '''
+        Travel the top level declaration of function or class `name` if the
+        traversal hasn't got to it yet (PHP declarations can be used before
+        the code that declares them).
+        
+        @param kind: SymbolIndex.FUNCTION or SymbolIndex.CLASS
+        @param then: Function called once the declaration is traveled (see
+                     travel)
+        @return: True if the declaration was found
+        '''
+        symbol = state.find_symbol(kind, name)
+        if symbol is None:
+            return False
+        self.travel([symbol.node], None, state, then)
+        return True
+    
     def locate_scope(self, node, state):
         '''
         Utility function that retrieves the scope for a node.
+        
+        The scope of every node is indexed when the node is entered by the
+        traversal (PhpSCA._visitor). Nodes that aren't traversed (e.g. the
+        params of a call) resolve to the scope of their closest indexed
+        ancestor.
         '''
-        while True:
-            currscope = state.scopes[-1]
-            if node.__class__.__name__ == 'GlobalParentNodeType' or \
-                self._compare_nodes(currscope._ast_node, node):
-                return currscope
-            state.scopes.pop()
-    
-    def _compare_nodes(self, ast_node, node):       
-        while getattr(node, '_parent_node', None):
-            node = node._parent_node
-            if ast_node == node:
-                return True
+        scope = getattr(node, '_enclosing_scope', None)
+        if scope is not None:
+            return scope
+        
+        parent = getattr(node, '_parent_node', None)
+        while parent is not None:
+            scope = getattr(parent, '_scope', None) or \
+                    getattr(parent, '_enclosing_scope', None)
+            if scope is not None:
+                return scope
+            parent = getattr(parent, '_parent_node', None)
+        
+        # Root node
+        return state.scopes[0]
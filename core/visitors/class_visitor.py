@@ -21,58 +21,23 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 import phply.phpast as phpast
 
 from core.visitors.base_visitor import BaseVisitor
-from core.nodes.variable_def import VariableDef
-from core.nodes.obj import Obj
-from core.scope import Scope
 
 
 class ClassVisitor(BaseVisitor):
     '''
-    Create new Scopes
+    Store the class declaration, instances are created from its
+    ClassTemplate (see AssignmentVisitor)
     '''
 
+    NODE_TYPES = (phpast.Class,)
+
     def __init__(self, main_visitor_method):
         super(ClassVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.Class
-
     def visit(self, node, state):
-        stoponthis = False
-        newobj = None
-        
         # global parent scope
-        parentscope = self.locate_scope(node, state)
+        node._parent_scope = self.locate_scope(node, state)
+        state.classes[node.name] = node
         
-        if not getattr(node, '_object', False):
-            # Start traveling node when instance is created
-            node._parent_scope = parentscope
-            state.classes[node.name] = node
-            stoponthis = True
-        else:
-            # new instance has been created
-            # Create new Scope and push it onto the stack
-            newscope = Scope(node, parent_scope=parentscope, is_root=True)
-            
-            # add builtins to scope
-            newscope._builtins = dict(
-                    ((uv, VariableDef(uv, -1, newscope)) for uv in VariableDef.USER_VARS))
-                            
-            state.scopes.append(newscope)
-            
-            newobj = Obj(node.name, node.lineno, newscope, node._object_var, ast_node=node)
-            
-            # create $this var for internal method calling
-            this_var = VariableDef('$this', node.lineno, newscope)
-            this_var._obj_def = newobj
-            newscope.add_var(this_var)
-            
-            # add ObjDef to VarDef, this way we can trace method call back to the correct instance
-            node._object_var._obj_def = newobj            
-            
-            node._scope = newscope
-            state.objects[node._object_var.name] = node._object_var
-
-        return newobj, stoponthis
-
-        
\ No newline at end of file
+        # The class body is not traveled, methods are traveled when called
+        return None, True
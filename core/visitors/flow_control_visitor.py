@@ -29,14 +29,12 @@ class FlowControlVisitor(BaseVisitor):
     Create new Scopes
     '''
 
+    NODE_TYPES = (phpast.Block, phpast.If, phpast.Else, phpast.ElseIf,
+                  phpast.While, phpast.DoWhile, phpast.For, phpast.Foreach)
+
     def __init__(self, main_visitor_method):
         super(FlowControlVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety in (phpast.Block, phpast.If, phpast.Else, phpast.ElseIf,
-                          phpast.While, phpast.DoWhile, phpast.For,
-                          phpast.Foreach)
-
     def visit(self, node, state):
         nodety = type(node)
         parentscope = self.locate_scope(node, state)
@@ -45,7 +43,7 @@ class FlowControlVisitor(BaseVisitor):
             parentscope = parentscope._parent_scope
         # Create new Scope and push it onto the stack
         newscope = Scope(node, parent_scope=parentscope)
-        state.scopes.append(newscope)
+        state.push_scope(newscope)
 
         return None, False
 
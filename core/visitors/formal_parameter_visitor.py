@@ -26,12 +26,11 @@ from core.nodes.variable_def import VariableDef
 
 class FormalParameterVisitor(BaseVisitor):
     
+    NODE_TYPES = (phpast.FormalParameter,)
+
     def __init__(self, main_visitor_method):
         super(FormalParameterVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.FormalParameter
-
     def visit(self, node, state):
         currscope = self.locate_scope(node, state)
         newobj = VariableDef(node.name, node.lineno, currscope, ast_node = node)
@@ -39,9 +38,7 @@ class FormalParameterVisitor(BaseVisitor):
         
         # If method add
         if type(node._parent_node) is phpast.Method:
-            method_name = node._parent_node.name
-            object_var = node._parent_node._parent_node._object_var
-            object_var._obj_def.get_method(method_name).add_formal_param(newobj)
+            node._parent_node._method.add_formal_param(newobj)
         # Function
         elif type(node._parent_node) is phpast.Function:
             function_name = node._parent_node.name
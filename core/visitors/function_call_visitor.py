@@ -22,6 +22,7 @@ import phply.phpast as phpast
 
 from core.visitors.base_visitor import BaseVisitor
 from core.nodes.function_call import FuncCall
+from core.symbol_index import SymbolIndex
 
 
 class FunctionCallVisitor(BaseVisitor):
@@ -29,14 +30,33 @@ class FunctionCallVisitor(BaseVisitor):
     Custom function call
     '''
 
+    NODE_TYPES = (phpast.FunctionCall,)
+
     def __init__(self, main_visitor_method):
         super(FunctionCallVisitor, self).__init__(main_visitor_method)
     
     def should_visit(self, nodety, node, state):
-        return nodety is phpast.FunctionCall and node.name in state.functions_declarations
+        return nodety is phpast.FunctionCall and \
+            (node.name in state.functions_declarations or
+             state.find_symbol(SymbolIndex.FUNCTION, node.name,
+                               load=False) is not None)
 
     def visit(self, node, state):
-
+        
+        # Function declared later (hoisted), the call is evaluated once the
+        # declaration is traveled
+        if node.name not in state.functions_declarations and \
+        self.hoist(SymbolIndex.FUNCTION, node.name, state,
+                   lambda: self.visit_call(node, state)):
+            return None, True
+        
+        return self.visit_call(node, state), True
+    
+    def visit_call(self, node, state):
+        '''
+        Create the FuncCall of `node` and evaluate the called function, if
+        it's declared.
+        '''
         # Link functionCall to custom function object
         functionObj = state.functions_declarations[node.name] if (node.name in state.functions_declarations) else None
         node._function = functionObj
@@ -53,9 +73,13 @@ class FunctionCallVisitor(BaseVisitor):
             functionObj._scope._dead_code = False
             
             # Evaluate if vulnerable (this state will be overridden upon new function call)
-            for funccall in functionObj._scope.get_functions():
-                vulntype = funccall.is_vulnerable_for()
-                if vulntype:
-                    funccall.add_vulntrace(vulntype)
+            if functionObj._parsing:
+                # Recursive call, the body hasn't been parsed yet
+                for funccall in functionObj._scope.get_functions():
+                    vulntype = funccall.is_vulnerable_for()
+                    if vulntype:
+                        funccall.add_vulntrace(vulntype)
+            else:
+                functionObj.get_summary().apply()
                 
-        return newobj, True
+        return newobj
@@ -33,13 +33,17 @@ class FunctionVisitor(BaseVisitor):
     node.name: test
     '''           
 
+    NODE_TYPES = (phpast.Function,)
+
     def __init__(self, main_visitor_method):
         super(FunctionVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.Function
-
     def visit(self, node, state):
+        declared = state.functions_declarations.get(node.name)
+        if declared is not None and declared._ast_node is node:
+            # Already traveled (hoisted, see BaseVisitor.hoist)
+            return None, True
+        
         # global parent scope
         parentscope = self.locate_scope(node, state)  
         
@@ -53,7 +57,7 @@ class FunctionVisitor(BaseVisitor):
         # Don't trigger vulnerabilities in this scope untill code is no longer dead
         newscope._dead_code = True
         
-        state.scopes.append(newscope)
+        state.push_scope(newscope)
         
         node._scope = newscope
        
@@ -62,7 +66,16 @@ class FunctionVisitor(BaseVisitor):
         
         # Store custom function
         state.functions_declarations[node.name] = newobj         
+        
+        # Travel the body now, this way we know when it's complete (see
+        # Function.get_summary)
+        newobj._parsing = True
+        
+        def parsed():
+            newobj._parsing = False
+        
+        self.travel(node.params + node.nodes, node, state, parsed)
 
-        return newobj, False
+        return newobj, True
 
         
\ No newline at end of file
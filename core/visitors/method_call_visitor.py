@@ -21,26 +21,33 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 import phply.phpast as phpast
 
 from core.visitors.base_visitor import BaseVisitor
-from core.nodes.function_call import FuncCall
+from core.nodes.function_call import FuncCall, get_receiver_class
 
 
 class MethodCallVisitor(BaseVisitor):
     '''
     node: MethodCall(Variable('$obj'), 'body', [Parameter(Variable('$hoi'), False)])
     node.node: Variable('$obj')
+    
+    Methods of classes that weren't analyzed ($db = new PDO(...),
+    DB::select(...)) are matched against the "Class::method" rules instead.
     '''
 
+    NODE_TYPES = (phpast.MethodCall, phpast.StaticMethodCall)
+
     def __init__(self, main_visitor_method):
         super(MethodCallVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.MethodCall
-
     def visit(self, node, state):
         currscope = self.locate_scope(node, state)
         method_name = getattr(node, 'name', node.__class__.__name__.lower())
+        
+        if type(node) is phpast.StaticMethodCall or \
+        (getattr(node.node, 'name', None) != '$this' and
+         getattr(node.node, 'name', None) not in state.objects):
+            return self.visit_library_call(node, state, currscope), True
                     
-        # Get object
+        # Get object, $this is the class template when traveling a method
         if node.node.name == '$this':
             object = currscope.get_root_scope()._parent_scope.obj
         else:    
@@ -48,63 +55,77 @@ class MethodCallVisitor(BaseVisitor):
         
         method = object.get_method(method_name)
         
-        # clean formal params to avoid false positives
-        method.clean_formal_params()
-        
-        # keep track of the methods being traveled
-        state.methods_deep.append(method)
-        
-        # Start ast travel method Node
+        # Start ast travel method Node, once for all the instances. The call
+        # is evaluated once the body is traveled
         if method._parsed is False:
             method._parsed = True
-            method._ast_node.accept(self._main_visitor_method)
-
+            method._parsing = True
+            
+            def parsed():
+                method._parsing = False
+                self.call_method(node, state, currscope, object, method)
+            
+            self.travel([method._ast_node], None, state, parsed)
+            return None, True
+        
+        return self.call_method(node, state, currscope, object, method), True
+    
+    def call_method(self, node, state, currscope, object, method):
+        '''
+        Create the FuncCall of `node` and evaluate the call of `method` on
+        `object`.
+        '''
         # Create funccall (parses the params)            
-        newobj = FuncCall(method_name, node.lineno, node, currscope)
+        newobj = FuncCall(node.name, node.lineno, node, currscope)
         
         # Add method object to call for easy reference
         newobj._method = method
         
-        # Keep track of what methods are called within this method
-        currscope.get_root_scope().add_method_call(newobj)
-                    
         # Set method scope as active code
-        method_scope = object.get_method(method_name)._scope
-        method_scope._dead_code = False
+        method._scope._dead_code = False
         
-        # Evaluate all raised methodcalls when all methods have been traveled
-        if state.methods_deep[0] is method:
-            
-            # 1.We need to link all params and formal params together
-            # all traveled methods
-            for method0 in state.methods_deep:
-                # All method calls in method
-                for method_call1 in method0._scope.get_method_calls():
-                    # Link
-                    for par_index, param in enumerate(method_call1.params):
-                        formal_param = method_call1._method.get_formal_param(par_index)
-                        formal_param._controlled_by_user = None
-                        formal_param.is_root = False
-                        formal_param.parents = param.vars
-                                           
-            # 2.Determine vulnerabilities
-            for method0 in state.methods_deep:
-                for method_call1 in method0._scope.get_method_calls():
-                    method_scope = method_call1._method._scope
-                    for funccall in method_scope.get_functions():
-                        vulntype = funccall.is_vulnerable_for()
-                        if vulntype: 
-                            funccall.add_vulntrace(vulntype)
-                    # clean formal params to avoid false positives
-                    method_call1._method.clean_formal_params()
-                    
-            # 3.Determine vulnerabilities for current method
-            for funccall in method._scope.get_functions():
-                vulntype = funccall.is_vulnerable_for()
-                if vulntype: 
-                    funccall.add_vulntrace(vulntype)
-            
-            # reset method call stack
-            state.methods_deep = []
+        if node.node.name == '$this':
+            # Evaluated for the instance the method it's in is called on
+            currscope.get_root_scope().add_method_call(newobj)
+        else:
+            object.call_method(method, newobj)
             
-        return newobj, True
\ No newline at end of file
+        return newobj
+    
+    def visit_library_call(self, node, state, currscope):
+        '''
+        Create the FuncCall of a method call whose class wasn't analyzed,
+        same as VulnerableFuncVisitor does for PHP functions.
+        '''
+        # Calls chained to this one, DB::table('users')->whereRaw(...)->get()
+        # are evaluated first
+        if type(node) is phpast.MethodCall and \
+        type(node.node) in (phpast.MethodCall, phpast.StaticMethodCall):
+            self.travel([node.node], node, state,
+                        lambda: self.library_call(node, state, currscope))
+            return None
+        
+        return self.library_call(node, state, currscope)
+    
+    def library_call(self, node, state, currscope):
+        '''
+        Create the FuncCall of the library method call `node` and evaluate
+        if it's vulnerable.
+        '''
+        class_name = get_receiver_class(node, currscope)
+        newobj = FuncCall(node.name, node.lineno, node, currscope, self,
+                          class_name=class_name)
+        state.functions.append(newobj)
+        
+        # Evaluate if vulnerable, if true add trace
+        vulntype = newobj.is_vulnerable_for()
+        if vulntype:
+            newobj.add_vulntrace(vulntype)
+        
+        # add vuln trace of pending trace (from param)
+        if getattr(newobj, '_pending_trace', None):
+            newobj.add_vulntrace(trace=newobj._pending_trace)
+            newobj._pending_trace = None
+        
+        currscope.get_root_scope().add_function(newobj)
+        return newobj
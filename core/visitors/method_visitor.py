@@ -21,52 +21,22 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 import phply.phpast as phpast
 
 from core.visitors.base_visitor import BaseVisitor
-from core.nodes.method import Method
-from core.nodes.variable_def import VariableDef
-from core.scope import Scope
 
 
 class MethodVisitor(BaseVisitor):
+    
+    NODE_TYPES = (phpast.Method,)
+
     def __init__(self, main_visitor_method):
         super(MethodVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.Method
-
     def visit(self, node, state):
-        stoponthis = False
-        newobj = None
-    
-        # Methodes are not traveled untill called, this enables us to call methods from within methods
-        method = node._parent_node._object_var._obj_def.get_method(node.name)
-        if method:
-            # Method object was already created, travel the children           
-            state.scopes.append(method._scope)
-        else:
-            # Create method so we can travel childres nodes when called
-            parentscope = self.locate_scope(node, state) 
-            # Create new Scope and push it onto the stack
-            newscope = Scope(node, parent_scope=parentscope, is_root=True)
-            # node seen
-            node._seen = True
-            # add builtins to scope
-            newscope._builtins = dict(
-                    ((uv, VariableDef(uv, -1, newscope)) for uv in VariableDef.USER_VARS))            
-            # Don't trigger vulnerabilities in this scope untill code is no longer dead
-            newscope._dead_code = True
-            
-            state.scopes.append(newscope)
-            
-            newobj = Method(node.name, node.lineno, newscope, ast_node=node)
-            
-            node._scope = newscope
-            
-            # add this method to object
-            node._parent_node._object_var._obj_def.add_method(newobj)
-            
-            # Stop parsing children nodes
-            stoponthis = True
-
-        return newobj, stoponthis
-
-        
\ No newline at end of file
+        # Methods are created with the object (see ClassTemplate) and only
+        # traveled when called (see MethodCallVisitor)
+        method = getattr(node, '_method', None)
+        if method is None:
+            return None, True
+        
+        # Travel the children in the method scope
+        state.push_scope(method._scope)
+        return None, False
@@ -26,12 +26,11 @@ from core.nodes.variable_def import VariableDef
 
 class ReturnVisitor(BaseVisitor):
 
+    NODE_TYPES = (phpast.Return,)
+
     def __init__(self, main_visitor_method):
         super(ReturnVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety is phpast.Return
-
     def visit(self, node, state):
         
         currscope = self.locate_scope(node, state)
@@ -20,8 +20,6 @@ Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
 import os
 
-from phply import phplex
-from phply.phpparse import parser
 import phply.phpast as phpast
 
 from core.visitors.base_visitor import BaseVisitor
@@ -35,32 +33,19 @@ class VulnerableFuncVisitor(BaseVisitor):
     PHP special functions: echo, print, include, require
     '''
 
+    NODE_TYPES = (phpast.FunctionCall, phpast.Echo, phpast.Print,
+                  phpast.Include, phpast.Require)
+
     def __init__(self, main_visitor_method):
         super(VulnerableFuncVisitor, self).__init__(main_visitor_method)
     
-    def should_visit(self, nodety, node, state):
-        return nodety in (phpast.FunctionCall, phpast.Echo, phpast.Print, 
-                          phpast.Include, phpast.Require)
-        
     def parse_include_require(self, node, state, currentscope):
         # TO DO: Smarter filename detection. For example if file is set in variable.
-        # Open file
         infile = os.path.join(state.path, str(node.expr))
-        try:
-            f = open(infile, 'r')
-        except IOError as e:
-            return
-
-        code = f.read()
-        
-        # Lexer instance
-        sublexer = phplex.lexer.clone()
         
-        # Code AST
-        try:
-            new_ast_code = parser.parse(code, lexer=sublexer)
-        except SyntaxError, se:
-            state.alerts.append("Error while parsing the code of include file '%s', syntax error: '%s'" % (infile, se))
+        # Code AST (parsed once per analysis)
+        new_ast_code = state.parse_include(infile)
+        if new_ast_code is None:
             return
     
         # Convenient definition of new node type
@@ -71,14 +56,18 @@ class VulnerableFuncVisitor(BaseVisitor):
         
         # Set parent to all nodes,
         for n in new_ast_code:
-            n._parent_node = node           
+            n._parent_node = new_pnode
+        
+        # Declarations in the included file can be used before the
+        # traversal gets to them
+        state.symbols.add_file(infile, new_ast_code)
         
         # Create scope
         newscope = Scope(new_pnode, parent_scope=currentscope)     
-        state.scopes.append(newscope)
+        state.push_scope(newscope)
         
         # Start AST travel
-        new_pnode.accept(self._main_visitor_method)
+        self.travel([new_pnode], None, state)
 
     def visit(self, node, state):
         currentscope = self.locate_scope(node, state)
@@ -18,6 +18,9 @@ You should have received a copy of the GNU General Public License
 along with w3af; if not, write to the Free Software
 Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
 '''
+import hashlib
+
+from core.vulnerabilities.rule_pack import load_rule_pack
 
 # Potentially Vulnerable Functions Database
 SENSITIVE_FUNCTIONS = {
@@ -44,6 +47,160 @@ VALIDATION_FUNCTIONS = {
          'mysqli_real_escape_string')
     }
 
+# Methods are listed as "Class::method". ANY_CLASS matches the method of any
+# class, e.g. "*::whereRaw" for query builders whose class can't be known.
+METHOD_SEPARATOR = '::'
+ANY_CLASS = '*'
+
+def _rule_key(fname):
+    '''
+    Return the index key for function or method name `fname`. PHP class
+    and method names are case insensitive.
+    '''
+    if METHOD_SEPARATOR in fname:
+        return fname.lower()
+    return fname
+
+def _build_index(functions_db):
+    '''
+    Return a dict that maps every function name in `functions_db` to the
+    tuple of vuln. types it's listed for.
+    
+    @param functions_db: Dict that maps vuln. types to function names
+    '''
+    index = {}
+    for vulnty, fnames in functions_db.iteritems():
+        for fname in fnames:
+            fname = _rule_key(fname)
+            vulntys = index.setdefault(fname, ())
+            if vulnty not in vulntys:
+                index[fname] = vulntys + (vulnty,)
+    return index
+
+def _merge_index(index, pack_index):
+    '''
+    Add the function name -> vuln. types entries of `pack_index` to `index`.
+    '''
+    for fname, pack_vulntys in pack_index.iteritems():
+        fname = _rule_key(fname)
+        vulntys = index.get(fname)
+        if vulntys is None:
+            index[fname] = pack_vulntys
+        else:
+            index[fname] = vulntys + tuple(v for v in pack_vulntys
+                                           if v not in vulntys)
+
+# Function name -> vuln. types indexes, built by compile_rules
+_SENSITIVE_INDEX = {}
+_VALIDATION_INDEX = {}
+# Hash of both indexes, see rules_fingerprint
+_FINGERPRINT = None
+
+# Loaded RulePacks, see load_rule_packs
+_RULE_PACKS = []
+
+def compile_rules():
+    '''
+    Build the lookup indexes from SENSITIVE_FUNCTIONS, VALIDATION_FUNCTIONS
+    and the loaded rule packs. Must be called again after changing them.
+    '''
+    global _SENSITIVE_INDEX, _VALIDATION_INDEX, _FINGERPRINT
+    sensitive = _build_index(SENSITIVE_FUNCTIONS)
+    validation = _build_index(VALIDATION_FUNCTIONS)
+    for pack in _RULE_PACKS:
+        _merge_index(sensitive, pack.sensitive)
+        _merge_index(validation, pack.validation)
+    _SENSITIVE_INDEX = sensitive
+    _VALIDATION_INDEX = validation
+    _FINGERPRINT = hashlib.sha1(repr((sorted(sensitive.iteritems()),
+                                      sorted(validation.iteritems())))
+                                ).hexdigest()
+
+compile_rules()
+
+def load_rule_packs(pack_paths, cache_dir=None):
+    '''
+    Load the rule packs in `pack_paths` (replacing the previously loaded
+    ones) and add their rules to the built-in ones. Raises RulePackError.
+    
+    @param pack_paths: List of rule pack file names
+    @param cache_dir: Where the compiled packs are cached, the user cache
+                      dir if None
+    '''
+    global _RULE_PACKS
+    _RULE_PACKS = [load_rule_pack(path, cache_dir) for path in pack_paths]
+    compile_rules()
+
+def rules_fingerprint():
+    '''
+    Return a hash of the compiled rules (built-in and rule packs). Results
+    computed with different rules must not be mixed up.
+    '''
+    return _FINGERPRINT
+
+def get_rule_packs():
+    return list(_RULE_PACKS)
+
+def get_rule_pack_paths():
+    return [pack.path for pack in _RULE_PACKS]
+
+def get_vulntys_for(fname):
+    '''
+    Return the tuple of vuln. types for the given function name `fname`.
+    
+    @param fname: Function name
+    '''
+    return _SENSITIVE_INDEX.get(fname, ())
+
+def _get_method_vulntys(index, class_name, method_name):
+    method_name = METHOD_SEPARATOR + method_name.lower()
+    vulntys = ()
+    if class_name:
+        vulntys = index.get(class_name.lower() + method_name, ())
+    return vulntys + tuple(v for v in index.get(ANY_CLASS + method_name, ())
+                           if v not in vulntys)
+
+def get_vulntys_for_method(class_name, method_name):
+    '''
+    Return the tuple of vuln. types for method `method_name` of class
+    `class_name` ("Class::method" and "*::method" rules).
+    
+    @param class_name: Class name, None when it isn't known
+    '''
+    return _get_method_vulntys(_SENSITIVE_INDEX, class_name, method_name)
+
+def get_vulntys_for_method_sec(class_name, method_name):
+    '''
+    Return the tuple of vuln. types secured by method `method_name` of
+    class `class_name`.
+    
+    @param class_name: Class name, None when it isn't known
+    '''
+    return _get_method_vulntys(_VALIDATION_INDEX, class_name, method_name)
+
+def get_sensitive_functions():
+    '''
+    Return the names of all the sensitive functions and methods (sinks).
+    Methods are returned without their class.
+    '''
+    return [fname.rpartition(METHOD_SEPARATOR)[2]
+            for fname in _SENSITIVE_INDEX]
+
+def get_all_vulntys():
+    '''
+    Return the vuln. types that have sensitive functions.
+    '''
+    return sorted(set(vulnty for vulntys in _SENSITIVE_INDEX.itervalues()
+                      for vulnty in vulntys))
+
+def get_vulntys_for_sec(sfname):
+    '''
+    Return the tuple of vuln. types secured by securing function `sfname`.
+    
+    @param sfname: Securing function name
+    '''
+    return _VALIDATION_INDEX.get(sfname, ())
+
 def get_vulnty_for(fname):
     '''
     Return the vuln type for the given function name `fname`. Return None
@@ -51,10 +208,8 @@ def get_vulnty_for(fname):
     
     @param fname: Function name
     '''
-    for vulnty, pvfnames in SENSITIVE_FUNCTIONS.iteritems():
-        if any(fname == pvfn for pvfn in pvfnames):
-            return vulnty
-    return None
+    vulntys = _SENSITIVE_INDEX.get(fname)
+    return vulntys[0] if vulntys else None
 
 def get_vulnty_for_sec(sfname):
     '''
@@ -62,7 +217,5 @@ def get_vulnty_for_sec(sfname):
     
     @param sfname: Securing function name 
     '''
-    for vulnty, sfnames in VALIDATION_FUNCTIONS.iteritems():
-        if any(sfname == sfn for sfn in sfnames):
-            return vulnty
-    return None
+    vulntys = _VALIDATION_INDEX.get(sfname)
+    return vulntys[0] if vulntys else None
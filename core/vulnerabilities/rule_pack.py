@@ -0,0 +1,166 @@
+'''
+rule_pack.py
+
+Copyright 2012 Andres Riancho
+
+This file is part of w3af, w3af.sourceforge.net .
+
+w3af is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation version 2 of the License.
+
+w3af is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with w3af; if not, write to the Free Software
+Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+'''
+import os
+import json
+import hashlib
+import cPickle
+
+from core.cache.disk_cache import user_cache_dir, write_file
+from core.exceptions.rule_pack_error import RulePackError
+
+
+# Bump when the compiled format changes
+FORMAT_VERSION = 1
+
+# Compiled packs are stored in the "rules" subdir of the cache dir,
+# "rules.pack" -> "rules-<hash of its path>.packc"
+COMPILED_DIR = 'rules'
+COMPILED_EXTENSION = '.packc'
+
+
+class RulePack(object):
+    '''
+    Set of sensitive (sink) and validation (sanitizer) function rules
+    loaded from a JSON file:
+    
+        {"name": "wordpress",
+         "sensitive": {"XSS": ["the_title", ...], ...},
+         "validation": {"XSS": ["esc_html", ...], ...}}
+    
+    Methods are listed as "Class::method" ("PDO::query"), "*::method"
+    matches the method of any class.
+    
+    The rules are kept compiled as function name -> vuln. types dicts, the
+    same layout used by core.vulnerabilities.definitions.
+    '''
+
+    def __init__(self, name, path, sensitive, validation):
+        self.name = name
+        self.path = path
+        self.sensitive = sensitive
+        self.validation = validation
+
+    def __len__(self):
+        return len(self.sensitive) + len(self.validation)
+
+    def __repr__(self):
+        return '<RulePack %s (%d rules)>' % (self.name, len(self))
+
+
+def _compile_section(pack_path, rules):
+    '''
+    Return the function name -> vuln. types dict for a section ("sensitive"
+    or "validation") of a rule pack.
+    '''
+    if not isinstance(rules, dict):
+        raise RulePackError("Invalid rule pack '%s': sections must map vuln. "
+                            "types to function names" % pack_path)
+    index = {}
+    for vulnty, fnames in rules.iteritems():
+        if not isinstance(fnames, list):
+            raise RulePackError("Invalid rule pack '%s': '%s' must be a list "
+                                "of function names" % (pack_path, vulnty))
+        vulnty = str(vulnty)
+        for fname in fnames:
+            fname = str(fname)
+            vulntys = index.get(fname, ())
+            if vulnty not in vulntys:
+                index[fname] = vulntys + (vulnty,)
+    return index
+
+
+def compile_rule_pack(pack_path):
+    '''
+    Parse the JSON rule pack in `pack_path` and return a RulePack.
+    '''
+    try:
+        with open(pack_path) as f:
+            data = json.load(f)
+    except IOError, ioe:
+        raise RulePackError("Can't read rule pack '%s': %s" % (pack_path, ioe))
+    except ValueError, ve:
+        raise RulePackError("Invalid rule pack '%s': %s" % (pack_path, ve))
+
+    if not isinstance(data, dict):
+        raise RulePackError("Invalid rule pack '%s': expected an object"
+                            % pack_path)
+
+    name = str(data.get('name') or
+               os.path.splitext(os.path.basename(pack_path))[0])
+    return RulePack(name, pack_path,
+                    _compile_section(pack_path, data.get('sensitive', {})),
+                    _compile_section(pack_path, data.get('validation', {})))
+
+
+def _source_stamp(pack_path):
+    st = os.stat(pack_path)
+    return (FORMAT_VERSION, st.st_mtime, st.st_size)
+
+
+def get_compiled_path(pack_path, cache_dir=None):
+    '''
+    Return the file name of the compiled `pack_path`.
+    
+    @param cache_dir: Cache directory, the user cache dir if None
+    '''
+    name = os.path.splitext(os.path.basename(pack_path))[0]
+    digest = hashlib.sha1(os.path.abspath(pack_path)).hexdigest()[:16]
+    return os.path.join(cache_dir or user_cache_dir(), COMPILED_DIR,
+                        '%s-%s%s' % (name, digest, COMPILED_EXTENSION))
+
+
+def load_rule_pack(pack_path, cache_dir=None):
+    '''
+    Return the RulePack for `pack_path`. The compiled pack is cached and
+    used as long as the pack doesn't change (same mtime and size), so big
+    packs are only parsed once.
+    
+    @param cache_dir: Where the compiled pack is cached (see get_compiled_path)
+    '''
+    try:
+        stamp = _source_stamp(pack_path)
+    except OSError, oe:
+        raise RulePackError("Can't read rule pack '%s': %s" % (pack_path, oe))
+
+    compiled_path = get_compiled_path(pack_path, cache_dir)
+    try:
+        with open(compiled_path, 'rb') as f:
+            cached_stamp, pack = cPickle.load(f)
+        if cached_stamp == stamp and isinstance(pack, RulePack):
+            return pack
+    except Exception:
+        # Missing, stale or broken compiled pack
+        pass
+
+    pack = compile_rule_pack(pack_path)
+
+    try:
+        dirname = os.path.dirname(compiled_path)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        # Other processes may be loading the same pack
+        write_file(compiled_path,
+                   cPickle.dumps((stamp, pack), cPickle.HIGHEST_PROTOCOL))
+    except (IOError, OSError):
+        # Read only location, compile it every time
+        pass
+
+    return pack
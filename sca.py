@@ -1,15 +1,29 @@
 #!/usr/bin/env python
+import os
 import sys
+import json
 import getopt
 
-from core.sca_core import PhpSCA
+from core.batch import analyze_files, BatchOptions
+from core.project import Project
+from core.incremental import Manifest, analyze_incremental, options_fingerprint
+from core.diff_scan import diff_scan
+from core.exceptions.git_error import GitError
+from core.stats import Stats
+from core.profiler import Profiler, COLUMNS
+from core.cache.ast_cache import ASTCache
+from core.nodes.function_call import FuncCall
+from core.vulnerabilities.definitions import load_rule_packs
+from core.exceptions.rule_pack_error import RulePackError
 
 usage_doc = '''sca - PHP static code analyzer
 
 Usage:
 
     ./sca.py -h
-    ./sca.py -i <input_file_1.php],[input_file_n.php]>
+    ./sca.py -i <input_file_1.php],[input_file_n.php]> [-c <cache_dir>] [-j <jobs>]
+    ./sca.py --project=<dir> [--include=<globs>] [--exclude=<globs>] [-i <entry points>]
+    ./sca.py --project=<git work tree> --git-diff=<base>[..<head>]
 
 Options:
 
@@ -18,6 +32,85 @@ Options:
         
     -i or --input-files=
         Input files to analyze for vulnerabilities.
+    
+    --project=
+        Analyze a whole directory. The functions and classes declared by
+        all the project files are indexed once and are available to every
+        analyzed file. The input files (-i) are the entry points, all the
+        project files when not given.
+    
+    --include=
+        Comma separated glob patterns of the project files (default:
+        *.php). Patterns are matched against the path relative to the
+        project directory and against the file name.
+    
+    --exclude=
+        Comma separated glob patterns of the files left out of the project,
+        e.g. "tests/*,vendor/*".
+    
+    --git-diff=
+        Only analyze the project files affected by the changes between two
+        git revisions (head defaults to HEAD): the changed files and the
+        ones that include them or use their functions and classes. Only
+        the findings that aren't in the base revision are reported. Can't
+        be used with --incremental.
+    
+    --prefilter
+        Skip the files that can't have vulnerabilities (no include, no
+        user input or no sensitive function) without parsing them. Syntax
+        errors in the skipped files aren't reported.
+    
+    --stats=
+        Write the time spent in every analysis phase (read, lex, parse,
+        traversal, taint, report) and counters (AST nodes visited, scopes,
+        variables, traces) of every file, and their total, to this JSON
+        file.
+    
+    --profile=
+        Write the calls and time spent in every visitor and AST node type,
+        summed over all the analyzed files, to this text file.
+    
+    --profile-sort=
+        Column the --profile tables are sorted by: calls, total or self
+        (default: self).
+    
+    --profile-dir=
+        Directory where a cProfile dump (<file>.pstats, see the pstats
+        module) of the analysis of every file is written.
+    
+    --incremental=
+        Manifest file with the results of the previous run. Only the input
+        files that changed, or include a file that changed, are analyzed
+        again; the results of the others are reused. The manifest is
+        updated at the end of the run.
+    
+    -c or --cache-dir=
+        Directory used to cache the parsed files between runs. Unchanged
+        files are not parsed again.
+    
+    --cache-size=
+        Max size of the cache directory in megabytes (default: 256).
+    
+    --cache-results
+        Also store the analysis results in the cache directory. A file is
+        not analyzed again while neither it nor the files it includes
+        change and the rules are the same.
+    
+    -j or --jobs=
+        Number of processes used to analyze the input files (default: 1).
+        Results are always printed in input file order.
+    
+    --max-traces=
+        Max number of vulnerability traces reported for a function call
+        (default: 50).
+    
+    -r or --rules=
+        Comma separated list of rule packs (JSON files with additional
+        sensitive and validation functions) to load. Methods are listed
+        as "Class::method", "*::method" matches any class. Packs for PHP
+        database extensions, WordPress and Laravel are shipped in
+        core/vulnerabilities/rules. The compiled packs are stored in the
+        cache directory, ~/.cache/sca without -c.
 
 For more info visit https://github.com/wvdongen/SCA
 '''
@@ -27,39 +120,193 @@ def usage():
 
 def main():
     try:
-        long_options = ['help', 'input-files=']
-        opts, _ = getopt.getopt(sys.argv[1:], "hi:", long_options)
+        long_options = ['help', 'input-files=', 'cache-dir=', 'cache-size=',
+                        'jobs=', 'max-traces=', 'rules=', 'project=',
+                        'include=', 'exclude=', 'incremental=', 'git-diff=',
+                        'cache-results', 'prefilter', 'stats=',
+                        'profile=', 'profile-sort=', 'profile-dir=']
+        opts, _ = getopt.getopt(sys.argv[1:], "hi:c:j:r:", long_options)
     except getopt.GetoptError:
         # print help information and exit:
         usage()
         return -3
     
     input_file_list = None
+    cache_dir = None
+    cache_size = ASTCache.MAX_SIZE
+    jobs = 1
+    max_traces = FuncCall.MAX_VULNTRACES
+    rule_packs = []
+    project_dir = None
+    include = Project.INCLUDE
+    exclude = ()
+    manifest_path = None
+    git_diff = None
+    cache_results = False
+    prefilter = False
+    stats_path = None
+    profile_path = None
+    profile_sort = 'self'
+    profile_dir = None
     
     for o, a in opts:
         if o in ('-h', '--help'):
             usage()
             return 0
-        if o in ('-i', '--input-files='):
+        if o in ('-i', '--input-files'):
             input_file_list = a.split(',')
+        if o in ('-c', '--cache-dir'):
+            cache_dir = a
+        if o == '--cache-size':
+            try:
+                cache_size = int(a) * 1024 * 1024
+            except ValueError:
+                usage()
+                return -3
+        if o in ('-j', '--jobs'):
+            try:
+                jobs = int(a)
+            except ValueError:
+                usage()
+                return -3
+        if o in ('-r', '--rules'):
+            rule_packs = a.split(',')
+        if o == '--project':
+            project_dir = a
+        if o == '--include':
+            include = a.split(',')
+        if o == '--exclude':
+            exclude = a.split(',')
+        if o == '--stats':
+            stats_path = a
+        if o == '--profile':
+            profile_path = a
+        if o == '--profile-sort':
+            if a not in COLUMNS:
+                usage()
+                return -3
+            profile_sort = a
+        if o == '--profile-dir':
+            profile_dir = a
+        if o == '--prefilter':
+            prefilter = True
+        if o == '--cache-results':
+            cache_results = True
+        if o == '--git-diff':
+            git_diff = a
+        if o == '--incremental':
+            manifest_path = a
+        if o == '--max-traces':
+            try:
+                max_traces = int(a)
+            except ValueError:
+                usage()
+                return -3
     
-    if input_file_list is None:
+    if input_file_list is None and project_dir is None:
         usage()
         return -3
-                
-    for input_file in input_file_list:
-        analyzer = PhpSCA(infile=input_file)
-        
-        for vulnerability_type in analyzer.get_vulns():
-            print vulnerability_type
-            for vulnerability in analyzer.get_vulns()[vulnerability_type]:
-                print '    ', vulnerability
+    
+    if cache_results and cache_dir is None:
+        usage()
+        return -3
+    
+    try:
+        # Compile them once before starting the workers
+        load_rule_packs(rule_packs, cache_dir)
+    except RulePackError, rpe:
+        print rpe
+        return -3
+    
+    options = BatchOptions(cache_dir, cache_size, max_traces, rule_packs,
+                           cache_results, prefilter=prefilter,
+                           stats=stats_path is not None,
+                           profile=profile_path is not None,
+                           profile_dir=profile_dir)
+    
+    if git_diff is not None:
+        # The diff scan has its own notion of what changed
+        if project_dir is None or manifest_path is not None:
+            usage()
+            return -3
+        base, _, head = git_diff.partition('..')
+        ast_cache = ASTCache(cache_dir, cache_size) if cache_dir else None
+        try:
+            results = diff_scan(project_dir, base, head or 'HEAD', include,
+                                exclude, jobs, options, ast_cache)
+        except GitError, ge:
+            print ge
+            return -3
+    else:
+        project = None
+        if project_dir is not None:
+            if not os.path.isdir(project_dir):
+                print "Project directory '%s' does not exist" % project_dir
+                return -3
+            ast_cache = ASTCache(cache_dir, cache_size) if cache_dir else None
+            project = Project(project_dir, include, exclude, ast_cache)
+            if input_file_list is None:
+                # The errors are reported along with the results
+                input_file_list = project.files
+            else:
+                for file_name in sorted(project.errors):
+                    print "Error in '%s': %s" % (file_name,
+                                                 project.errors[file_name])
         
-        if len(analyzer.get_alerts()) > 0:
-            print ''
-            print 'Alerts:'
-            for alert in analyzer.get_alerts():
-                print alert
+        if manifest_path is None:
+            results = analyze_files(input_file_list, jobs, options, project)
+        else:
+            manifest = Manifest(manifest_path,
+                                options_fingerprint(options, project))
+            results = analyze_incremental(input_file_list, manifest, jobs,
+                                          options, project)
+    
+    file_stats = {}
+    for result in results:
+        print_result(result)
+        if result.stats is not None:
+            file_stats[result.infile] = result.stats
+    
+    if manifest_path is not None:
+        manifest.save()
+    
+    if stats_path is not None:
+        write_stats(stats_path, file_stats)
+    
+    if profile_path is not None:
+        write_profile(profile_path, file_stats, profile_sort)
+
+def write_stats(stats_path, file_stats):
+    total = Stats()
+    for stats in file_stats.itervalues():
+        total.merge(stats)
+    with open(stats_path, 'w') as f:
+        json.dump({'total': total.to_dict(), 'files': file_stats}, f,
+                  indent=1, sort_keys=True)
+
+def write_profile(profile_path, file_stats, sort):
+    total = Profiler()
+    for stats in file_stats.itervalues():
+        total.merge(stats)
+    with open(profile_path, 'w') as f:
+        f.write(total.report(sort))
+
+def print_result(result):
+    if result.error:
+        print "Error in '%s': %s" % (result.infile, result.error)
+        return
+    
+    vulns = result.get_vulns()
+    for vulnerability_type in sorted(vulns):
+        print vulnerability_type
+        for vulnerability in vulns[vulnerability_type]:
+            print '    ', vulnerability
+    
+    if len(result.get_alerts()) > 0:
+        print ''
+        print 'Alerts:'
+        for alert in result.get_alerts():
+            print alert
 
 if __name__ == "__main__":
     err_code = main()